@@ -0,0 +1,146 @@
+# %%
+# performance
+import time
+import timeit
+# io
+import sys
+import pathlib
+import tempfile
+from pathlib import Path
+# data science
+import pandas as pd
+import numpy as np
+# EcoPylot
+ecopylot_root: pathlib.PosixPath =  Path(__file__).resolve().parents[2]
+sys.path.append(str(ecopylot_root))
+from ecopylot import stats
+from ecopylot import archive
+
+
+def create_stochastic_dataframe(
+    number_parameters: int,
+    iterations: int,
+) -> pd.DataFrame:
+    """
+    Create a synthetic stochastic dataframe, as returned by `stats.generate_stochastic_dataframe`.
+    """
+    df = pd.DataFrame(
+        data = {
+            'parameter': [f'p{i % 100}' for i in range(number_parameters)],
+            'year': 2000 + np.arange(number_parameters) % 51,
+            'uncertainty_type': 3,
+            'loc': 1.0,
+            'scale': 0.1,
+        },
+        index = [f'uid{i}' for i in range(number_parameters)],
+    )
+    return stats.generate_stochastic_dataframe(df, iterations, seed = 42)
+
+
+def read_npz(path: pathlib.Path, row: int, iteration: int) -> float:
+    """
+    Reads a single value from a compressed NumPy archive (as written by the command line interface).
+    """
+    with np.load(path) as npz:
+        return npz['samples'][row, iteration]
+
+
+def measure_function_time(
+    function,
+    repeat: int = 20,
+) -> float:
+    """
+    Measures the (median-of-``repeat``) time it takes to run a function.
+
+    See Also
+    --------
+    The Python ` `timeit.repeat` <https://docs.python.org/3/library/timeit.html#timeit.repeat>`_.
+    """
+    list_times: list = timeit.repeat(
+        stmt = function,
+        number = 1,
+        repeat = repeat,
+        timer = time.perf_counter,
+    )
+    return np.median(list_times)
+
+
+number_parameters: int = 10000
+iterations: int = 2000
+rng = np.random.default_rng(0)
+
+df = create_stochastic_dataframe(number_parameters, iterations)
+uids = list(df.index)
+
+list_results: list = []
+with tempfile.TemporaryDirectory() as directory:
+    path_npz = Path(directory) / 'samples.npz'
+    np.savez_compressed(path_npz, samples = stats.get_sample_matrix(df))
+    time_npz = measure_function_time(lambda: read_npz(path_npz, 0, 0), repeat = 3)
+
+    for compression in [None, 'zlib']:
+        path = Path(directory) / f'samples_{compression}.eco'
+        archive.write_archive(df, path, compression = compression)
+        archive.read_archive_samples(path, uids[:1], [0]) # open and cache the memory map
+        list_results.append({
+            'compression': str(compression),
+            'size [MiB]': path.stat().st_size / 2**20,
+            'point [ms]': 1E3 * measure_function_time(lambda: archive.read_archive_samples(path, [uids[rng.integers(number_parameters)]], [int(rng.integers(iterations))])),
+            'row [ms]': 1E3 * measure_function_time(lambda: archive.read_archive_samples(path, [uids[rng.integers(number_parameters)]])),
+            'column [ms]': 1E3 * measure_function_time(lambda: archive.read_archive_samples(path, None, [int(rng.integers(iterations))])),
+            'full [ms]': 1E3 * measure_function_time(lambda: archive.read_archive_samples(path), repeat = 3),
+        })
+
+df_measured = pd.DataFrame(list_results)
+
+print(f"{number_parameters} parameters x {iterations} iterations (np.load of the full .npz for a single value: {1E3 * time_npz:.1f} ms)")
+print(df_measured.to_string())
+
+# %%
+import matplotlib.pyplot as plt
+cm = 1/2.54 # for inches-cm conversion
+
+fig, ax = plt.subplots(
+    num = 'main',
+    nrows = 1,
+    ncols = 1,
+    dpi = 300,
+    figsize=(9*cm, 6*cm), # A4=(210x297)mm,
+)
+
+access: list = ['point [ms]', 'row [ms]', 'column [ms]']
+
+ax.set_ylabel('Read latency [ms]')
+ax.set_yscale('log')
+
+ax.set_xticks([i for i in range(len(access))])
+ax.set_xticklabels([label.split(' ')[0] for label in access])
+
+ax.set_title('Archive Random Access')
+
+ax.bar(
+    x = [i-0.2 for i in range(0, len(access))],
+    height = df_measured.loc[0, access],
+    width = 0.4,
+    color = 'orange',
+    label = 'uncompressed'
+)
+ax.bar(
+    x = [i+0.2 for i in range(0, len(access))],
+    height = df_measured.loc[1, access],
+    width = 0.4,
+    color = 'blue',
+    label = 'zlib'
+)
+
+ax.legend()
+
+file_path: pathlib.PosixPath = Path(__file__).resolve()
+figure_name: str = str(file_path.stem + '.pdf')
+
+plt.savefig(
+    fname = figure_name,
+    format="pdf",
+    bbox_inches='tight',
+    transparent = False
+)
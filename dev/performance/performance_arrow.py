@@ -0,0 +1,148 @@
+# %%
+# performance
+import time
+import timeit
+# io
+import sys
+import pathlib
+from pathlib import Path
+# data science
+import pandas as pd
+import numpy as np
+import pyarrow as pa
+# EcoPylot
+ecopylot_root: pathlib.PosixPath =  Path(__file__).resolve().parents[2]
+sys.path.append(str(ecopylot_root))
+from ecopylot import stats
+from ecopylot import arrow
+
+
+def measure_function_time(
+    function,
+    repeat: int = 3,
+) -> float:
+    """
+    Measures the (median-of-``repeat``) time it takes to run a function.
+
+    See Also
+    --------
+    The Python ` `timeit.repeat` <https://docs.python.org/3/library/timeit.html#timeit.repeat>`_.
+    """
+    list_times: list = timeit.repeat(
+        stmt = function,
+        number = 1,
+        repeat = repeat,
+        timer = time.perf_counter,
+    )
+    return np.median(list_times)
+
+
+def create_stochastic_dataframe(number_parameters: int, iterations: int) -> pd.DataFrame:
+    """
+    Creates a stochastic dataframe with string, list-valued and numeric metadata of the form:
+
+    | UID (index) | parameter   | sizes               | year | uncertainty_type | loc | minimum | maximum | parameter_value_stochastic |
+    |-------------|-------------|---------------------|------|------------------|-----|---------|---------|----------------------------|
+    | uid_0       | parameter 0 | ["Small", "Medium"] | 2020 | 4                | 5.1 | 4.1     | 6.1     | [4.5, 5.8, ...]            |
+    """
+    rng = np.random.default_rng(42)
+    sizes = [['Small'], ['Small', 'Medium'], ['Medium', 'Large'], ['Small', 'Medium', 'Large']]
+    loc = rng.uniform(1, 10, number_parameters)
+    df = pd.DataFrame(
+        data = {
+            'parameter': [f'parameter {uid % 100}' for uid in range(number_parameters)],
+            'sizes': [sizes[uid % len(sizes)] for uid in range(number_parameters)],
+            'year': 2020 + 10 * (np.arange(number_parameters) % 4),
+            'uncertainty_type': 4,
+            'loc': loc,
+            'minimum': loc - 1,
+            'maximum': loc + 1,
+        },
+        index = pd.Index([f'uid_{uid}' for uid in range(number_parameters)], name = 'UID'),
+    )
+    return stats.generate_stochastic_dataframe(df, iterations, seed = 42, counter_based = True)
+
+
+def export_pandas(df: pd.DataFrame) -> pa.Table:
+    """
+    The current route: conversion of the dataframe by pyarrow (as done by `polars.from_pandas` and DuckDB).
+    """
+    return pa.Table.from_pandas(df.drop(columns = ['parameter_value_distribution_dict']))
+
+
+iterations: int = 1000
+
+list_results: list = []
+for number_parameters in [1000, 10000, 50000]:
+    df = create_stochastic_dataframe(number_parameters, iterations)
+    samples: np.ndarray = stats.get_sample_matrix(df)
+
+    table = arrow.to_arrow_table(df)
+    table_pandas = export_pandas(df)
+
+    # same content, and the samples of the Arrow table are the buffer of the sample matrix
+    column = table.column('parameter_value_stochastic').chunk(0)
+    assert column.values.buffers()[1].address == samples.ctypes.data
+    assert np.array_equal(column.values.to_numpy().reshape(samples.shape), samples)
+    assert table.column('sizes').to_pylist() == table_pandas.column('sizes').to_pylist()
+
+    list_results.append({
+        'parameters': number_parameters,
+        'samples [MiB]': samples.nbytes / 2**20,
+        'pandas route [ms]': 1E3 * measure_function_time(lambda: export_pandas(df)),
+        'to_arrow_table [ms]': 1E3 * measure_function_time(lambda: arrow.to_arrow_table(df)),
+        'pandas route table [MiB]': table_pandas.nbytes / 2**20,
+    })
+    del df, samples, table, table_pandas
+
+df_measured = pd.DataFrame(list_results)
+df_measured['speedup'] = df_measured['pandas route [ms]'] / df_measured['to_arrow_table [ms]']
+
+print(f"Arrow handoff of stochastic dataframes ({iterations} iterations):")
+print(df_measured.to_string())
+
+# %%
+import matplotlib.pyplot as plt
+cm = 1/2.54 # for inches-cm conversion
+
+fig, ax = plt.subplots(
+    num = 'main',
+    nrows = 1,
+    ncols = 1,
+    dpi = 300,
+    figsize=(9*cm, 6*cm), # A4=(210x297)mm,
+)
+
+ax.set_xlabel('Number of parameters')
+ax.set_ylabel('Time [ms]')
+ax.set_xscale('log')
+ax.set_yscale('log')
+
+ax.set_title('Arrow Handoff')
+
+ax.plot(
+    df_measured['parameters'],
+    df_measured['pandas route [ms]'],
+    color = 'orange',
+    marker = 'o',
+    label = 'pa.Table.from_pandas'
+)
+ax.plot(
+    df_measured['parameters'],
+    df_measured['to_arrow_table [ms]'],
+    color = 'blue',
+    marker = 'o',
+    label = 'arrow.to_arrow_table'
+)
+
+ax.legend()
+
+file_path: pathlib.PosixPath = Path(__file__).resolve()
+figure_name: str = str(file_path.stem + '.pdf')
+
+plt.savefig(
+    fname = figure_name,
+    format="pdf",
+    bbox_inches='tight',
+    transparent = False
+)
@@ -0,0 +1,88 @@
+# %%
+# performance
+import time
+# io
+import sys
+import pathlib
+import tempfile
+from pathlib import Path
+# data science
+import pandas as pd
+import numpy as np
+# EcoPylot
+ecopylot_root: pathlib.PosixPath =  Path(__file__).resolve().parents[2]
+sys.path.append(str(ecopylot_root))
+from ecopylot import cli
+from ecopylot import inout
+
+
+def create_excel_file(path: pathlib.Path, number_parameters: int) -> None:
+    """
+    Creates a wide Excel parameter file of triangular and normal distributions (metrics ``base``, ``low``, ``high``, ``scale``).
+    """
+    rng = np.random.default_rng(42)
+    base = rng.uniform(1, 10, number_parameters)
+    mask_normal = np.arange(number_parameters) % 2 == 1
+    df = pd.DataFrame({
+        'parameter': [f'parameter {uid}' for uid in range(number_parameters)],
+        'sizes': ['Small, Medium' if uid % 3 else 'Large' for uid in range(number_parameters)],
+        'uncertainty distribution': np.where(mask_normal, 'normal', 'triangular'),
+        'year': 2020,
+        'base': base,
+        'low': np.where(mask_normal, np.nan, base - 1),
+        'high': np.where(mask_normal, np.nan, base + 1),
+        'scale': np.where(mask_normal, base / 10, np.nan),
+    })
+    inout.write_data_to_excel(df, path, metrics = ['base', 'low', 'high', 'scale'], code_col = None)
+
+
+iterations: int = 1000
+
+list_results: list = []
+with tempfile.TemporaryDirectory() as directory:
+    directory = Path(directory)
+    for number_parameters in [100, 1000, 10000]:
+        path = directory / f'parameters_{number_parameters}.xlsx'
+        create_excel_file(path, number_parameters)
+
+        time_start = time.perf_counter()
+        exit_code = cli.main(['sample', str(path), '--iterations', str(iterations), '--output-dir', str(directory / 'output')])
+        time_batch = time.perf_counter() - time_start
+        assert exit_code == 0
+
+        # the base/low/high/scale metrics are sampled as triangular and normal distributions, not as constants
+        samples = np.load(directory / 'output' / f'{path.stem}.npz')['samples']
+        assert samples.shape == (number_parameters, iterations)
+        assert (samples.std(axis = 1) > 0).all(), "Non-constant Excel rows were sampled as constants."
+
+        list_results.append({
+            'parameters': number_parameters,
+            'batch [s]': time_batch,
+        })
+
+    # files of the same name in different directories are written to mirrored output paths, files of the same stem are rejected
+    (directory / 'sub').mkdir()
+    create_excel_file(directory / 'sub' / 'parameters_100.xlsx', 10)
+    assert cli.main(['sample', str(directory / 'parameters_100.xlsx'), str(directory / 'sub'), '-n', '10', '-o', str(directory / 'mirrored')]) == 0
+    assert (directory / 'mirrored' / 'parameters_100.npz').exists() and (directory / 'mirrored' / 'sub' / 'parameters_100.npz').exists()
+    (directory / 'sub' / 'parameters_100.json').write_text('{}')
+    try:
+        cli.main(['sample', str(directory / 'sub'), '-n', '10', '-o', str(directory / 'colliding')])
+        raise AssertionError("Colliding output files were not rejected.")
+    except ValueError:
+        assert not (directory / 'colliding').exists()
+
+df_results = pd.DataFrame(list_results)
+print(df_results.to_string(index = False, float_format = '{:.3f}'.format))
+
+# %%
+import matplotlib.pyplot as plt
+
+fig, ax = plt.subplots(figsize = (6, 4))
+ax.plot(df_results['parameters'], df_results['batch [s]'], marker = 'o')
+ax.set_xscale('log')
+ax.set_xlabel('Number of Excel parameters')
+ax.set_ylabel('Time to load, sample and write [s]')
+ax.set_title(f'ecopylot sample ({iterations} iterations)')
+fig.tight_layout()
+plt.show()
@@ -0,0 +1,122 @@
+# %%
+# performance
+import time
+import timeit
+# io
+import sys
+import pathlib
+from pathlib import Path
+# data science
+import pandas as pd
+import numpy as np
+# EcoPylot
+ecopylot_root: pathlib.PosixPath =  Path(__file__).resolve().parents[2]
+sys.path.append(str(ecopylot_root))
+from ecopylot import stats
+from ecopylot import counter_rng
+
+
+def create_parameter_dataframe(
+    number_parameters: int,
+) -> pd.DataFrame:
+    """
+    Create a synthetic dataframe of bounded normal and triangular parameters, as returned by `inout.load_data_from_json`.
+    """
+    return pd.DataFrame(
+        data = {
+            'parameter': [f'p{i}' for i in range(number_parameters)],
+            'uncertainty_type': np.where(np.arange(number_parameters) % 2, 3, 5),
+            'loc': 1.0,
+            'scale': 0.1,
+            'minimum': 0.5,
+            'maximum': 2.0,
+        },
+        index = [f'uid{i}' for i in range(number_parameters)],
+    )
+
+
+def measure_function_time(
+    function,
+    repeat: int = 5,
+) -> float:
+    """
+    Measures the (median-of-``repeat``) time it takes to run a function.
+
+    See Also
+    --------
+    The Python ` `timeit.repeat` <https://docs.python.org/3/library/timeit.html#timeit.repeat>`_.
+    """
+    list_times: list = timeit.repeat(
+        stmt = function,
+        number = 1,
+        repeat = repeat,
+        timer = time.perf_counter,
+    )
+    return np.median(list_times)
+
+
+df = create_parameter_dataframe(100)
+uid: str = 'uid1'
+
+list_results: list = []
+for iteration in [10, 1000, 100000, 1000000]:
+    list_results.append({
+        'iteration': iteration,
+        'stream [ms]': 1E3 * measure_function_time(lambda: stats.get_sample_matrix(stats.generate_stochastic_dataframe(df.loc[[uid]].copy(), iteration + 1, seed = 42))[0, iteration], repeat = 3),
+        'counter-based [ms]': 1E3 * measure_function_time(lambda: counter_rng.generate_samples(df, [iteration], seed = 42, uids = [uid])[0, 0]),
+    })
+
+df_measured = pd.DataFrame(list_results)
+
+time_full = measure_function_time(lambda: stats.generate_stochastic_dataframe(df.copy(), 10000, seed = 42, counter_based = True), repeat = 3)
+time_blocks = measure_function_time(lambda: [counter_rng.generate_samples(df, slice(start, start + 1000), seed = 42) for start in range(0, 10000, 1000)], repeat = 3)
+
+print("Latency of a single sample (one UID) at increasing iteration numbers:")
+print(df_measured.to_string())
+print(f"Full matrix (100 x 10000): {time_full:.3f} s; in 10 independent blocks of 1000 iterations: {time_blocks:.3f} s")
+
+# %%
+import matplotlib.pyplot as plt
+cm = 1/2.54 # for inches-cm conversion
+
+fig, ax = plt.subplots(
+    num = 'main',
+    nrows = 1,
+    ncols = 1,
+    dpi = 300,
+    figsize=(9*cm, 6*cm), # A4=(210x297)mm,
+)
+
+ax.set_xlabel('Iteration')
+ax.set_ylabel('Latency [ms]')
+ax.set_xscale('log')
+ax.set_yscale('log')
+
+ax.set_title('Random Access to a Single Sample')
+
+ax.plot(
+    df_measured['iteration'],
+    df_measured['stream [ms]'],
+    marker = 'o',
+    color = 'orange',
+    label = 'per-UID stream'
+)
+ax.plot(
+    df_measured['iteration'],
+    df_measured['counter-based [ms]'],
+    marker = 'o',
+    color = 'blue',
+    label = 'counter-based'
+)
+
+ax.legend()
+
+file_path: pathlib.PosixPath = Path(__file__).resolve()
+figure_name: str = str(file_path.stem + '.pdf')
+
+plt.savefig(
+    fname = figure_name,
+    format="pdf",
+    bbox_inches='tight',
+    transparent = False
+)
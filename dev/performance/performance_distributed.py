@@ -0,0 +1,104 @@
+# %%
+# performance
+import time
+# io
+import sys
+import pathlib
+import tempfile
+from pathlib import Path
+# data science
+import pandas as pd
+import numpy as np
+# EcoPylot
+ecopylot_root: pathlib.PosixPath =  Path(__file__).resolve().parents[2]
+sys.path.append(str(ecopylot_root))
+from ecopylot import stats
+from ecopylot import distributed
+
+
+def create_sample_dataframe(number_parameters: int) -> pd.DataFrame:
+    """
+    Creates a parameter dataframe of normal, uniform, triangular and gamma distributions.
+    """
+    rng = np.random.default_rng(42)
+    loc = rng.uniform(1, 10, number_parameters)
+    return pd.DataFrame(
+        data = {
+            'uncertainty_type': rng.choice([3, 4, 5, 9], number_parameters),
+            'loc': loc,
+            'scale': loc / 10,
+            'shape': 2.0,
+            'minimum': loc - 1,
+            'maximum': loc + 1,
+        },
+        index = pd.Index([f'uid_{uid}' for uid in range(number_parameters)], name = 'UID'),
+    )
+
+
+if __name__ == '__main__': # worker processes are started with the 'spawn' method
+
+    number_parameters: int = 2000
+    iterations: int = 20000
+    df = create_sample_dataframe(number_parameters)
+
+    time_start = time.perf_counter()
+    samples_reference: np.ndarray = stats.get_sample_matrix(stats.generate_stochastic_dataframe(df.copy(), iterations, seed = 42, counter_based = True))
+    time_reference: float = time.perf_counter() - time_start
+
+    list_results: list = [{'workers': 0, 'tasks': 1, 'time [s]': time_reference}]
+    with tempfile.TemporaryDirectory() as directory:
+        for local_workers in [1, 2, 4, 8]:
+            time_start = time.perf_counter()
+            df_sharded = distributed.generate_stochastic_dataframe_sharded(
+                df = df.copy(),
+                iterations = iterations,
+                seed = 42,
+                output = Path(directory) / f'samples_{local_workers}.npy',
+                port = 0,
+                local_workers = local_workers,
+                iterations_per_task = 1000,
+            )
+            time_sharded: float = time.perf_counter() - time_start
+            # the samples do not depend on the number of workers or the tasks
+            assert np.array_equal(stats.get_sample_matrix(df_sharded), samples_reference)
+            list_results.append({'workers': local_workers, 'tasks': df_sharded.attrs['sharded_sampling']['tasks'], 'time [s]': time_sharded})
+            del df_sharded
+
+    df_measured = pd.DataFrame(list_results)
+    df_measured['speedup'] = time_reference / df_measured['time [s]']
+
+    print(f"Sharded sampling of {number_parameters} parameters x {iterations} iterations (0 workers: single process):")
+    print(df_measured.to_string())
+
+    # %%
+    import matplotlib.pyplot as plt
+    cm = 1/2.54 # for inches-cm conversion
+
+    fig, ax = plt.subplots(
+        num = 'main',
+        nrows = 1,
+        ncols = 1,
+        dpi = 300,
+        figsize=(9*cm, 6*cm), # A4=(210x297)mm,
+    )
+
+    ax.set_xlabel('Local workers')
+    ax.set_ylabel('Time [s]')
+
+    ax.set_title('Sharded Sampling')
+
+    ax.bar(
+        x = df_measured['workers'].astype(str),
+        height = df_measured['time [s]'],
+        color = 'blue',
+    )
+
+    file_path: pathlib.PosixPath = Path(__file__).resolve()
+    figure_name: str = str(file_path.stem + '.pdf')
+
+    plt.savefig(
+        fname = figure_name,
+        format="pdf",
+        bbox_inches='tight',
+        transparent = False
+    )
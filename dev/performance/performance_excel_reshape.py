@@ -0,0 +1,149 @@
+# %%
+# performance
+import time
+import timeit
+# io
+import sys
+import pathlib
+from pathlib import Path
+# data science
+import pandas as pd
+import numpy as np
+# EcoPylot
+ecopylot_root: pathlib.PosixPath =  Path(__file__).resolve().parents[2]
+sys.path.append(str(ecopylot_root))
+from ecopylot import inout
+
+
+def create_wide_sheet(
+    number_rows: int,
+    number_years: int = 50,
+    metrics: tuple = ('loc', 'low', 'high'),
+    fraction_missing: float = 0.2,
+) -> pd.DataFrame:
+    """
+    Create a synthetic wide Excel sheet, as returned by `inout._load_excel`.
+
+    The sheet is of the form:
+
+    |       | 0         | 1    | 2    | 3    | 4    | ... |
+    |-------|-----------|------|------|------|------|-----|
+    | 0     | parameter | unit | 2001 | 2001 | 2001 | ... |
+    | 1     | NaN       | NaN  | loc  | low  | high | ... |
+    | 2     | p0        | kg   | 1.5  | 1    | 2    | ... |
+    | 3     | p1        | kg   | NaN  | NaN  | NaN  | ... |
+
+    where a fraction ``fraction_missing`` of the year blocks are empty.
+    """
+    rng = np.random.default_rng(42)
+    years = np.repeat(np.arange(2001, 2001 + number_years), len(metrics))
+    values = rng.uniform(low = 0.0, high = 10.0, size = (number_rows, number_years, len(metrics)))
+    values[rng.uniform(size = (number_rows, number_years)) < fraction_missing] = np.nan
+    header = np.array(
+        [
+            ['parameter', 'unit'] + list(years),
+            [np.nan, np.nan] + list(metrics) * number_years,
+        ],
+        dtype = object,
+    )
+    strings = np.column_stack([
+        np.array([f'p{i}' for i in range(number_rows)], dtype = object),
+        np.full(number_rows, 'kg', dtype = object),
+    ])
+    body = np.hstack([strings, values.reshape(number_rows, -1).astype(object)])
+    return pd.DataFrame(np.vstack([header, body]))
+
+
+def reshape_stack(df: pd.DataFrame) -> pd.DataFrame:
+    return inout._stack_dataframe(inout._set_dataframe_indices(df))
+
+
+def reshape_numpy(df: pd.DataFrame) -> pd.DataFrame:
+    return inout._reshape_dataframe_to_long(df)
+
+
+def measure_function_time(
+    function,
+    df: pd.DataFrame,
+    repeat: int = 3,
+) -> float:
+    """
+    Measures the (best-of-``repeat``) time it takes to run a function.
+
+    See Also
+    --------
+    The Python ` `timeit.repeat` <https://docs.python.org/3/library/timeit.html#timeit.repeat>`_.
+    """
+    list_times: list = timeit.repeat(
+        stmt = lambda: function(df.copy()),
+        number = 1,
+        repeat = repeat,
+        timer = time.perf_counter,
+    )
+    return np.min(list_times)
+
+
+df_time_measured = pd.DataFrame(
+    data = {
+        "rows": [1E2, 1E3, 5E3, 1E4],
+    }
+)
+df_time_measured['rows'] = df_time_measured['rows'].astype(int)
+
+list_sheets: list = [create_wide_sheet(number_rows) for number_rows in df_time_measured['rows']]
+
+for df_sheet in list_sheets:
+    pd.testing.assert_frame_equal(reshape_stack(df_sheet.copy()), reshape_numpy(df_sheet.copy()))
+
+df_time_measured['time_stack'] = [measure_function_time(reshape_stack, df_sheet) for df_sheet in list_sheets]
+df_time_measured['time_numpy'] = [measure_function_time(reshape_numpy, df_sheet) for df_sheet in list_sheets]
+df_time_measured['speedup'] = df_time_measured['time_stack'] / df_time_measured['time_numpy']
+
+print(df_time_measured)
+
+# %%
+import matplotlib.pyplot as plt
+cm = 1/2.54 # for inches-cm conversion
+
+fig, ax = plt.subplots(
+    num = 'main',
+    nrows = 1,
+    ncols = 1,
+    dpi = 300,
+    figsize=(9*cm, 6*cm), # A4=(210x297)mm,
+)
+
+ax.set_ylabel('Runtime [s]')
+ax.set_xlabel('Rows (50 years x 3 metrics)')
+
+ax.set_xticks([i for i in range(len(df_time_measured))])
+ax.set_xticklabels(list(df_time_measured['rows']))
+
+ax.set_title('Excel Wide-to-Long Reshape')
+
+ax.bar(
+    x = [i-0.2 for i in range(0, len(df_time_measured))],
+    height = df_time_measured['time_stack'],
+    width = 0.4,
+    color = 'orange',
+    label = 'DataFrame.stack'
+)
+ax.bar(
+    x = [i+0.2 for i in range(0, len(df_time_measured))],
+    height = df_time_measured['time_numpy'],
+    width = 0.4,
+    color = 'blue',
+    label = 'NumPy reshape'
+)
+
+ax.legend()
+
+file_path: pathlib.PosixPath = Path(__file__).resolve()
+figure_name: str = str(file_path.stem + '.pdf')
+
+plt.savefig(
+    fname = figure_name,
+    format="pdf",
+    bbox_inches='tight',
+    transparent = False
+)
@@ -0,0 +1,134 @@
+# %%
+# performance
+import time
+import tracemalloc
+# io
+import sys
+import pathlib
+import tempfile
+from pathlib import Path
+# data science
+import pandas as pd
+import numpy as np
+import openpyxl
+# EcoPylot
+ecopylot_root: pathlib.PosixPath =  Path(__file__).resolve().parents[2]
+sys.path.append(str(ecopylot_root))
+from ecopylot import inout
+
+
+def create_wide_workbook(
+    path: pathlib.Path,
+    number_rows: int,
+    number_years: int = 50,
+    metrics: tuple = ('loc', 'low', 'high'),
+) -> None:
+    """
+    Create a synthetic wide Excel workbook of the form expected by `inout.load_data_from_excel`.
+    """
+    rng = np.random.default_rng(42)
+    workbook = openpyxl.Workbook(write_only = True)
+    worksheet = workbook.create_sheet('parameters')
+    worksheet.append(['parameter', 'unit', 'uncertainty distribution'] + [year for year in range(2001, 2001 + number_years) for _ in metrics])
+    worksheet.append([None, None, None] + list(metrics) * number_years)
+    for i in range(number_rows):
+        values = rng.uniform(low = 0.0, high = 10.0, size = number_years * len(metrics))
+        worksheet.append([f'p{i}', 'kg', 'triangular'] + values.tolist())
+    workbook.save(path)
+
+
+def read_pandas(path: pathlib.Path) -> pd.DataFrame:
+    return inout._reshape_dataframe_to_long(inout._load_excel(path))
+
+
+def read_streaming(path: pathlib.Path) -> pd.DataFrame:
+    return inout._read_excel_streaming(path)
+
+
+def measure_function_time_and_memory(function, path: pathlib.Path) -> tuple:
+    """
+    Measures the time and the peak (Python-allocated) memory it takes to run a function.
+
+    See Also
+    --------
+    The Python `tracemalloc <https://docs.python.org/3/library/tracemalloc.html>`_ module.
+    """
+    tracemalloc.start()
+    time_start = time.perf_counter()
+    function(path)
+    time_elapsed = time.perf_counter() - time_start
+    memory_peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return time_elapsed, memory_peak / 2**20
+
+
+df_measured = pd.DataFrame(
+    data = {
+        "rows": [1E2, 1E3, 5E3],
+    }
+)
+df_measured['rows'] = df_measured['rows'].astype(int)
+
+with tempfile.TemporaryDirectory() as directory:
+    list_results: list = []
+    for number_rows in df_measured['rows']:
+        path = Path(directory) / f'wide_{number_rows}.xlsx'
+        create_wide_workbook(path, number_rows)
+        df_pandas = read_pandas(path)
+        df_streaming = read_streaming(path)
+        np.testing.assert_array_equal(df_pandas[['loc', 'low', 'high']].to_numpy(dtype = float), df_streaming[['loc', 'low', 'high']].to_numpy())
+        list_results.append(
+            measure_function_time_and_memory(read_pandas, path)
+            + measure_function_time_and_memory(read_streaming, path)
+        )
+
+df_measured[['time_pandas', 'memory_pandas [MiB]', 'time_streaming', 'memory_streaming [MiB]']] = list_results
+
+print(df_measured.to_string())
+
+# %%
+import matplotlib.pyplot as plt
+cm = 1/2.54 # for inches-cm conversion
+
+fig, ax = plt.subplots(
+    num = 'main',
+    nrows = 1,
+    ncols = 1,
+    dpi = 300,
+    figsize=(9*cm, 6*cm), # A4=(210x297)mm,
+)
+
+ax.set_ylabel('Runtime [s]')
+ax.set_xlabel('Rows (50 years x 3 metrics)')
+
+ax.set_xticks([i for i in range(len(df_measured))])
+ax.set_xticklabels(list(df_measured['rows']))
+
+ax.set_title('Excel Load to Long-Form')
+
+ax.bar(
+    x = [i-0.2 for i in range(0, len(df_measured))],
+    height = df_measured['time_pandas'],
+    width = 0.4,
+    color = 'orange',
+    label = 'pd.read_excel'
+)
+ax.bar(
+    x = [i+0.2 for i in range(0, len(df_measured))],
+    height = df_measured['time_streaming'],
+    width = 0.4,
+    color = 'blue',
+    label = 'openpyxl read-only'
+)
+
+ax.legend()
+
+file_path: pathlib.PosixPath = Path(__file__).resolve()
+figure_name: str = str(file_path.stem + '.pdf')
+
+plt.savefig(
+    fname = figure_name,
+    format="pdf",
+    bbox_inches='tight',
+    transparent = False
+)
@@ -0,0 +1,94 @@
+# %%
+# performance
+import time
+# io
+import sys
+import pathlib
+from pathlib import Path
+# data science
+import pandas as pd
+import numpy as np
+# EcoPylot
+ecopylot_root: pathlib.PosixPath =  Path(__file__).resolve().parents[2]
+sys.path.append(str(ecopylot_root))
+from ecopylot import stats
+from ecopylot import expressions
+
+
+def create_stochastic_dataframe(number_powertrains: int, iterations: int) -> pd.DataFrame:
+    """
+    Creates a stochastic dataframe of ``mass`` and ``power`` per year and powertrain, and of a year-independent ``efficiency`` per powertrain.
+    """
+    years: list = [2020, 2030, 2040, 2050]
+    powertrains: list = [f'powertrain {number}' for number in range(number_powertrains)]
+    df_mass = pd.DataFrame([(parameter, year, powertrain) for parameter in ['mass', 'power'] for year in years for powertrain in powertrains], columns = ['parameter', 'year', 'powertrain'])
+    df_efficiency = pd.DataFrame({'parameter': 'efficiency', 'year': np.nan, 'powertrain': powertrains})
+    df = pd.concat([df_mass, df_efficiency], ignore_index = True)
+    df['uncertainty_type'] = 4
+    df['minimum'] = np.where(df['parameter'] == 'efficiency', 0.8, 1000.0)
+    df['maximum'] = np.where(df['parameter'] == 'efficiency', 0.95, 2000.0)
+    df.index = pd.Index([str(uid) for uid in range(len(df))], name = 'UID')
+    return stats.generate_stochastic_dataframe(df, iterations, seed = 42)
+
+
+def evaluate_with_pandas(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Evaluates ``specific power = power / mass / efficiency`` with one row lookup per key combination.
+    """
+    df_efficiency = df[df['parameter'] == 'efficiency'].set_index('powertrain')
+    list_rows: list = []
+    for (year, powertrain), df_group in df[df['parameter'] != 'efficiency'].groupby(['year', 'powertrain']):
+        values = df_group.set_index('parameter')['parameter_value_stochastic']
+        list_rows.append((year, powertrain, values['power'] / values['mass'] / df_efficiency.loc[powertrain, 'parameter_value_stochastic']))
+    return pd.DataFrame(list_rows, columns = ['year', 'powertrain', 'parameter_value_stochastic'])
+
+
+iterations: int = 1000
+formulas: dict = {'specific power': 'power / mass / efficiency'}
+
+list_results: list = []
+for number_powertrains in [10, 100, 1000]:
+    df = create_stochastic_dataframe(number_powertrains, iterations)
+
+    time_start = time.perf_counter()
+    df_derived = expressions.evaluate_expressions(df, formulas, keys = ['year', 'powertrain'])
+    time_expressions = time.perf_counter() - time_start
+
+    time_start = time.perf_counter()
+    df_reference = evaluate_with_pandas(df)
+    time_pandas = time.perf_counter() - time_start
+
+    df_derived = df_derived.sort_values(['year', 'powertrain'])
+    assert np.allclose(np.vstack(df_derived['parameter_value_stochastic']), np.vstack(df_reference['parameter_value_stochastic']))
+
+    list_results.append({
+        'key combinations': len(df_derived),
+        'expressions [s]': time_expressions,
+        'pandas [s]': time_pandas,
+        'speedup': time_pandas / time_expressions,
+    })
+
+# keys without any value among the referenced parameters (eg. only year-independent parameters) form a single wildcard group
+df = create_stochastic_dataframe(10, iterations)
+df_year_independent = df[df['parameter'] == 'efficiency']
+df_derived = expressions.evaluate_expressions(df_year_independent, {'losses': '1 - efficiency'}, keys = ['year', 'powertrain'])
+assert len(df_derived) == 10 and df_derived['year'].isna().all()
+assert np.allclose(np.vstack(df_derived['parameter_value_stochastic']), 1 - stats.get_sample_matrix(df_year_independent))
+
+df_results = pd.DataFrame(list_results)
+print(df_results.to_string(index = False, float_format = '{:.3f}'.format))
+
+# %%
+import matplotlib.pyplot as plt
+
+fig, ax = plt.subplots(figsize = (6, 4))
+ax.plot(df_results['key combinations'], df_results['pandas [s]'], marker = 'o', label = 'pandas lookups')
+ax.plot(df_results['key combinations'], df_results['expressions [s]'], marker = 'o', label = 'expressions.evaluate_expressions')
+ax.set_xscale('log')
+ax.set_yscale('log')
+ax.set_xlabel('Number of key combinations')
+ax.set_ylabel('Time [s]')
+ax.set_title(f'Derived parameter evaluation ({iterations} iterations)')
+ax.legend()
+fig.tight_layout()
+plt.show()
@@ -0,0 +1,164 @@
+# %%
+# performance
+import time
+import timeit
+# io
+import sys
+import pathlib
+from pathlib import Path
+# data science
+import pandas as pd
+import numpy as np
+import scipy.stats
+import stats_arrays as sarrays
+# EcoPylot
+ecopylot_root: pathlib.PosixPath =  Path(__file__).resolve().parents[2]
+sys.path.append(str(ecopylot_root))
+from ecopylot import inverse_cdf
+from ecopylot import stats
+
+
+def measure_function_time(
+    function,
+    repeat: int = 3,
+) -> float:
+    """
+    Measures the (median-of-``repeat``) time it takes to run a function.
+
+    See Also
+    --------
+    The Python ` `timeit.repeat` <https://docs.python.org/3/library/timeit.html#timeit.repeat>`_.
+    """
+    list_times: list = timeit.repeat(
+        stmt = function,
+        number = 1,
+        repeat = repeat,
+        timer = time.perf_counter,
+    )
+    return np.median(list_times)
+
+
+# (uncertainty type, stats_arrays parameters, offset of the standardized distribution, exact quantile function of scipy.stats)
+cases: list = [
+    (9, {'loc': 0.0, 'scale': 2.0, 'shape': 0.1}, 0.0, lambda u: scipy.stats.gamma.ppf(u, 0.1, scale = 2.0)),
+    (9, {'loc': 1.0, 'scale': 2.0, 'shape': 1.5}, 1.0, lambda u: scipy.stats.gamma.ppf(u, 1.5, loc = 1.0, scale = 2.0)),
+    (9, {'loc': 0.0, 'scale': 1.0, 'shape': 200.0}, 0.0, lambda u: scipy.stats.gamma.ppf(u, 200.0)),
+    (10, {'loc': 0.5, 'shape': 0.5}, 0.0, lambda u: scipy.stats.beta.ppf(u, 0.5, 0.5)),
+    (10, {'loc': 2.0, 'shape': 5.0, 'minimum': 1.0, 'maximum': 4.0}, 1.0, lambda u: scipy.stats.beta.ppf(u, 2.0, 5.0, loc = 1.0, scale = 3.0)),
+    (12, {'loc': 0.0, 'scale': 1.0, 'shape': 1.0}, 0.0, lambda u: scipy.stats.t.ppf(u, 1.0)),
+    (12, {'loc': 1.0, 'scale': 2.0, 'shape': 4.0}, 1.0, lambda u: scipy.stats.t.ppf(u, 4.0, loc = 1.0, scale = 2.0)),
+    (13, {'loc': 2.0, 'minimum': 1.0, 'maximum': 4.0}, 1.0, lambda u: 1.0 + 3.0 * scipy.stats.beta.ppf(u, 1 + 4 / 3, 1 + 8 / 3)),
+]
+
+rng = np.random.default_rng(42)
+u: np.ndarray = np.concatenate([
+    rng.random(1000000),
+    np.logspace(-16, -1, 1000), # lower tail
+    1 - np.logspace(-16, -1, 1000), # upper tail
+    [2.0**-53, 1 - 2.0**-53], # extreme uniforms of `counter_rng`
+])
+
+list_results: list = []
+for rtol in [1e-6, 1e-10]:
+    inverse_cdf._build_table.cache_clear()
+    for uncertainty_type, params, offset, ppf_exact in cases:
+        parameters = sarrays.UncertaintyBase.from_dicts({**params, 'uncertainty_type': uncertainty_type})
+        exact = ppf_exact(u)
+        time_build = measure_function_time(lambda: inverse_cdf.tabulated_ppf(parameters, u[:1].reshape(1, -1), rtol), repeat = 1) # builds and caches the table
+        tabulated = inverse_cdf.tabulated_ppf(parameters, u.reshape(1, -1), rtol)[0]
+        iqr = float(np.subtract(*ppf_exact(np.array([0.75, 0.25]))))
+        error = np.max(np.abs(tabulated - exact) / (np.abs(exact - offset) + iqr)) # error bound of `tabulated_ppf`, in the units of the samples
+        assert error <= 1.01 * rtol, f"Quantile error {error:.1e} of type {uncertainty_type} {params} exceeds rtol={rtol}"
+        list_results.append({
+            'rtol': rtol,
+            'type': uncertainty_type,
+            'parameters': str(params),
+            'max error': error,
+            'table build [ms]': 1E3 * time_build,
+            'exact [ms]': 1E3 * measure_function_time(lambda: ppf_exact(u)),
+            'tabulated [ms]': 1E3 * measure_function_time(lambda: inverse_cdf.tabulated_ppf(parameters, u.reshape(1, -1), rtol)),
+        })
+
+df_measured = pd.DataFrame(list_results)
+df_measured['speedup'] = df_measured['exact [ms]'] / df_measured['tabulated [ms]']
+
+print(f"Quantile accuracy against scipy.stats ({len(u)} uniforms, including tails down to 1e-16): all within rtol.")
+print(df_measured.to_string())
+
+# end-to-end: the tables only accelerate counter-based sampling relative to its exact inverse functions;
+# the default sampling of stats_arrays (not inverse transform sampling) remains faster for gamma rows
+number_rows: int = 5000
+dict_paths: dict = {
+    'default, unseeded': {},
+    'default, seeded': {'seed': 42},
+    'counter-based, exact': {'seed': 42, 'counter_based': True},
+    'counter-based, rtol=1e-8': {'seed': 42, 'counter_based': True, 'rtol': 1e-8},
+}
+list_end_to_end: list = []
+for number_shapes in [10, number_rows]:
+    inverse_cdf._build_table.cache_clear()
+    df_gamma = pd.DataFrame({
+        'parameter': 'gamma',
+        'uncertainty_type': 9,
+        'loc': 0.0,
+        'scale': 2.0,
+        'shape': np.resize(np.linspace(0.5, 5, number_shapes), number_rows),
+    })
+    df_gamma.index = pd.Index([str(uid) for uid in range(number_rows)], name = 'UID')
+    for path, kwargs in dict_paths.items():
+        list_end_to_end.append({
+            'shapes': number_shapes,
+            'path': path,
+            f'{number_rows} gamma rows x 1000 iterations [s]': measure_function_time(lambda: stats.generate_stochastic_dataframe(df_gamma.copy(), 1000, **kwargs)),
+        })
+print(pd.DataFrame(list_end_to_end).to_string(index = False, float_format = '{:.2f}'.format))
+
+# %%
+import matplotlib.pyplot as plt
+cm = 1/2.54 # for inches-cm conversion
+
+fig, ax = plt.subplots(
+    num = 'main',
+    nrows = 1,
+    ncols = 1,
+    dpi = 300,
+    figsize=(9*cm, 6*cm), # A4=(210x297)mm,
+)
+
+df_plot = df_measured[df_measured['rtol'] == 1e-10].reset_index(drop = True)
+
+ax.set_ylabel('Time for 1M samples [ms]')
+ax.set_yscale('log')
+
+ax.set_xticks([i for i in range(len(df_plot))])
+ax.set_xticklabels(df_plot['type'])
+ax.set_xlabel('Uncertainty type')
+
+ax.set_title('Tabulated Inverse CDF (rtol=1e-10)')
+
+ax.bar(
+    x = [i-0.2 for i in range(len(df_plot))],
+    height = df_plot['exact [ms]'],
+    width = 0.4,
+    color = 'orange',
+    label = 'exact'
+)
+ax.bar(
+    x = [i+0.2 for i in range(len(df_plot))],
+    height = df_plot['tabulated [ms]'],
+    width = 0.4,
+    color = 'blue',
+    label = 'tabulated'
+)
+
+ax.legend()
+
+file_path: pathlib.PosixPath = Path(__file__).resolve()
+figure_name: str = str(file_path.stem + '.pdf')
+
+plt.savefig(
+    fname = figure_name,
+    format="pdf",
+    bbox_inches='tight',
+    transparent = False
+)
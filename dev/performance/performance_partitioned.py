@@ -0,0 +1,148 @@
+# %%
+# performance
+import time
+import tracemalloc
+# io
+import sys
+import json
+import pathlib
+import tempfile
+from pathlib import Path
+# data science
+import pandas as pd
+import numpy as np
+# EcoPylot
+ecopylot_root: pathlib.PosixPath =  Path(__file__).resolve().parents[2]
+sys.path.append(str(ecopylot_root))
+from ecopylot import stats
+from ecopylot import inout
+from ecopylot import archive
+from ecopylot import aggregate
+from ecopylot import partitioned
+
+
+def create_parameter_file(path: pathlib.Path, number_parameters: int) -> None:
+    """
+    Creates a JSON parameter file of triangular, normal and uniform distributions, with string and list-valued metadata.
+    """
+    rng = np.random.default_rng(42)
+    loc = rng.uniform(1, 10, number_parameters)
+    types = rng.choice([3, 4, 5], number_parameters)
+    data: dict = {
+        str(uid): {
+            'parameter': f'parameter {uid % 50}',
+            'year': int(2020 + 5 * (uid % 4)),
+            'sizes': ['Small', 'Medium'] if uid % 3 else ['Large'],
+            'uncertainty_type': int(types[uid]),
+            'loc': float(loc[uid]),
+            'scale': float(loc[uid] / 10) if types[uid] == 3 else None,
+            'minimum': float(loc[uid] - 1) if types[uid] != 3 else None,
+            'maximum': float(loc[uid] + 1) if types[uid] != 3 else None,
+        }
+        for uid in range(number_parameters)
+    }
+    path.write_text(json.dumps(data))
+
+
+def measure_peak_memory(function) -> tuple:
+    """
+    Measures the time and the peak memory allocated (by Python and NumPy) while running a function.
+    """
+    tracemalloc.start()
+    time_start = time.perf_counter()
+    result = function()
+    time_run = time.perf_counter() - time_start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, time_run, peak
+
+
+def run_in_memory(path: pathlib.Path, output_dir: pathlib.Path, iterations: int) -> pd.DataFrame:
+    df = inout.load_data_from_json(path)
+    df = stats.generate_stochastic_dataframe(df, iterations, seed = 42)
+    df_aggregated = aggregate.aggregate_samples(df, ['parameter', 'sizes'])
+    archive.write_archive(df.drop(columns = ['parameter_value_distribution_dict']), output_dir / 'samples.eco')
+    return df_aggregated
+
+
+iterations: int = 1000
+partition_rows: int = 2000
+
+list_results: list = []
+with tempfile.TemporaryDirectory() as directory:
+    directory = Path(directory)
+    for number_parameters in [5000, 20000, 80000]:
+        path = directory / f'parameters_{number_parameters}.json'
+        create_parameter_file(path, number_parameters)
+
+        df_aggregated, time_memory, peak_memory = measure_peak_memory(lambda: run_in_memory(path, directory, iterations))
+        _, time_partitioned, peak_partitioned = measure_peak_memory(lambda: partitioned.run_partitioned(
+            sources = [path],
+            output_dir = directory / 'partitioned',
+            iterations = iterations,
+            seed = 42,
+            partition_rows = partition_rows,
+            aggregate_by = ['parameter', 'sizes'],
+        ))
+
+        # the partitioned pipeline yields the same aggregated samples as the in-memory pipeline
+        df_merged = archive.read_archive(directory / 'partitioned' / partitioned.AGGREGATED_FILE)
+        assert np.allclose(stats.get_sample_matrix(df_merged), stats.get_sample_matrix(df_aggregated))
+
+        list_results.append({
+            'parameters': number_parameters,
+            'samples [MiB]': number_parameters * iterations * 8 / 2**20,
+            'in-memory [s]': time_memory,
+            'partitioned [s]': time_partitioned,
+            'in-memory peak [MiB]': peak_memory / 2**20,
+            'partitioned peak [MiB]': peak_partitioned / 2**20,
+        })
+
+df_measured = pd.DataFrame(list_results)
+
+print(f"Peak memory with {iterations} iterations and partitions of {partition_rows} rows:")
+print(df_measured.to_string())
+
+# %%
+import matplotlib.pyplot as plt
+cm = 1/2.54 # for inches-cm conversion
+
+fig, ax = plt.subplots(
+    num = 'main',
+    nrows = 1,
+    ncols = 1,
+    dpi = 300,
+    figsize=(9*cm, 6*cm), # A4=(210x297)mm,
+)
+
+ax.set_xlabel('Number of parameters')
+ax.set_ylabel('Peak memory [MiB]')
+
+ax.set_title('Partitioned Pipeline')
+
+ax.plot(
+    df_measured['parameters'],
+    df_measured['in-memory peak [MiB]'],
+    color = 'orange',
+    marker = 'o',
+    label = 'in-memory'
+)
+ax.plot(
+    df_measured['parameters'],
+    df_measured['partitioned peak [MiB]'],
+    color = 'blue',
+    marker = 'o',
+    label = f'partitioned ({partition_rows} rows)'
+)
+
+ax.legend()
+
+file_path: pathlib.PosixPath = Path(__file__).resolve()
+figure_name: str = str(file_path.stem + '.pdf')
+
+plt.savefig(
+    fname = figure_name,
+    format="pdf",
+    bbox_inches='tight',
+    transparent = False
+)
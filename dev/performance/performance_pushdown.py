@@ -0,0 +1,151 @@
+# %%
+# performance
+import time
+import timeit
+# io
+import sys
+import pathlib
+import tempfile
+from pathlib import Path
+# data science
+import pandas as pd
+import numpy as np
+# EcoPylot
+ecopylot_root: pathlib.PosixPath =  Path(__file__).resolve().parents[2]
+sys.path.append(str(ecopylot_root))
+from ecopylot import inout
+from ecopylot import utils
+
+
+def create_parameter_dataframe(
+    number_rows: int,
+    number_years: int,
+) -> pd.DataFrame:
+    """
+    Create a synthetic long-form parameter dataframe, as returned by `inout.load_data_from_excel`.
+    """
+    rng = np.random.default_rng(42)
+    loc = rng.uniform(1, 10, number_rows * number_years)
+    df = pd.DataFrame(
+        data = {
+            'parameter': np.repeat([f'p{i}' for i in range(number_rows)], number_years),
+            'aircraft class': np.repeat([['narrow-body', 'wide-body', 'regional'][i % 3] for i in range(number_rows)], number_years),
+            'uncertainty distribution': 'triangular',
+            'year': np.tile(2000 + np.arange(number_years), number_rows),
+            'base': loc,
+            'low': loc * 0.9,
+            'high': loc * 1.2,
+        },
+    )
+    df['uncertainty'] = 5
+    return df
+
+
+def measure_function_time(
+    function,
+    repeat: int = 3,
+) -> float:
+    """
+    Measures the (median-of-``repeat``) time it takes to run a function.
+
+    See Also
+    --------
+    The Python ` `timeit.repeat` <https://docs.python.org/3/library/timeit.html#timeit.repeat>`_.
+    """
+    list_times: list = timeit.repeat(
+        stmt = function,
+        number = 1,
+        repeat = repeat,
+        timer = time.perf_counter,
+    )
+    return np.median(list_times)
+
+
+number_rows: int = 5000
+number_years: int = 20
+parameters: list = [f'p{i}' for i in range(0, number_rows, 50)] # 2% of the parameters
+years: list = [2010, 2015]
+filters: dict = {'aircraft class': ['narrow-body']}
+
+excel_kwargs: dict = {
+    'uncertainty_col': 'uncertainty distribution',
+    'uncertainty_dict': utils.load_project_configuration(),
+    'list_string_cols': [],
+}
+
+df = create_parameter_dataframe(number_rows, number_years)
+
+list_results: list = []
+with tempfile.TemporaryDirectory() as directory:
+    path_json = Path(directory) / 'data.json'
+    path_excel = Path(directory) / 'data.xlsx'
+    inout.write_data_to_json(df.set_axis(pd.Index([f'uid{i}' for i in range(len(df))], name = 'UID')), path_json)
+    inout.write_data_to_excel(df, path_excel, metrics = ['base', 'low', 'high'])
+
+    def filter_after_loading(df: pd.DataFrame) -> pd.DataFrame:
+        return df[df['parameter'].isin(parameters) & df['year'].isin(years) & df['aircraft class'].isin(filters['aircraft class'])]
+
+    list_results.append({
+        'format': 'json',
+        'filter after loading [s]': measure_function_time(lambda: filter_after_loading(inout.load_data_from_json(path_json))),
+        'pushdown [s]': measure_function_time(lambda: inout.load_data_from_json(path_json, parameters = parameters, years = years, filters = filters)),
+    })
+    for streaming in [False, True]:
+        list_results.append({
+            'format': 'excel (streaming)' if streaming else 'excel',
+            'filter after loading [s]': measure_function_time(lambda: filter_after_loading(inout.load_data_from_excel(path_excel, streaming = streaming, **excel_kwargs))),
+            'pushdown [s]': measure_function_time(lambda: inout.load_data_from_excel(path_excel, streaming = streaming, parameters = parameters, years = years, filters = filters, **excel_kwargs)),
+        })
+
+df_measured = pd.DataFrame(list_results)
+df_measured['speedup'] = df_measured['filter after loading [s]'] / df_measured['pushdown [s]']
+
+print(f"{len(df)} entries; selection: {len(parameters)} parameters, {len(years)} years, {filters}")
+print(df_measured.to_string())
+
+# %%
+import matplotlib.pyplot as plt
+cm = 1/2.54 # for inches-cm conversion
+
+fig, ax = plt.subplots(
+    num = 'main',
+    nrows = 1,
+    ncols = 1,
+    dpi = 300,
+    figsize=(9*cm, 6*cm), # A4=(210x297)mm,
+)
+
+ax.set_ylabel('Load time [s]')
+ax.set_yscale('log')
+
+ax.set_xticks([i for i in range(len(df_measured))])
+ax.set_xticklabels(df_measured['format'])
+
+ax.set_title('Projection/Filter Pushdown')
+
+ax.bar(
+    x = [i-0.2 for i in range(len(df_measured))],
+    height = df_measured['filter after loading [s]'],
+    width = 0.4,
+    color = 'orange',
+    label = 'filter after loading'
+)
+ax.bar(
+    x = [i+0.2 for i in range(len(df_measured))],
+    height = df_measured['pushdown [s]'],
+    width = 0.4,
+    color = 'blue',
+    label = 'pushdown'
+)
+
+ax.legend()
+
+file_path: pathlib.PosixPath = Path(__file__).resolve()
+figure_name: str = str(file_path.stem + '.pdf')
+
+plt.savefig(
+    fname = figure_name,
+    format="pdf",
+    bbox_inches='tight',
+    transparent = False
+)
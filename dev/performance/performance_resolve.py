@@ -0,0 +1,147 @@
+# %%
+# performance
+import time
+import timeit
+# io
+import sys
+import pathlib
+from pathlib import Path
+import itertools
+# data science
+import pandas as pd
+import numpy as np
+# EcoPylot
+ecopylot_root: pathlib.PosixPath =  Path(__file__).resolve().parents[2]
+sys.path.append(str(ecopylot_root))
+from ecopylot import inout
+from ecopylot import utils
+from ecopylot import resolve
+
+
+def measure_function_time(
+    function,
+    repeat: int = 3,
+) -> float:
+    """
+    Measures the (median-of-``repeat``) time it takes to run a function.
+
+    See Also
+    --------
+    The Python ` `timeit.repeat` <https://docs.python.org/3/library/timeit.html#timeit.repeat>`_.
+    """
+    list_times: list = timeit.repeat(
+        stmt = function,
+        number = 1,
+        repeat = repeat,
+        timer = time.perf_counter,
+    )
+    return np.median(list_times)
+
+
+def resolve_loop(df: pd.DataFrame, df_configurations: pd.DataFrame, keys: list, wildcard: str = 'all') -> np.ndarray:
+    """
+    Resolves configurations one at a time, by filtering the parameter dataframe with pandas
+    (same rules as `resolve.ParameterResolver`: fewest wildcards, nearest year, earlier year, first row).
+    """
+    parameters = pd.Index(pd.unique(df['parameter']))
+    years = df['year'].astype(float).to_numpy()
+    positions = np.full((len(df_configurations), len(parameters)), -1, dtype=np.int64)
+    for number, configuration in enumerate(df_configurations.itertuples(index=False)):
+        mask = np.ones(len(df), dtype=bool)
+        wildcards = np.zeros(len(df), dtype=np.int64)
+        for key in keys:
+            value = getattr(configuration, key)
+            is_wildcard = df[key].map(lambda cell: wildcard in cell).to_numpy(dtype=bool)
+            mask &= is_wildcard | df[key].map(lambda cell: value in cell).to_numpy(dtype=bool)
+            wildcards += is_wildcard
+        difference = years - configuration.year
+        df_matches = pd.DataFrame({
+            'parameter': df['parameter'].to_numpy(),
+            'wildcards': wildcards,
+            'distance': np.abs(difference),
+            'later': difference > 0,
+            'position': np.arange(len(df)),
+        })[mask].sort_values(['wildcards', 'distance', 'later', 'position'])
+        df_best = df_matches.drop_duplicates('parameter')
+        positions[number, parameters.get_indexer(df_best['parameter'])] = df_best['position'].to_numpy()
+    return positions
+
+
+df = inout.load_data_from_excel(
+    excel_input = ecopylot_root / 'dev' / 'other' / 'Input data_bus.xlsx',
+    uncertainty_col = 'uncertainty distribution',
+    uncertainty_dict = utils.load_project_configuration(),
+    list_string_cols = ['sizes', 'powertrain'],
+)
+keys: list = ['powertrain', 'sizes']
+powertrains: list = sorted({item for cell in df['powertrain'] for item in cell} - {'all'})
+sizes: list = sorted({item for cell in df['sizes'] for item in cell})
+
+list_results: list = []
+for years in [range(2000, 2051, 10), range(2000, 2051, 1), range(1950, 2101, 1)]:
+    df_configurations = pd.DataFrame(list(itertools.product(powertrains, sizes, years)), columns = keys + ['year'])
+    resolver = resolve.ParameterResolver(df, keys)
+
+    positions = resolver.resolve(df_configurations)
+    sample = np.random.default_rng(42).choice(len(df_configurations), size = min(100, len(df_configurations)), replace = False)
+    assert np.array_equal(positions[sample], resolve_loop(df, df_configurations.iloc[sample], keys))
+
+    time_loop = measure_function_time(lambda: resolve_loop(df, df_configurations.iloc[sample], keys), repeat = 1) * len(df_configurations) / len(sample)
+    list_results.append({
+        'configurations': len(df_configurations),
+        'parameters': len(resolver.parameters),
+        'loop [s] (extrapolated)': time_loop,
+        'build [ms]': 1E3 * measure_function_time(lambda: resolve.ParameterResolver(df, keys)),
+        'resolve [ms]': 1E3 * measure_function_time(lambda: resolver.resolve(df_configurations)),
+    })
+
+df_measured = pd.DataFrame(list_results)
+df_measured['speedup'] = 1E3 * df_measured['loop [s] (extrapolated)'] / (df_measured['build [ms]'] + df_measured['resolve [ms]'])
+
+print(df_measured.to_string())
+
+# %%
+import matplotlib.pyplot as plt
+cm = 1/2.54 # for inches-cm conversion
+
+fig, ax = plt.subplots(
+    num = 'main',
+    nrows = 1,
+    ncols = 1,
+    dpi = 300,
+    figsize=(9*cm, 6*cm), # A4=(210x297)mm,
+)
+
+ax.set_xlabel('Number of configurations')
+ax.set_ylabel('Time [s]')
+ax.set_xscale('log')
+ax.set_yscale('log')
+
+ax.set_title('Configuration Resolution')
+
+ax.plot(
+    df_measured['configurations'],
+    df_measured['loop [s] (extrapolated)'],
+    color = 'orange',
+    marker = 'o',
+    label = 'per configuration (pandas)'
+)
+ax.plot(
+    df_measured['configurations'],
+    1E-3 * (df_measured['build [ms]'] + df_measured['resolve [ms]']),
+    color = 'blue',
+    marker = 'o',
+    label = 'ParameterResolver'
+)
+
+ax.legend()
+
+file_path: pathlib.PosixPath = Path(__file__).resolve()
+figure_name: str = str(file_path.stem + '.pdf')
+
+plt.savefig(
+    fname = figure_name,
+    format="pdf",
+    bbox_inches='tight',
+    transparent = False
+)
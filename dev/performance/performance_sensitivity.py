@@ -0,0 +1,130 @@
+# %%
+# performance
+import time
+# io
+import sys
+import pathlib
+from pathlib import Path
+# data science
+import pandas as pd
+import numpy as np
+# EcoPylot
+ecopylot_root: pathlib.PosixPath =  Path(__file__).resolve().parents[2]
+sys.path.append(str(ecopylot_root))
+from ecopylot import stats
+from ecopylot import sensitivity
+
+
+def create_parameter_dataframe(number_parameters: int) -> pd.DataFrame:
+    """
+    Create a synthetic dataframe of uniformly distributed parameters, as returned by `inout.load_data_from_json`.
+    """
+    return pd.DataFrame(
+        data = {
+            'uncertainty_type': 4,
+            'loc': np.nan,
+            'scale': np.nan,
+            'shape': np.nan,
+            'minimum': 0.0,
+            'maximum': 1.0,
+        },
+        index = [f'p{i}' for i in range(number_parameters)],
+    )
+
+
+def linear_model(samples: np.ndarray) -> np.ndarray:
+    """
+    A vectorized model with decreasing weights, so that the first parameters dominate the output variance.
+    """
+    weights = 1 / np.arange(1, samples.shape[0] + 1)
+    return weights @ samples + samples[0] * samples[1]
+
+
+def measure_function_time(function, *args, **kwargs) -> float:
+    time_start = time.perf_counter()
+    function(*args, **kwargs)
+    return time.perf_counter() - time_start
+
+
+if __name__ == '__main__': # required for process-parallel evaluation on platforms using 'spawn'
+
+    iterations: int = 2000
+    rows_sobol: int = 100
+
+    df_measured = pd.DataFrame(
+        data = {
+            "parameters": [1E2, 1E3, 1E4],
+        }
+    )
+    df_measured['parameters'] = df_measured['parameters'].astype(int)
+
+    list_results: list = []
+    for number_parameters in df_measured['parameters']:
+        df = stats.generate_stochastic_dataframe(create_parameter_dataframe(number_parameters), iterations, seed = 42)
+        outputs = sensitivity.evaluate_model(linear_model, df)
+        rows = list(df.index[:rows_sobol])
+        list_results.append((
+            measure_function_time(sensitivity.rank_correlation_coefficients, df, outputs),
+            measure_function_time(sensitivity.standardized_regression_coefficients, df, outputs) if iterations > number_parameters + 1 else np.nan,
+            measure_function_time(sensitivity.sobol_indices, linear_model, df, rows = rows),
+            measure_function_time(sensitivity.sobol_indices, linear_model, df, rows = rows, max_workers = 4),
+        ))
+
+    df_measured[['time_rank_correlation', 'time_src', 'time_sobol', 'time_sobol_4_workers']] = list_results
+
+    print(f"{iterations} iterations, Sobol indices of {rows_sobol} parameters ({iterations // 2 * (rows_sobol + 2)} model evaluations)")
+    print(df_measured.to_string())
+
+    # %%
+    import matplotlib.pyplot as plt
+    cm = 1/2.54 # for inches-cm conversion
+
+    fig, ax = plt.subplots(
+        num = 'main',
+        nrows = 1,
+        ncols = 1,
+        dpi = 300,
+        figsize=(9*cm, 6*cm), # A4=(210x297)mm,
+    )
+
+    ax.set_ylabel('Runtime [s]')
+    ax.set_xlabel('Parameters')
+
+    ax.set_xticks([i for i in range(len(df_measured))])
+    ax.set_xticklabels(list(df_measured['parameters']))
+
+    ax.set_title('Sensitivity Analysis')
+
+    ax.bar(
+        x = [i-0.3 for i in range(0, len(df_measured))],
+        height = df_measured['time_rank_correlation'],
+        width = 0.3,
+        color = 'orange',
+        label = 'Rank correlation'
+    )
+    ax.bar(
+        x = [i for i in range(0, len(df_measured))],
+        height = df_measured['time_sobol'],
+        width = 0.3,
+        color = 'blue',
+        label = 'Sobol (1 process)'
+    )
+    ax.bar(
+        x = [i+0.3 for i in range(0, len(df_measured))],
+        height = df_measured['time_sobol_4_workers'],
+        width = 0.3,
+        color = 'green',
+        label = 'Sobol (4 processes)'
+    )
+
+    ax.legend()
+
+    file_path: pathlib.PosixPath = Path(__file__).resolve()
+    figure_name: str = str(file_path.stem + '.pdf')
+
+    plt.savefig(
+        fname = figure_name,
+        format="pdf",
+        bbox_inches='tight',
+        transparent = False
+    )
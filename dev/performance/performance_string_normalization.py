@@ -0,0 +1,85 @@
+# %%
+# performance
+import time
+import timeit
+# io
+import sys
+import pathlib
+from pathlib import Path
+# data science
+import pandas as pd
+import numpy as np
+# EcoPylot
+ecopylot_root: pathlib.PosixPath =  Path(__file__).resolve().parents[2]
+sys.path.append(str(ecopylot_root))
+from ecopylot import inout
+from ecopylot import utils
+
+
+def create_sample_dataframe(number_rows: int) -> pd.DataFrame:
+    """
+    Create a sample DataFrame with string enumerations and uncertainty distribution names of the form:
+
+    | sizes                       | uncertainty distribution |
+    |-----------------------------|--------------------------|
+    | Commuter, Regional          | triangular               |
+    | Small Narrow Body           | Normal                   |
+    """
+    rng = np.random.default_rng(42)
+    sizes = np.array(['Commuter', 'Regional', 'Small Narrow Body', 'Large Narrow Body', 'Small Wide Body', 'Large Wide Body'])
+    enumerations = [', '.join(sizes[:i]) for i in range(1, len(sizes) + 1)] + [' , '.join(sizes[i:]) for i in range(1, len(sizes))]
+    names = ['triangular', 'Normal', 'lognormal ', 'uniform', 'no uncertainty']
+    return pd.DataFrame({
+        'sizes': rng.choice(enumerations, size = number_rows),
+        'uncertainty distribution': rng.choice(names, size = number_rows),
+    })
+
+
+def normalize_apply(df: pd.DataFrame, uncertainty_dict: dict) -> pd.DataFrame:
+    """
+    The previous implementation: one Python lambda per cell and ``replace(dict).astype('int64')``.
+    """
+    df['sizes'] = df['sizes'].apply(
+        lambda x:
+        [item.strip() for item in x.split(',')]
+        if isinstance(x, str) else x
+    )
+    series = df['uncertainty distribution'].str.strip().str.lower()
+    df['uncertainty'] = series.replace(uncertainty_dict).astype('int64')
+    return df
+
+
+def normalize_vectorized(df: pd.DataFrame, uncertainty_dict: dict) -> pd.DataFrame:
+    df = inout._columns_string_to_list(df, ['sizes'])
+    df = inout._uncertainty_distribution_string_to_code(df, 'uncertainty distribution', uncertainty_dict)
+    return df
+
+
+def encode_vectorized(df: pd.DataFrame, uncertainty_dict: dict) -> tuple:
+    return inout._encode_string_enumerations(df['sizes'])
+
+
+uncertainty_dict: dict = utils.load_project_configuration()
+
+df_time_measured = pd.DataFrame(
+    data = {
+        "rows": [1E4, 1E5, 1E6],
+    }
+)
+df_time_measured['rows'] = df_time_measured['rows'].astype(int)
+
+list_samples: list = [create_sample_dataframe(number_rows) for number_rows in df_time_measured['rows']]
+
+for df_sample in list_samples:
+    pd.testing.assert_frame_equal(
+        normalize_apply(df_sample.copy(), uncertainty_dict),
+        normalize_vectorized(df_sample.copy(), uncertainty_dict),
+    )
+
+for label, function in [('apply', normalize_apply), ('vectorized', normalize_vectorized), ('offsets', encode_vectorized)]:
+    df_time_measured[f'time_{label}'] = [
+        min(timeit.repeat(lambda: function(df_sample.copy(), uncertainty_dict), number = 1, repeat = 3, timer = time.perf_counter))
+        for df_sample in list_samples
+    ]
+
+print(df_time_measured.to_string())
@@ -0,0 +1,167 @@
+# %%
+# performance
+import time
+import timeit
+# io
+import sys
+import json
+import pathlib
+import tempfile
+from pathlib import Path
+# data science
+import pandas as pd
+import numpy as np
+# EcoPylot
+ecopylot_root: pathlib.PosixPath =  Path(__file__).resolve().parents[2]
+sys.path.append(str(ecopylot_root))
+from ecopylot import inout
+from ecopylot import utils
+
+
+def create_parameter_dataframe(
+    number_rows: int,
+    number_years: int,
+) -> pd.DataFrame:
+    """
+    Create a synthetic long-form parameter dataframe, as returned by `inout.load_data_from_excel`.
+    """
+    rng = np.random.default_rng(42)
+    number_entries: int = number_rows * number_years
+    loc = rng.uniform(1, 10, number_entries)
+    df = pd.DataFrame(
+        data = {
+            'parameter': np.repeat([f'p{i}' for i in range(number_rows)], number_years),
+            'category': [['alpha', 'beta'] if (i // number_years) % 2 else ['gamma'] for i in range(number_entries)],
+            'uncertainty distribution': 'triangular',
+            'year': np.tile(2000 + np.arange(number_years), number_rows),
+            'base': loc,
+            'low': loc * 0.9,
+            'high': loc * 1.2,
+        },
+    )
+    df[['base', 'low', 'high']] = df[['base', 'low', 'high']].astype(object)
+    df['uncertainty'] = 5
+    return df
+
+
+def measure_function_time(
+    function,
+    repeat: int = 3,
+) -> float:
+    """
+    Measures the (median-of-``repeat``) time it takes to run a function.
+
+    See Also
+    --------
+    The Python ` `timeit.repeat` <https://docs.python.org/3/library/timeit.html#timeit.repeat>`_.
+    """
+    list_times: list = timeit.repeat(
+        stmt = function,
+        number = 1,
+        repeat = repeat,
+        timer = time.perf_counter,
+    )
+    return np.median(list_times)
+
+
+def write_json_pandas(df: pd.DataFrame, path: pathlib.Path) -> None:
+    with open(path, 'w') as file:
+        json.dump({str(uid): row for uid, row in df.to_dict('index').items()}, file)
+
+
+def write_excel_pandas(df: pd.DataFrame, path: pathlib.Path) -> None:
+    df = df.assign(category = df['category'].str.join(', '))
+    df_wide = df.pivot(index = ['parameter', 'category', 'uncertainty distribution'], columns = 'year', values = ['base', 'low', 'high'])
+    df_wide = df_wide.swaplevel(axis = 1).sort_index(axis = 1, level = 0, sort_remaining = False)
+    df_wide.to_excel(path, engine = 'openpyxl')
+
+
+excel_kwargs: dict = {
+    'uncertainty_col': 'uncertainty distribution',
+    'uncertainty_dict': utils.load_project_configuration(),
+    'list_string_cols': ['category'],
+}
+
+list_results: list = []
+with tempfile.TemporaryDirectory() as directory:
+    directory = Path(directory)
+
+    # round trips
+    df_bus = inout.load_data_from_excel(ecopylot_root / 'dev' / 'other' / 'Input data_bus.xlsx', **(excel_kwargs | {'list_string_cols': ['sizes']}))
+    inout.write_data_to_excel(df_bus, directory / 'bus.xlsx', metrics = ['base', 'low', 'high'], list_string_cols = ['sizes'])
+    pd.testing.assert_frame_equal(df_bus, inout.load_data_from_excel(directory / 'bus.xlsx', **(excel_kwargs | {'list_string_cols': ['sizes']})))
+
+    df_json = df_bus.assign(sizes = df_bus['sizes'].map(list)).set_axis(df_bus.index.astype(str).rename('UID'))
+    inout.write_data_to_json(df_json, directory / 'bus.json')
+    pd.testing.assert_frame_equal(df_json, inout.load_data_from_json(directory / 'bus.json'), check_dtype = False, check_index_type = False, check_column_type = False)
+    print("Round trips (Excel, JSON) of the bus input data: equal.")
+
+    for number_rows in [100, 1000, 5000]:
+        df = create_parameter_dataframe(number_rows, number_years = 10)
+        df_indexed = df.set_axis(pd.Index([f'uid{i}' for i in range(len(df))], name = 'UID'))
+
+        inout.write_data_to_excel(df, directory / 'data.xlsx', metrics = ['base', 'low', 'high'], list_string_cols = ['category'])
+        pd.testing.assert_frame_equal(df, inout.load_data_from_excel(directory / 'data.xlsx', **excel_kwargs), check_column_type = False)
+        inout.write_data_to_json(df_indexed, directory / 'data.json')
+        pd.testing.assert_frame_equal(df_indexed, inout.load_data_from_json(directory / 'data.json'), check_dtype = False, check_index_type = False, check_column_type = False)
+
+        list_results.append({
+            'entries': len(df),
+            'json ecopylot [s]': measure_function_time(lambda: inout.write_data_to_json(df_indexed, directory / 'data.json')),
+            'json pandas [s]': measure_function_time(lambda: write_json_pandas(df_indexed, directory / 'data_pandas.json')),
+            'excel ecopylot [s]': measure_function_time(lambda: inout.write_data_to_excel(df, directory / 'data.xlsx', metrics = ['base', 'low', 'high'], list_string_cols = ['category'])),
+            'excel pandas [s]': measure_function_time(lambda: write_excel_pandas(df, directory / 'data_pandas.xlsx')),
+        })
+
+df_measured = pd.DataFrame(list_results)
+df_measured['json [entries/s]'] = df_measured['entries'] / df_measured['json ecopylot [s]']
+df_measured['excel [entries/s]'] = df_measured['entries'] / df_measured['excel ecopylot [s]']
+
+print(df_measured.to_string())
+
+# %%
+import matplotlib.pyplot as plt
+cm = 1/2.54 # for inches-cm conversion
+
+fig, ax = plt.subplots(
+    num = 'main',
+    nrows = 1,
+    ncols = 1,
+    dpi = 300,
+    figsize=(9*cm, 6*cm), # A4=(210x297)mm,
+)
+
+ax.set_ylabel('Write time [s]')
+ax.set_yscale('log')
+
+ax.set_xticks([i for i in range(len(df_measured))])
+ax.set_xticklabels(df_measured['entries'])
+ax.set_xlabel('Entries')
+
+ax.set_title('JSON and Excel Writers')
+
+for offset, col, color in [
+    (-0.3, 'json ecopylot [s]', 'orange'),
+    (-0.1, 'json pandas [s]', 'red'),
+    (0.1, 'excel ecopylot [s]', 'blue'),
+    (0.3, 'excel pandas [s]', 'purple'),
+]:
+    ax.bar(
+        x = [i + offset for i in range(len(df_measured))],
+        height = df_measured[col],
+        width = 0.2,
+        color = color,
+        label = col.split(' [')[0],
+    )
+
+ax.legend()
+
+file_path: pathlib.PosixPath = Path(__file__).resolve()
+figure_name: str = str(file_path.stem + '.pdf')
+
+plt.savefig(
+    fname = figure_name,
+    format="pdf",
+    bbox_inches='tight',
+    transparent = False
+)
@@ -0,0 +1,188 @@
+# %%
+# data science
+import pandas as pd
+import numpy as np
+import scipy.sparse
+# debugging
+import logging
+# local imports
+import ecopylot.inout as inout
+import ecopylot.stats as stats
+
+
+def _is_list_column(series: pd.Series) -> bool:
+    """
+    Returns ``True`` if any cell of the column is list-like (eg. ``sizes`` after `inout._columns_string_to_list`).
+    """
+    return series.dtype == object and any(isinstance(value, (list, tuple, np.ndarray)) for value in series)
+
+
+def _group_memberships(df: pd.DataFrame, by: list) -> tuple:
+    """
+    Computes the (row, group) memberships of a dataframe grouped by metadata columns.
+
+    Rows with a list-valued cell belong to the group of each of its items
+    (eg. a row with ``sizes = ["Small", "Medium"]`` belongs to both the ``Small`` and the ``Medium`` group).
+    For several list-valued columns, rows belong to all combinations of items.
+    Rows with a missing key are not part of any group.
+    Only row indices are expanded, never the samples.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        The stochastic dataframe.
+
+    by : list
+        The columns to group by.
+
+    Returns
+    -------
+    tuple
+        A tuple ``(rows, groups, df_keys)`` of the row positions and group numbers of all memberships,
+        and a dataframe of the keys of each group (in sorted order of the keys).
+    """
+
+    rows: np.ndarray = np.arange(len(df))
+    list_codes: list = []
+    list_categories: list = []
+
+    for col in by:
+        if _is_list_column(df[col]):
+            offsets, codes_items, categories, _ = inout._encode_string_enumerations(df[col])
+            lengths = np.diff(offsets)[rows]
+            starts = offsets[:-1][rows]
+            positions = np.repeat(starts - np.concatenate([[0], np.cumsum(lengths)[:-1]]), lengths) + np.arange(lengths.sum())
+            list_codes = [codes[np.repeat(np.arange(len(rows)), lengths)] for codes in list_codes]
+            rows = np.repeat(rows, lengths)
+            order = np.argsort(categories.astype(str), kind='stable') # sort items, as for scalar columns
+            rank = np.empty(len(order), dtype=np.int64)
+            rank[order] = np.arange(len(order))
+            codes = rank[codes_items[positions]]
+            categories = categories[order]
+        else:
+            codes_all, categories = pd.factorize(df[col], sort=True, use_na_sentinel=True)
+            codes = codes_all[rows].astype(np.int64)
+        mask = codes >= 0
+        rows, codes = rows[mask], codes[mask]
+        list_codes = [previous[mask] for previous in list_codes] + [codes]
+        list_categories.append(categories)
+
+    cardinalities: tuple = tuple(max(1, len(categories)) for categories in list_categories)
+    flat: np.ndarray = np.ravel_multi_index(list_codes, cardinalities) if list_codes else np.zeros(0, dtype=np.int64)
+    keys_unique, groups = np.unique(flat, return_inverse=True)
+
+    codes_unique = np.unravel_index(keys_unique, cardinalities)
+    df_keys = pd.DataFrame({
+        col: np.asarray(categories, dtype=object)[codes]
+        for col, categories, codes in zip(by, list_categories, codes_unique)
+    })
+
+    return rows, groups, df_keys
+
+
+def aggregate_samples(
+        df: pd.DataFrame,
+        by: list,
+        how: str = 'sum',
+        weights: str | np.ndarray | None = None
+    ) -> pd.DataFrame:
+    """
+    Aggregates the samples of a stochastic dataframe by metadata columns, for every iteration.
+
+    The function takes a stochastic dataframe (as returned by `stats.generate_stochastic_dataframe`) of the form:
+
+    +-------------+-----------+-----------------------+----------------------------+
+    | UID (index) | parameter | sizes                 | parameter_value_stochastic |
+    +=============+===========+=======================+============================+
+    | 123         | foo       | ["Small", "Medium"]   | [1, 2, 3]                  |
+    +-------------+-----------+-----------------------+----------------------------+
+    | 456         | foo       | ["Small"]             | [10, 20, 30]               |
+    +-------------+-----------+-----------------------+----------------------------+
+
+    and, for ``by=['parameter', 'sizes']`` and ``how='sum'``, returns a dataframe of the form:
+
+    +--------------------------+-------+----------------------------+
+    | (parameter, sizes)       | count | parameter_value_stochastic |
+    +==========================+=======+============================+
+    | (foo, Medium)            | 1     | [1, 2, 3]                  |
+    +--------------------------+-------+----------------------------+
+    | (foo, Small)             | 2     | [11, 22, 33]               |
+    +--------------------------+-------+----------------------------+
+
+    A row with a list-valued cell contributes to the group of each item of the list (see `_group_memberships`).
+
+    The aggregation is a segment reduction over the rows of the sample matrix, for all iterations at once:
+    the memberships are encoded as a sparse ``(groups, rows)`` weight matrix, which is multiplied with the sample matrix.
+    The samples are never expanded to list items or converted to a long table.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        A stochastic dataframe.
+
+    by : list
+        The metadata columns to group by.
+
+    how : str, optional
+        The aggregation:
+
+        - ``'sum'``: sum of the samples of all rows of the group
+        - ``'mean'``: mean of the samples of all rows of the group
+        - ``'weighted_sum'``: sum of the samples weighted by ``weights``
+        - ``'weighted_mean'``: mean of the samples weighted by ``weights`` (normalized per group)
+
+    weights : str or np.ndarray, optional
+        The name of a numeric column, or an array with one weight per row. Required for the weighted aggregations.
+
+    Returns
+    -------
+    pd.DataFrame
+        A stochastic dataframe indexed by the group keys, with columns ``count`` and ``parameter_value_stochastic``.
+
+    Raises
+    ------
+    ValueError
+        If ``how`` is not valid, or ``weights`` are missing for a weighted aggregation.
+    """
+
+    if how not in ('sum', 'mean', 'weighted_sum', 'weighted_mean'):
+        raise ValueError(f"Invalid aggregation '{how}' (expected 'sum', 'mean', 'weighted_sum' or 'weighted_mean').")
+
+    if how.startswith('weighted'):
+        if weights is None:
+            raise ValueError(f"Aggregation '{how}' requires weights.")
+        weights_rows = np.asarray(df[weights] if isinstance(weights, str) else weights, dtype=np.float64)
+        if weights_rows.shape != (len(df),):
+            raise ValueError(f"Weights must have one value per row (expected {len(df)}, got {weights_rows.shape}).")
+    else:
+        weights_rows = np.ones(len(df))
+
+    samples: np.ndarray = stats.get_sample_matrix(df)
+    rows, groups, df_keys = _group_memberships(df, list(by))
+
+    number_groups: int = len(df_keys)
+    counts: np.ndarray = np.bincount(groups, minlength=number_groups)
+    weights_memberships: np.ndarray = weights_rows[rows]
+
+    if how in ('mean', 'weighted_mean'):
+        totals = np.bincount(groups, weights=weights_memberships, minlength=number_groups)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            weights_memberships = weights_memberships / totals[groups]
+
+    matrix_weights = scipy.sparse.csr_matrix(
+        (weights_memberships, (groups, rows)),
+        shape = (number_groups, samples.shape[0]),
+    )
+    samples_aggregated: np.ndarray = np.asarray(matrix_weights @ samples)
+
+    logging.info(f"Aggregated {len(df)} rows into {number_groups} groups ({len(rows)} memberships, how='{how}').")
+
+    df_aggregated = pd.DataFrame(
+        data = {
+            'count': counts,
+            'parameter_value_stochastic': list(samples_aggregated),
+        },
+        index = pd.MultiIndex.from_frame(df_keys) if len(by) > 1 else pd.Index(df_keys[by[0]], name=by[0]),
+    )
+
+    return df_aggregated
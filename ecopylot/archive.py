@@ -0,0 +1,307 @@
+# %%
+# data science
+import pandas as pd
+import numpy as np
+# system
+import json
+import mmap
+import struct
+import zlib
+import lzma
+import pathlib
+from pathlib import Path
+from functools import lru_cache
+# debugging
+import logging
+# local imports
+import ecopylot.stats as stats
+import ecopylot.sharedmem as sharedmem
+
+
+MAGIC: bytes = b'ECOPYLOT'
+VERSION: int = 1
+FOOTER_FORMAT: str = '<QQ8s' # header offset, header length, magic
+FOOTER_SIZE: int = struct.calcsize(FOOTER_FORMAT)
+ALIGNMENT: int = 64 # bytes
+
+COMPRESSORS: dict = {
+    None: (lambda data: data, lambda data: data),
+    'zlib': (lambda data: zlib.compress(data, 1), zlib.decompress),
+    'lzma': (lambda data: lzma.compress(data, preset=1), lzma.decompress),
+}
+
+
+def _to_json_value(value):
+    """
+    Converts a metadata value (eg. a NumPy scalar or a tuple from a list-valued cell) to a JSON-serializable value.
+    """
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, tuple):
+        return [_to_json_value(item) for item in value]
+    return value
+
+
+def write_archive(
+        df: pd.DataFrame,
+        path: str | pathlib.PurePath,
+        chunk_shape: tuple = (256, 1024),
+        compression: str | None = None
+    ) -> None:
+    """
+    Writes a stochastic dataframe to a chunked binary archive, for random access with `read_archive`.
+
+    The sample matrix is split into chunks of ``chunk_shape = (rows, iterations)``, each stored contiguously
+    and optionally compressed. Metadata columns are encoded as in `sharedmem.publish_stochastic_dataframe`
+    (numeric values, or ``int32`` codes into unique values). The file has the layout:
+
+    +-------------------------------+--------------------------------------------------------------------+
+    | section                       | content                                                            |
+    +===============================+====================================================================+
+    | metadata                      | one array per metadata column (64-byte aligned)                    |
+    +-------------------------------+--------------------------------------------------------------------+
+    | chunks                        | sample matrix chunks, row-chunk-major (64-byte aligned)            |
+    +-------------------------------+--------------------------------------------------------------------+
+    | chunk table                   | ``uint64`` array ``(row chunks, iteration chunks, [offset, size])``|
+    +-------------------------------+--------------------------------------------------------------------+
+    | header                        | JSON: shape, dtype, chunks, compression, UIDs, columns, offsets    |
+    +-------------------------------+--------------------------------------------------------------------+
+    | footer (24 bytes)             | header offset, header length, ``ECOPYLOT``                         |
+    +-------------------------------+--------------------------------------------------------------------+
+
+    The file is written sequentially, chunk by chunk; the header is written last.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        A stochastic dataframe (as returned by `stats.generate_stochastic_dataframe`).
+
+    path : str or pathlib.PurePath
+        The path of the archive.
+
+    chunk_shape : tuple, optional
+        The number of rows and iterations per chunk.
+
+    compression : str, optional
+        ``None`` (default), ``'zlib'`` or ``'lzma'``.
+        Uncompressed chunks are memory-mapped when reading; compressed chunks are decompressed as a whole.
+
+    Raises
+    ------
+    ValueError
+        If the compression is not supported.
+    """
+
+    if compression not in COMPRESSORS:
+        raise ValueError(f"Unsupported compression '{compression}' (expected one of {list(COMPRESSORS)}).")
+    compress = COMPRESSORS[compression][0]
+
+    samples: np.ndarray = stats.get_sample_matrix(df)
+    rows_per_chunk, iterations_per_chunk = (max(1, int(size)) for size in chunk_shape)
+    number_row_chunks: int = -(-samples.shape[0] // rows_per_chunk)
+    number_iteration_chunks: int = -(-samples.shape[1] // iterations_per_chunk)
+
+    header: dict = {
+        'version': VERSION,
+        'shape': list(samples.shape),
+        'dtype': samples.dtype.str,
+        'chunk_shape': [rows_per_chunk, iterations_per_chunk],
+        'compression': compression,
+        'index_name': df.index.name,
+        'index': [_to_json_value(uid) for uid in df.index],
+        'columns': [],
+    }
+
+    def write_aligned(file, data: bytes | memoryview) -> tuple:
+        file.write(b'\0' * (-file.tell() % ALIGNMENT))
+        offset = file.tell()
+        file.write(data)
+        return offset, len(data)
+
+    with open(path, 'wb') as file:
+        for col in [col for col in df.columns if col not in sharedmem.EXCLUDED_COLUMNS]:
+            array, uniques = sharedmem._encode_metadata_column(df[col])
+            offset, _ = write_aligned(file, np.ascontiguousarray(array).tobytes())
+            header['columns'].append({
+                'name': col,
+                'dtype': array.dtype.str,
+                'offset': offset,
+                'uniques': None if uniques is None else [_to_json_value(unique) for unique in uniques],
+            })
+
+        chunk_table: np.ndarray = np.zeros((number_row_chunks, number_iteration_chunks, 2), dtype=np.uint64)
+        for i in range(number_row_chunks):
+            for j in range(number_iteration_chunks):
+                chunk = samples[i * rows_per_chunk:(i + 1) * rows_per_chunk, j * iterations_per_chunk:(j + 1) * iterations_per_chunk]
+                chunk_table[i, j] = write_aligned(file, compress(np.ascontiguousarray(chunk).tobytes()))
+
+        header['chunk_table_offset'], _ = write_aligned(file, chunk_table.tobytes())
+
+        header_bytes: bytes = json.dumps(header).encode('utf-8')
+        header_offset, _ = write_aligned(file, header_bytes)
+        file.write(struct.pack(FOOTER_FORMAT, header_offset, len(header_bytes), MAGIC))
+
+    logging.info(f"Archive written to {path} ({number_row_chunks}x{number_iteration_chunks} chunks, compression: {compression}).")
+
+
+@lru_cache(maxsize=8)
+def _open_archive(path: str, modified: int, size: int) -> tuple:
+    """
+    Memory-maps an archive and parses its header.
+
+    The result is cached per (path, modification time, size), so that repeated reads of the same archive
+    do not re-open the file or re-parse the header.
+
+    Returns
+    -------
+    tuple
+        A tuple ``(buffer, header, index, chunk_table)``.
+    """
+
+    with open(path, 'rb') as file:
+        buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    header_offset, header_length, magic = struct.unpack_from(FOOTER_FORMAT, buffer, len(buffer) - FOOTER_SIZE)
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not an EcoPyLot archive.")
+
+    header: dict = json.loads(buffer[header_offset:header_offset + header_length])
+    if header['version'] > VERSION:
+        raise ValueError(f"Unsupported archive version {header['version']} (supported: {VERSION}).")
+
+    shape = header['shape']
+    chunk_shape = header['chunk_shape']
+    chunk_table: np.ndarray = np.frombuffer(
+        buffer,
+        dtype = np.uint64,
+        count = -(-shape[0] // chunk_shape[0]) * -(-shape[1] // chunk_shape[1]) * 2,
+        offset = header['chunk_table_offset'],
+    ).reshape(-(-shape[0] // chunk_shape[0]), -(-shape[1] // chunk_shape[1]), 2)
+
+    return buffer, header, pd.Index(header['index'], name=header['index_name']), chunk_table
+
+
+def _positions(selection, size: int, index: pd.Index | None = None) -> np.ndarray:
+    """
+    Converts a selection (``None``, slice, list of positions or list of UIDs) to an array of positions.
+    """
+
+    if selection is None:
+        return np.arange(size)
+    if isinstance(selection, slice):
+        return np.arange(size)[selection]
+    if index is not None:
+        positions = index.get_indexer(list(selection))
+        if (positions < 0).any():
+            raise ValueError(f"Unknown UIDs: {[uid for uid, position in zip(selection, positions) if position < 0]}")
+        return positions
+    positions = np.asarray(selection, dtype=np.int64).reshape(-1)
+    if ((positions < 0) | (positions >= size)).any():
+        raise ValueError(f"Iterations out of range [0, {size}).")
+    return positions
+
+
+def read_archive_samples(
+        path: str | pathlib.PurePath,
+        uids: list | None = None,
+        iterations: slice | list | None = None
+    ) -> np.ndarray:
+    """
+    Reads a slice of the sample matrix of an archive written with `write_archive`.
+
+    Only the chunks intersecting the selection are read: uncompressed chunks are accessed through a memory map
+    (so only the selected elements are paged in), compressed chunks are decompressed as a whole.
+
+    Parameters
+    ----------
+    path : str or pathlib.PurePath
+        The path of the archive.
+
+    uids : list, optional
+        The UIDs of the rows to read (default: all rows), in the order of the output.
+
+    iterations : slice or list, optional
+        The iterations to read (default: all iterations), as a slice or a list of positions.
+
+    Returns
+    -------
+    np.ndarray
+        The samples, of shape ``(len(uids), len(iterations))``.
+    """
+
+    stat = Path(path).stat()
+    buffer, header, index, chunk_table = _open_archive(str(Path(path).resolve()), stat.st_mtime_ns, stat.st_size)
+
+    shape: list = header['shape']
+    dtype = np.dtype(header['dtype'])
+    rows_per_chunk, iterations_per_chunk = header['chunk_shape']
+    decompress = COMPRESSORS[header['compression']][1]
+
+    positions_rows: np.ndarray = _positions(uids, shape[0], index)
+    positions_iterations: np.ndarray = _positions(iterations, shape[1])
+
+    samples: np.ndarray = np.empty((len(positions_rows), len(positions_iterations)), dtype=dtype)
+
+    chunks_rows = positions_rows // rows_per_chunk
+    chunks_iterations = positions_iterations // iterations_per_chunk
+    for i in np.unique(chunks_rows):
+        mask_rows = chunks_rows == i
+        rows_chunk = min(rows_per_chunk, shape[0] - i * rows_per_chunk)
+        for j in np.unique(chunks_iterations):
+            mask_iterations = chunks_iterations == j
+            iterations_chunk = min(iterations_per_chunk, shape[1] - j * iterations_per_chunk)
+            offset, size = (int(value) for value in chunk_table[i, j])
+            if header['compression'] is None:
+                chunk = np.frombuffer(buffer, dtype=dtype, count=rows_chunk * iterations_chunk, offset=offset)
+            else:
+                chunk = np.frombuffer(decompress(buffer[offset:offset + size]), dtype=dtype)
+            chunk = chunk.reshape(rows_chunk, iterations_chunk)
+            samples[np.ix_(mask_rows, mask_iterations)] = chunk[np.ix_(
+                positions_rows[mask_rows] - i * rows_per_chunk,
+                positions_iterations[mask_iterations] - j * iterations_per_chunk,
+            )]
+
+    return samples
+
+
+def read_archive(
+        path: str | pathlib.PurePath,
+        uids: list | None = None,
+        iterations: slice | list | None = None
+    ) -> pd.DataFrame:
+    """
+    Reads a stochastic dataframe (or a slice of it) from an archive written with `write_archive`.
+
+    Parameters
+    ----------
+    path : str or pathlib.PurePath
+        The path of the archive.
+
+    uids : list, optional
+        The UIDs of the rows to read (default: all rows).
+
+    iterations : slice or list, optional
+        The iterations to read (default: all iterations).
+
+    Returns
+    -------
+    pd.DataFrame
+        A stochastic dataframe with the metadata columns and the ``parameter_value_stochastic`` column of the selection.
+    """
+
+    samples: np.ndarray = read_archive_samples(path, uids, iterations)
+
+    stat = Path(path).stat()
+    buffer, header, index, _ = _open_archive(str(Path(path).resolve()), stat.st_mtime_ns, stat.st_size)
+    positions_rows: np.ndarray = _positions(uids, header['shape'][0], index)
+
+    data: dict = {}
+    for column in header['columns']:
+        array = np.frombuffer(buffer, dtype=np.dtype(column['dtype']), count=header['shape'][0], offset=column['offset'])[positions_rows]
+        uniques = None if column['uniques'] is None else [tuple(unique) if isinstance(unique, list) else unique for unique in column['uniques']]
+        data[column['name']] = sharedmem._decode_metadata_column(array, uniques)
+
+    df = pd.DataFrame(data, index=index[positions_rows])
+    df['parameter_value_stochastic'] = list(samples)
+
+    return df
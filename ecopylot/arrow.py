@@ -0,0 +1,195 @@
+# %%
+# data science
+import pandas as pd
+import numpy as np
+# system
+import json
+# debugging
+import logging
+# local imports
+import ecopylot.inout as inout
+import ecopylot.stats as stats
+import ecopylot.aggregate as aggregate
+
+
+ROWS_PER_BATCH: int = 65536
+SKIPPED_COLUMNS: tuple = ('parameter_value_distribution_dict',)
+
+
+def _import_pyarrow():
+    """
+    Imports ``pyarrow``, an optional dependency of EcoPyLot (``pip install ecopylot[arrow]``).
+    """
+    try:
+        import pyarrow
+    except ImportError as error:
+        raise ImportError("The Arrow export requires pyarrow (pip install pyarrow).") from error
+    return pyarrow
+
+
+def _metadata_array(series: pd.Series):
+    """
+    Converts a metadata column to an Arrow array.
+
+    +----------------------------------------+-----------------------------------------------+----------------------------+
+    | column                                 | Arrow array                                   | numeric data               |
+    +========================================+===============================================+============================+
+    | numeric (``int``, ``float``, ``bool``) | primitive array (``NaN`` as null)             | not copied                 |
+    +----------------------------------------+-----------------------------------------------+----------------------------+
+    | categorical                            | dictionary array                              | codes not copied           |
+    +----------------------------------------+-----------------------------------------------+----------------------------+
+    | list-valued (eg. ``sizes``)            | list array of the items (missing cells: null) | offsets computed once      |
+    +----------------------------------------+-----------------------------------------------+----------------------------+
+    | other (eg. strings)                    | converted by ``pyarrow``                      |                            |
+    +----------------------------------------+-----------------------------------------------+----------------------------+
+
+    List-valued cells are encoded with `inout._encode_string_enumerations`:
+    the unique cells are split once and the list array is built from the offsets and item codes,
+    without creating one Python list per row.
+    """
+
+    pa = _import_pyarrow()
+
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return pa.DictionaryArray.from_arrays(
+            series.cat.codes.to_numpy(),
+            pa.array(series.cat.categories.to_numpy(dtype=object), from_pandas=True),
+            mask = series.isna().to_numpy() if series.hasnans else None,
+        )
+
+    if series.dtype.kind in 'iufb':
+        return pa.array(series.to_numpy(), from_pandas=True)
+
+    if aggregate._is_list_column(series):
+        offsets, codes, categories, mask_valid = inout._encode_string_enumerations(series)
+        items = pa.array(categories.to_numpy(dtype=object), from_pandas=True).take(pa.array(codes))
+        return pa.ListArray.from_arrays(
+            pa.array(offsets.astype(np.int32)),
+            items,
+            mask = pa.array(~mask_valid) if not mask_valid.all() else None,
+        )
+
+    return pa.Array.from_pandas(series)
+
+
+def _samples_array(samples: np.ndarray):
+    """
+    Wraps a C-contiguous sample matrix of shape ``(rows, iterations)`` as an Arrow fixed-size list array
+    (one list of ``iterations`` values per row), backed by the buffer of the matrix.
+    """
+
+    pa = _import_pyarrow()
+
+    values = pa.array(samples.reshape(-1)) # zero-copy for contiguous numeric arrays without nulls
+    return pa.FixedSizeListArray.from_arrays(values, samples.shape[1])
+
+
+def to_arrow_table(df: pd.DataFrame):
+    """
+    Exposes a loader output or a stochastic dataframe as an Arrow table, eg. for DuckDB or Polars.
+
+    Converting the dataframe with ``pyarrow.Table.from_pandas`` (as done by ``polars.from_pandas`` or DuckDB)
+    inspects every cell of the ``object`` columns: every list-valued metadata cell and every sample array
+    is converted on its own, and the samples are copied. Instead, the columns are converted by type (see `_metadata_array`),
+    and the samples are exposed as a fixed-size list column ``parameter_value_stochastic``
+    (``fixed_size_list<double>[iterations]``, an ``ARRAY`` in DuckDB and an ``Array`` in Polars)
+    backed by the sample matrix of `stats.get_sample_matrix`: the samples are not copied.
+
+    If the rows of the ``parameter_value_stochastic`` column are not the rows of a single matrix
+    (eg. after filtering), `stats.get_sample_matrix` stacks them first, which copies the samples once.
+
+    The index is included as the first column, unless it is an unnamed ``RangeIndex``.
+    The ``parameter_value_distribution_dict`` column is not exported.
+    ``df.attrs`` (eg. ``sample_precision``) are stored as JSON in the schema metadata ``ecopylot.attrs``.
+
+    Example
+    -------
+    .. code-block:: python
+
+        table = arrow.to_arrow_table(df_stochastic)
+        duckdb.sql("SELECT parameter, list_avg(parameter_value_stochastic::DOUBLE[]) FROM table")
+        df_polars = polars.from_arrow(table)
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        A dataframe as returned by the loaders (eg. `inout.load_data_from_excel`)
+        or by `stats.generate_stochastic_dataframe`.
+
+    Returns
+    -------
+    pyarrow.Table
+        The Arrow table. The arrays referencing the buffers of the dataframe keep them alive.
+
+    Raises
+    ------
+    ImportError
+        If ``pyarrow`` is not installed.
+
+    See Also
+    --------
+    `Arrow fixed-size list layout <https://arrow.apache.org/docs/format/Columnar.html#fixed-size-list-layout>`_
+    """
+
+    pa = _import_pyarrow()
+
+    list_names: list = []
+    list_arrays: list = []
+
+    if not (isinstance(df.index, pd.RangeIndex) and df.index.name is None):
+        list_names.append(df.index.name if df.index.name is not None else 'index')
+        list_arrays.append(_metadata_array(df.index.to_series(index=pd.RangeIndex(len(df)))))
+
+    for col in df.columns:
+        if col in SKIPPED_COLUMNS:
+            continue
+        list_names.append(str(col))
+        if col == 'parameter_value_stochastic':
+            list_arrays.append(_samples_array(stats.get_sample_matrix(df)))
+        else:
+            list_arrays.append(_metadata_array(df[col]))
+
+    metadata: dict | None = {'ecopylot.attrs': json.dumps(df.attrs, default=str)} if df.attrs else None
+
+    table = pa.Table.from_arrays(list_arrays, names=list_names, metadata=metadata)
+
+    logging.info(f"Arrow table created ({table.num_rows} rows, {table.num_columns} columns, {table.nbytes} bytes).")
+
+    return table
+
+
+def to_record_batch_reader(
+        df: pd.DataFrame,
+        rows_per_batch: int = ROWS_PER_BATCH
+    ):
+    """
+    Exposes a loader output or a stochastic dataframe as a stream of Arrow record batches of ``rows_per_batch`` rows.
+
+    The batches are zero-copy slices of the table of `to_arrow_table`. A record batch reader can be queried
+    by DuckDB directly, or passed to any consumer of the
+    `Arrow C stream interface <https://arrow.apache.org/docs/format/CStreamInterface.html>`_.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        A dataframe as returned by the loaders or by `stats.generate_stochastic_dataframe`.
+
+    rows_per_batch : int, optional
+        The maximum number of rows per record batch.
+
+    Returns
+    -------
+    pyarrow.RecordBatchReader
+        The record batch reader.
+
+    Raises
+    ------
+    ImportError
+        If ``pyarrow`` is not installed.
+    """
+
+    pa = _import_pyarrow()
+
+    table = to_arrow_table(df)
+
+    return pa.RecordBatchReader.from_batches(table.schema, table.to_batches(max_chunksize=max(1, int(rows_per_batch))))
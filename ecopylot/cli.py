@@ -0,0 +1,680 @@
+# %%
+# data science
+import numpy as np
+import pandas as pd
+# system
+import os
+import sys
+import glob
+import time
+import asyncio
+import argparse
+import pathlib
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+# debugging
+import logging
+
+# local imports
+import ecopylot.inout as inout
+import ecopylot.stats as stats
+import ecopylot.archive as archive
+import ecopylot.service as service
+import ecopylot.validation as validation
+import ecopylot.partitioned as partitioned
+import ecopylot.distributed as distributed
+
+
+def _collect_input_files(inputs: list) -> list:
+    """
+    Collects the parameter files matching a list of directories, glob patterns or file paths.
+
+    Directories are searched (non-recursively) for files with JSON or Excel suffixes.
+    Glob patterns are expanded using the `glob.glob` function.
+    Duplicate paths are removed, the order of first appearance is preserved.
+
+    Parameters
+    ----------
+    inputs : list
+        A list of directories, glob patterns or file paths (as strings).
+
+    Returns
+    -------
+    list
+        A list of ``pathlib.Path`` objects pointing to JSON or Excel files.
+
+    Raises
+    ------
+    FileNotFoundError
+        If an input does not match any file.
+    """
+
+    list_files: list = []
+
+    for item in inputs:
+        path = pathlib.Path(item)
+        if path.is_dir():
+            matches = sorted(
+                child for child in path.iterdir()
+                if child.suffix.lower() in inout.JSON_SUFFIXES + inout.EXCEL_SUFFIXES
+            )
+        elif path.is_file():
+            matches = [path]
+        else:
+            matches = sorted(pathlib.Path(match) for match in glob.glob(item))
+        if not matches:
+            raise FileNotFoundError(f"No JSON or Excel parameter files found for input: {item}")
+        list_files.extend(matches)
+
+    return list(dict.fromkeys(list_files))
+
+
+def _output_paths(files: list, output_dir: pathlib.Path) -> list:
+    """
+    Computes the path of the ``.npz`` sample file of every parameter file.
+
+    The output paths mirror the paths of the parameter files relative to their common parent directory,
+    eg. ``data/a.json`` and ``data/sub/a.json`` are written to ``<output_dir>/a.npz`` and ``<output_dir>/sub/a.npz``.
+
+    Parameters
+    ----------
+    files : list
+        A list of paths to JSON or Excel parameter files.
+
+    output_dir : pathlib.Path
+        The directory to which the sample files are written.
+
+    Returns
+    -------
+    list
+        A list of ``pathlib.Path`` objects, one per parameter file.
+
+    Raises
+    ------
+    ValueError
+        If several parameter files would be written to the same output path (eg. ``a.json`` and ``a.xlsx``).
+    """
+
+    if not files:
+        return []
+
+    list_resolved: list = [pathlib.Path(path).resolve() for path in files]
+    root = pathlib.Path(os.path.commonpath([path.parent for path in list_resolved]))
+    list_outputs: list = [output_dir / path.relative_to(root).with_suffix('.npz') for path in list_resolved]
+
+    dict_sources: dict = {}
+    for path, path_output in zip(files, list_outputs):
+        dict_sources.setdefault(os.path.normcase(path_output), []).append(str(path))
+    list_collisions: list = [sources for sources in dict_sources.values() if len(sources) > 1]
+    if list_collisions:
+        raise ValueError("Several parameter files would be written to the same output file:\n" + "\n".join(map(str, list_collisions)))
+
+    return list_outputs
+
+
+def _write_samples(df: pd.DataFrame, path_output: pathlib.Path) -> None:
+    """
+    Writes the sample matrix of a stochastic DataFrame to a compressed NumPy ``.npz`` file.
+
+    The file contains two arrays:
+
+    - ``index``: the DataFrame index (eg. the UIDs) as strings, one entry per row.
+    - ``samples``: the sample matrix of shape ``(rows, iterations)``.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        A DataFrame as returned by `stats.generate_stochastic_dataframe`.
+
+    path_output : pathlib.Path
+        The path of the output file.
+
+    See Also
+    --------
+    `numpy.savez_compressed <https://numpy.org/doc/stable/reference/generated/numpy.savez_compressed.html>`_
+    """
+
+    np.savez_compressed(
+        path_output,
+        index = df.index.astype(str).to_numpy(),
+        samples = stats.get_sample_matrix(df),
+    )
+
+
+def _failed_record(path: pathlib.Path, error: str | None = None) -> dict:
+    """
+    Returns the report record of a parameter file that has not been (successfully) processed (see `_process_file`).
+    """
+
+    return {
+        'file': str(path),
+        'status': 'failed',
+        'rows': 0,
+        'invalid': 0,
+        'load [s]': np.nan,
+        'sample [s]': np.nan,
+        'write [s]': np.nan,
+        'output': None,
+        'error': error,
+    }
+
+
+def _process_file(
+        path: pathlib.Path,
+        path_output: pathlib.Path,
+        iterations: int,
+        uncertainty_col: str,
+        list_string_cols: list,
+        validation_mode: str | None = None
+    ) -> dict:
+    """
+    Loads, samples and writes a single parameter file to ``path_output`` (see `_output_paths`).
+
+    Exceptions are caught and recorded in the returned dictionary,
+    so that a single malformed file does not abort the whole batch.
+    If ``validation_mode`` is provided, the parameters are validated before sampling
+    (see `validation.validate_parameters`).
+
+    Returns
+    -------
+    dict
+        A record of the form
+        ``{'file': ..., 'status': 'ok' | 'failed', 'rows': ..., 'invalid': ..., 'load [s]': ..., 'sample [s]': ..., 'write [s]': ..., 'output': ..., 'error': ...}``.
+    """
+
+    record: dict = _failed_record(path)
+
+    try:
+        time_start = time.perf_counter()
+        df = inout.load_parameter_file(path, uncertainty_col, list_string_cols)
+        record['rows'] = len(df)
+        if validation_mode is not None:
+            df, df_invalid = validation.validate_parameters(df, mode = validation_mode)
+            record['invalid'] = df_invalid.index.nunique()
+        record['load [s]'] = time.perf_counter() - time_start
+
+        time_start = time.perf_counter()
+        df = stats.generate_stochastic_dataframe(df = df, iterations = iterations)
+        record['sample [s]'] = time.perf_counter() - time_start
+
+        time_start = time.perf_counter()
+        path_output.parent.mkdir(parents = True, exist_ok = True)
+        _write_samples(df, path_output)
+        record['write [s]'] = time.perf_counter() - time_start
+
+        record['output'] = str(path_output)
+        record['status'] = 'ok'
+    except Exception as exception:
+        record['error'] = f"{type(exception).__name__}: {exception}"
+        logging.debug(traceback.format_exc())
+
+    return record
+
+
+def run_batch(
+        files: list,
+        output_dir: pathlib.Path,
+        iterations: int,
+        workers: int | None = None,
+        uncertainty_col: str = 'uncertainty distribution',
+        list_string_cols: list | None = None,
+        validation_mode: str | None = None
+    ) -> pd.DataFrame:
+    """
+    Loads and samples many parameter files in parallel across a pool of worker processes.
+
+    Each file is processed independently (load, sample, write) by a worker process.
+    Failures are recorded per file and do not abort the batch.
+
+    Parameters
+    ----------
+    files : list
+        A list of paths to JSON or Excel parameter files.
+
+    output_dir : pathlib.Path
+        The directory to which the ``.npz`` sample files are written, mirroring the paths of the parameter files
+        relative to their common parent directory (see `_output_paths`). It is created if it does not exist.
+
+    iterations : int
+        The number of iterations to generate per parameter.
+
+    workers : int, optional
+        The number of worker processes. Defaults to the number of CPUs.
+
+    uncertainty_col : str, optional
+        The name of the column containing the string description of the uncertainty distributions (Excel only).
+
+    list_string_cols : list, optional
+        The list of column names containing string enumerations (Excel only).
+
+    validation_mode : str, optional
+        If provided (``'strict'`` or ``'lenient'``), parameters are validated before sampling
+        (see `validation.validate_parameters`).
+
+    Returns
+    -------
+    pd.DataFrame
+        A report with one row per file, containing its status, number of (invalid) rows,
+        load/sample/write timings and, if applicable, the error message.
+
+    Raises
+    ------
+    ValueError
+        If several parameter files would be written to the same output file.
+        No file is processed in this case.
+
+    See Also
+    --------
+    `concurrent.futures.ProcessPoolExecutor <https://docs.python.org/3/library/concurrent.futures.html#processpoolexecutor>`_
+    """
+
+    list_string_cols = list_string_cols or []
+    list_outputs: list = _output_paths(files, output_dir)
+    output_dir.mkdir(parents = True, exist_ok = True)
+
+    list_records: list = []
+
+    with ProcessPoolExecutor(max_workers = workers) as executor:
+        futures: dict = {
+            executor.submit(
+                _process_file,
+                path,
+                path_output,
+                iterations,
+                uncertainty_col,
+                list_string_cols,
+                validation_mode,
+            ): path
+            for path, path_output in zip(files, list_outputs)
+        }
+        for future in as_completed(futures):
+            try:
+                record = future.result()
+            except Exception as exception: # eg. a worker process died
+                record = _failed_record(futures[future], f"{type(exception).__name__}: {exception}")
+            logging.info(f"Processed {record['file']} ({record['status']}).")
+            list_records.append(record)
+
+    df_report = pd.DataFrame(list_records)
+    df_report = df_report.set_index('file').reindex([str(path) for path in files]).reset_index()
+
+    return df_report
+
+
+def _build_parser() -> argparse.ArgumentParser:
+    """
+    Builds the argument parser of the ``ecopylot`` command-line interface.
+    """
+
+    parser = argparse.ArgumentParser(
+        prog = 'ecopylot',
+        description = 'EcoPyLot command-line interface.',
+    )
+    parser.add_argument(
+        '-v', '--verbose',
+        action = 'store_true',
+        help = 'Enable verbose logging.',
+    )
+    parser_common = argparse.ArgumentParser(add_help = False) # options accepted after every subcommand as well
+    parser_common.add_argument(
+        '-v', '--verbose',
+        action = 'store_true',
+        default = argparse.SUPPRESS, # keeps the value of the top-level option
+        help = 'Enable verbose logging.',
+    )
+    subparsers = parser.add_subparsers(dest = 'command', required = True)
+
+    parser_sample = subparsers.add_parser(
+        'sample',
+        parents = [parser_common],
+        help = 'Load and sample JSON/Excel parameter files in parallel.',
+    )
+    parser_sample.add_argument(
+        'inputs',
+        nargs = '+',
+        help = 'Directories, glob patterns or paths of JSON/Excel parameter files.',
+    )
+    parser_sample.add_argument(
+        '-n', '--iterations',
+        type = int,
+        required = True,
+        help = 'Number of iterations to generate per parameter.',
+    )
+    parser_sample.add_argument(
+        '-o', '--output-dir',
+        type = pathlib.Path,
+        default = pathlib.Path('.'),
+        help = 'Directory to which the .npz sample files are written (default: current directory).',
+    )
+    parser_sample.add_argument(
+        '-w', '--workers',
+        type = int,
+        default = None,
+        help = 'Number of worker processes (default: number of CPUs).',
+    )
+    parser_sample.add_argument(
+        '--uncertainty-col',
+        default = 'uncertainty distribution',
+        help = 'Excel only: column containing the uncertainty distribution names.',
+    )
+    parser_sample.add_argument(
+        '--string-cols',
+        nargs = '*',
+        default = [],
+        help = 'Excel only: columns containing comma-separated string enumerations.',
+    )
+    parser_sample.add_argument(
+        '--validate',
+        choices = ['strict', 'lenient'],
+        default = None,
+        help = 'Validate parameters before sampling: fail the file (strict) or drop invalid rows (lenient).',
+    )
+
+    parser_serve = subparsers.add_parser(
+        'serve',
+        parents = [parser_common],
+        help = 'Run a local sampling service for the parameter files of a directory.',
+    )
+    parser_serve.add_argument(
+        'root',
+        type = pathlib.Path,
+        help = 'Directory containing the JSON/Excel parameter files.',
+    )
+    parser_serve.add_argument(
+        '--port',
+        type = int,
+        default = 8765,
+        help = 'Port to listen on, on localhost (default: 8765).',
+    )
+    parser_serve.add_argument(
+        '--unix-socket',
+        type = pathlib.Path,
+        default = None,
+        help = 'Listen on this Unix socket instead of a localhost port.',
+    )
+    parser_serve.add_argument(
+        '--uncertainty-col',
+        default = 'uncertainty distribution',
+        help = 'Excel only: column containing the uncertainty distribution names.',
+    )
+    parser_serve.add_argument(
+        '--string-cols',
+        nargs = '*',
+        default = [],
+        help = 'Excel only: columns containing comma-separated string enumerations.',
+    )
+    parser_partition = subparsers.add_parser(
+        'partition',
+        parents = [parser_common],
+        help = 'Load and sample JSON/Excel parameter files partition by partition, for samples larger than the memory.',
+    )
+    parser_partition.add_argument(
+        'inputs',
+        nargs = '+',
+        help = 'Directories, glob patterns or paths of JSON/Excel parameter files.',
+    )
+    parser_partition.add_argument(
+        '-n', '--iterations',
+        type = int,
+        required = True,
+        help = 'Number of iterations to generate per parameter.',
+    )
+    parser_partition.add_argument(
+        '-o', '--output-dir',
+        type = pathlib.Path,
+        required = True,
+        help = 'Directory to which the partitions, statistics and index are written.',
+    )
+    parser_partition.add_argument(
+        '--seed',
+        type = int,
+        required = True,
+        help = 'Global seed of the per-UID random streams.',
+    )
+    parser_partition.add_argument(
+        '--partition-rows',
+        type = int,
+        default = None,
+        help = 'Number of rows per partition (default: rows of 256 MiB of samples).',
+    )
+    parser_partition.add_argument(
+        '--dtype',
+        choices = ['float64', 'float32'],
+        default = 'float64',
+        help = 'Data type in which the samples are stored (default: float64).',
+    )
+    parser_partition.add_argument(
+        '--counter-based',
+        action = 'store_true',
+        help = 'Sample with the counter-based random number generator (samples can be regenerated by UID and iteration).',
+    )
+    parser_partition.add_argument(
+        '--compression',
+        choices = [compression for compression in archive.COMPRESSORS if compression is not None],
+        default = None,
+        help = 'Compression of the partition archives (default: none).',
+    )
+    parser_partition.add_argument(
+        '--aggregate-by',
+        nargs = '*',
+        default = None,
+        help = 'Metadata columns to aggregate the samples by.',
+    )
+    parser_partition.add_argument(
+        '--how',
+        choices = ['sum', 'mean', 'weighted_sum', 'weighted_mean'],
+        default = 'sum',
+        help = 'Aggregation of the samples (default: sum).',
+    )
+    parser_partition.add_argument(
+        '--weights',
+        default = None,
+        help = 'Column of weights of the weighted aggregations.',
+    )
+    parser_partition.add_argument(
+        '--uncertainty-col',
+        default = 'uncertainty distribution',
+        help = 'Excel only: column containing the uncertainty distribution names.',
+    )
+    parser_partition.add_argument(
+        '--string-cols',
+        nargs = '*',
+        default = [],
+        help = 'Excel only: columns containing comma-separated string enumerations.',
+    )
+    parser_partition.add_argument(
+        '--validate',
+        choices = ['strict', 'lenient'],
+        default = None,
+        help = 'Validate parameters before sampling: fail the run (strict) or drop invalid rows (lenient).',
+    )
+    parser_coordinate = subparsers.add_parser(
+        'coordinate',
+        parents = [parser_common],
+        help = 'Sample a JSON/Excel parameter file with workers on several machines.',
+    )
+    parser_coordinate.add_argument(
+        'input',
+        type = pathlib.Path,
+        help = 'Path of the JSON/Excel parameter file.',
+    )
+    parser_coordinate.add_argument(
+        '-n', '--iterations',
+        type = int,
+        required = True,
+        help = 'Number of iterations to generate per parameter.',
+    )
+    parser_coordinate.add_argument(
+        '--seed',
+        type = int,
+        required = True,
+        help = 'Global seed of the counter-based random streams.',
+    )
+    parser_coordinate.add_argument(
+        '-o', '--output',
+        type = pathlib.Path,
+        required = True,
+        help = 'Path of the memory-mapped .npy sample matrix.',
+    )
+    parser_coordinate.add_argument(
+        '--host',
+        default = '127.0.0.1',
+        help = 'Interface to listen on (default: 127.0.0.1; use 0.0.0.0 for workers on other machines).',
+    )
+    parser_coordinate.add_argument(
+        '--port',
+        type = int,
+        default = 8766,
+        help = 'Port to listen on (default: 8766).',
+    )
+    parser_coordinate.add_argument(
+        '--local-workers',
+        type = int,
+        default = 0,
+        help = 'Number of worker processes to start on this machine (default: 0).',
+    )
+    parser_coordinate.add_argument(
+        '--rows-per-task',
+        type = int,
+        default = None,
+        help = 'Number of rows per task (default: all rows).',
+    )
+    parser_coordinate.add_argument(
+        '--iterations-per-task',
+        type = int,
+        default = None,
+        help = 'Number of iterations per task (default: 64 MiB of samples per task).',
+    )
+    parser_coordinate.add_argument(
+        '--uncertainty-col',
+        default = 'uncertainty distribution',
+        help = 'Excel only: column containing the uncertainty distribution names.',
+    )
+    parser_coordinate.add_argument(
+        '--string-cols',
+        nargs = '*',
+        default = [],
+        help = 'Excel only: columns containing comma-separated string enumerations.',
+    )
+
+    parser_work = subparsers.add_parser(
+        'work',
+        parents = [parser_common],
+        help = 'Sample the tasks of a coordinator.',
+    )
+    parser_work.add_argument(
+        '--host',
+        default = '127.0.0.1',
+        help = 'Host of the coordinator (default: 127.0.0.1).',
+    )
+    parser_work.add_argument(
+        '--port',
+        type = int,
+        default = 8766,
+        help = 'Port of the coordinator (default: 8766).',
+    )
+
+    return parser
+
+
+def main(argv: list | None = None) -> int:
+    """
+    Entry point of the ``ecopylot`` command-line interface.
+
+    Example
+    -------
+    .. code-block:: bash
+
+        ecopylot sample data/*.json --iterations 1000 --workers 8 --output-dir results/
+        ecopylot serve data/ --port 8765
+        ecopylot coordinate data/fleet.json --iterations 100000 --seed 42 --output samples.npy --host 0.0.0.0
+        ecopylot work --host coordinator.example.org
+        ecopylot partition data/fleet.json --iterations 10000 --seed 42 --output-dir results/ --aggregate-by parameter year
+
+    Returns
+    -------
+    int
+        The exit code: ``0`` if all files were processed successfully, ``1`` otherwise.
+    """
+
+    args = _build_parser().parse_args(argv)
+
+    logging.basicConfig(level = logging.INFO if args.verbose else logging.WARNING)
+
+    if args.command == 'sample':
+        files: list = _collect_input_files(args.inputs)
+        df_report = run_batch(
+            files = files,
+            output_dir = args.output_dir,
+            iterations = args.iterations,
+            workers = args.workers,
+            uncertainty_col = args.uncertainty_col,
+            list_string_cols = args.string_cols,
+            validation_mode = args.validate,
+        )
+        print(df_report.drop(columns = ['output'], errors = 'ignore').to_string(index = False, float_format = '{:.3f}'.format))
+        number_failed: int = int((df_report['status'] != 'ok').sum())
+        print(f"\n{len(df_report) - number_failed}/{len(df_report)} files processed successfully.")
+        return 1 if number_failed else 0
+
+    if args.command == 'partition':
+        df_partitions = partitioned.run_partitioned(
+            sources = _collect_input_files(args.inputs),
+            output_dir = args.output_dir,
+            iterations = args.iterations,
+            seed = args.seed,
+            partition_rows = args.partition_rows,
+            dtype = args.dtype,
+            counter_based = args.counter_based,
+            uncertainty_col = args.uncertainty_col,
+            list_string_cols = args.string_cols,
+            validation_mode = args.validate,
+            aggregate_by = args.aggregate_by or None,
+            how = args.how,
+            weights = args.weights,
+            compression = args.compression,
+        )
+        print(df_partitions.drop(columns = ['first_uid', 'last_uid'], errors = 'ignore').to_string(index = False, float_format = '{:.3f}'.format))
+        print(f"\n{len(df_partitions)} partitions of {df_partitions['rows'].sum() if len(df_partitions) else 0} rows written to {args.output_dir}.")
+        return 0
+
+    if args.command == 'coordinate':
+        df = distributed.generate_stochastic_dataframe_sharded(
+            df = inout.load_parameter_file(args.input, args.uncertainty_col, args.string_cols),
+            iterations = args.iterations,
+            seed = args.seed,
+            output = args.output,
+            host = args.host,
+            port = args.port,
+            local_workers = args.local_workers,
+            rows_per_task = args.rows_per_task,
+            iterations_per_task = args.iterations_per_task,
+        )
+        print(f"Samples of {len(df)} parameters written to {args.output} ({df.attrs['sharded_sampling']}).")
+        return 0
+
+    if args.command == 'work':
+        number_tasks: int = distributed.run_worker(host = args.host, port = args.port)
+        print(f"{number_tasks} tasks sampled.")
+        return 0
+
+    if args.command == 'serve':
+        async def serve() -> None:
+            server = await service.start_service(
+                root = args.root,
+                port = args.port,
+                unix_socket = args.unix_socket,
+                uncertainty_col = args.uncertainty_col,
+                list_string_cols = args.string_cols,
+            )
+            async with server:
+                await server.serve_forever()
+        try:
+            asyncio.run(serve())
+        except KeyboardInterrupt:
+            pass
+        return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
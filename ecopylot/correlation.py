@@ -0,0 +1,274 @@
+# %%
+# data science
+import pandas as pd
+import numpy as np
+from scipy.special import ndtri # inverse of the standard normal CDF
+# debugging
+import logging
+
+
+def _rank_to_pearson(rho: np.ndarray | float) -> np.ndarray | float:
+    """
+    Converts a rank (Spearman) correlation to the Pearson correlation of normal scores.
+
+    For bivariate normal variables, the Spearman correlation ``rho_s`` and the Pearson correlation ``rho_p``
+    are related by ``rho_p = 2 * sin(pi * rho_s / 6)``.
+
+    See Also
+    --------
+    `Spearman's rank correlation coefficient <https://en.wikipedia.org/wiki/Spearman%27s_rank_correlation_coefficient>`_
+    """
+    return 2 * np.sin(np.pi * np.asarray(rho) / 6)
+
+
+def _nearest_correlation_matrix(matrix: np.ndarray, epsilon: float = 1e-10) -> np.ndarray:
+    """
+    Returns the matrix itself if it is positive definite, otherwise a nearby positive definite correlation matrix.
+
+    Negative eigenvalues are clipped to ``epsilon`` and the result is rescaled to a unit diagonal.
+    """
+
+    eigenvalues, eigenvectors = np.linalg.eigh(matrix)
+    if eigenvalues.min() > epsilon:
+        return matrix
+
+    logging.warning("Correlation matrix is not positive definite and was replaced by the nearest positive definite matrix.")
+
+    matrix = (eigenvectors * np.maximum(eigenvalues, epsilon)) @ eigenvectors.T
+    scaling = np.sqrt(np.diag(matrix))
+
+    return matrix / np.outer(scaling, scaling)
+
+
+def _reorder_by_ranks(samples: np.ndarray, scores: np.ndarray) -> np.ndarray:
+    """
+    Reorders each row of ``samples`` so that its ranks match the ranks of the same row of ``scores``.
+
+    The marginal distribution of each row is unchanged; only the order of the iterations changes.
+    """
+
+    reordered = np.empty_like(samples)
+    np.put_along_axis(reordered, np.argsort(scores, axis=1), np.sort(samples, axis=1), axis=1) # k-th smallest sample to the position of the k-th smallest score
+
+    return reordered
+
+
+def _group_codes(df: pd.DataFrame, columns: list) -> np.ndarray:
+    """
+    Returns an integer group code per row, for the unique combinations of the values of ``columns``.
+
+    List-valued cells (eg. ``sizes``) are compared as tuples. Missing values form their own group.
+    """
+
+    df_keys = pd.DataFrame({
+        col: [tuple(value) if isinstance(value, (list, np.ndarray)) else value for value in df[col]]
+        for col in columns
+    })
+
+    return df_keys.groupby(columns, sort=False, dropna=False).ngroup().to_numpy()
+
+
+def _impose_dense_block(
+        samples: np.ndarray,
+        rows: np.ndarray,
+        target: np.ndarray,
+        scores: np.ndarray,
+        rng: np.random.Generator
+    ) -> None:
+    """
+    Imposes a (small, dense) rank correlation matrix on a block of rows of the sample matrix using the Iman-Conover method.
+
+    The van der Waerden ``scores`` are randomly permuted per row; their sample correlation is then removed
+    and replaced by the target correlation using Cholesky factors, and the rows of ``samples`` are reordered
+    to match the ranks of the transformed scores.
+    """
+
+    matrix_scores = rng.permuted(np.tile(scores, (len(rows), 1)), axis=1)
+
+    factor_target = np.linalg.cholesky(_nearest_correlation_matrix(_rank_to_pearson(target)))
+    factor_scores = np.linalg.cholesky(_nearest_correlation_matrix(np.corrcoef(matrix_scores)))
+    matrix_scores = factor_target @ np.linalg.solve(factor_scores, matrix_scores)
+
+    samples[rows] = _reorder_by_ranks(samples[rows], matrix_scores)
+
+
+def _impose_equicorrelated_block(
+        samples: np.ndarray,
+        rows: np.ndarray,
+        rho: float,
+        rng: np.random.Generator,
+        chunk_size: int = 256
+    ) -> None:
+    """
+    Imposes the same rank correlation ``rho`` between all pairs of rows of a block of the sample matrix.
+
+    Instead of a dense ``k x k`` matrix, reference scores are generated from a one-factor model
+    ``sqrt(r) * z_0 + sqrt(1 - r) * z_i`` (with ``r`` the Pearson equivalent of ``rho``),
+    which has exactly the equicorrelation structure. The rows are processed in chunks that share ``z_0``,
+    so that memory use is independent of the group size.
+    """
+
+    rho_pearson = float(_rank_to_pearson(rho))
+    iterations = samples.shape[1]
+    factor_common = rng.standard_normal(iterations)
+
+    for start in range(0, len(rows), chunk_size):
+        rows_chunk = rows[start:start + chunk_size]
+        matrix_scores = np.sqrt(rho_pearson) * factor_common + np.sqrt(1 - rho_pearson) * rng.standard_normal((len(rows_chunk), iterations))
+        samples[rows_chunk] = _reorder_by_ranks(samples[rows_chunk], matrix_scores)
+
+
+def impose_rank_correlation(
+        samples: np.ndarray,
+        df: pd.DataFrame,
+        correlation: dict,
+        seed: int | None = None,
+        max_dense_size: int = 2000
+    ) -> None:
+    """
+    Imposes a sparse rank correlation specification on a sample matrix, in place.
+
+    Samples generated by ``stats_arrays`` are independent. This function reorders the iterations
+    of correlated parameters using the Iman-Conover method [Iman & Conover (1982)],
+    so that their rank (Spearman) correlations match the specification while their marginal
+    distributions remain unchanged.
+
+    The specification is a dictionary of the form:
+
+    .. code-block:: python
+
+        correlation = {
+            'pairs': [
+                ('uid_1', 'uid_2', 0.8),
+                ('uid_2', 'uid_3', -0.3),
+            ],
+            'groups': [
+                (['Propulsor', 'year'], 0.6),
+            ],
+        }
+
+    where ``pairs`` correlates two UIDs and ``groups`` correlates all parameters
+    sharing the same values of the given metadata columns (list-valued cells are compared as a whole).
+    Both keys are optional. Pair specifications take precedence over group specifications.
+
+    The specification is never turned into a dense matrix over all parameters.
+    Parameters are split into independent blocks (connected components of the specification):
+
+    - Blocks consisting of a single metadata group are correlated using a one-factor model,
+      which scales to groups of any size.
+    - All other blocks are correlated using a dense ``k x k`` matrix of the block only.
+      If the matrix is not positive definite, the nearest positive definite matrix is used.
+
+    Parameters
+    ----------
+    samples : np.ndarray
+        The sample matrix, of shape ``(rows, iterations)``. Modified in place.
+
+    df : pd.DataFrame
+        The parameter data, with one row per row of ``samples``, indexed by UID.
+
+    correlation : dict
+        The correlation specification.
+
+    seed : int, optional
+        The seed of the random reordering.
+
+    max_dense_size : int, optional
+        The maximum number of parameters of a block requiring a dense matrix.
+
+    Raises
+    ------
+    ValueError
+        If a UID is unknown, a correlation is outside ``[-1, 1]`` (or negative for groups),
+        or a dense block is larger than ``max_dense_size``.
+
+    References
+    ----------
+    Iman, R. L. & Conover, W. J. (1982). A distribution-free approach to inducing rank correlation among input variables.
+    Communications in Statistics - Simulation and Computation, 11(3), 311-334.
+    `doi:10.1080/03610918208812265 <https://doi.org/10.1080/03610918208812265>`_
+    """
+
+    rng = np.random.default_rng(seed)
+    number_rows, iterations = samples.shape
+
+    # collect edges (row_a, row_b, rho) and group memberships
+
+    list_pairs: list = list(correlation.get('pairs', []))
+    if list_pairs:
+        uids_a, uids_b, rhos = zip(*list_pairs)
+        rows_a = df.index.get_indexer(list(uids_a))
+        rows_b = df.index.get_indexer(list(uids_b))
+        if (rows_a < 0).any() or (rows_b < 0).any():
+            unknown = [uid for uid, row in zip(uids_a + uids_b, np.concatenate([rows_a, rows_b])) if row < 0]
+            raise ValueError(f"Unknown UIDs in correlation specification: {unknown}")
+        rhos = np.asarray(rhos, dtype=np.float64)
+    else:
+        rows_a = rows_b = np.array([], dtype=np.intp)
+        rhos = np.array([], dtype=np.float64)
+
+    if (np.abs(rhos) > 1).any():
+        raise ValueError("Correlations must be within [-1, 1].")
+
+    group_of_row: np.ndarray = np.full(number_rows, -1, dtype=np.intp)
+    list_group_rho: list = []
+    for columns, rho in correlation.get('groups', []):
+        if not 0 <= rho <= 1:
+            raise ValueError("Group correlations must be within [0, 1].")
+        codes = _group_codes(df, list(columns))
+        counts = np.bincount(codes)
+        mask = (counts[codes] > 1) & (group_of_row < 0) # groups of one are not correlated; rows keep their first group
+        group_of_row[mask] = codes[mask] + len(list_group_rho)
+        list_group_rho.extend([rho] * len(counts))
+
+    # connected components (union-find) over pairs and group memberships
+
+    parent: np.ndarray = np.arange(number_rows)
+
+    def find(row: int) -> int:
+        while parent[row] != row:
+            parent[row] = parent[parent[row]]
+            row = parent[row]
+        return row
+
+    rows_grouped = np.flatnonzero(group_of_row >= 0)
+    _, first_of_group = np.unique(group_of_row[rows_grouped], return_index=True)
+    representative = dict(zip(group_of_row[rows_grouped[first_of_group]], rows_grouped[first_of_group]))
+    parent[rows_grouped] = [representative[group] for group in group_of_row[rows_grouped]]
+    for row_a, row_b in zip(rows_a, rows_b):
+        root_a, root_b = find(row_a), find(row_b)
+        if root_a != root_b:
+            parent[root_b] = root_a
+
+    rows_involved = np.union1d(rows_grouped, np.concatenate([rows_a, rows_b]))
+    roots = np.array([find(row) for row in rows_involved], dtype=np.intp)
+
+    # impose correlation block by block
+
+    scores = ndtri(np.arange(1, iterations + 1) / (iterations + 1)) # van der Waerden scores
+    rows_with_pairs = set(rows_a) | set(rows_b)
+
+    for root in np.unique(roots):
+        rows_block = rows_involved[roots == root]
+        if len(rows_block) < 2:
+            continue
+        groups_block = np.unique(group_of_row[rows_block])
+        if len(groups_block) == 1 and groups_block[0] >= 0 and not rows_with_pairs.intersection(rows_block):
+            _impose_equicorrelated_block(samples, rows_block, list_group_rho[groups_block[0]], rng)
+            continue
+        if len(rows_block) > max_dense_size:
+            raise ValueError(f"Correlated block of {len(rows_block)} parameters exceeds the maximum dense block size ({max_dense_size}).")
+        position = {row: pos for pos, row in enumerate(rows_block)}
+        groups_rows = group_of_row[rows_block]
+        target = np.where(
+            (groups_rows[:, None] == groups_rows[None, :]) & (groups_rows[:, None] >= 0),
+            np.array(list_group_rho + [0.0])[groups_rows][:, None],
+            0.0
+        )
+        for row_a, row_b, rho in zip(rows_a, rows_b, rhos):
+            if row_a in position:
+                target[position[row_a], position[row_b]] = target[position[row_b], position[row_a]] = rho
+        np.fill_diagonal(target, 1.0)
+        _impose_dense_block(samples, rows_block, target, scores, rng)
+
+    logging.info(f"Rank correlation imposed on {len(rows_involved)} parameters ({len(np.unique(roots))} blocks).")
@@ -0,0 +1,348 @@
+# %%
+# data science
+import pandas as pd
+import numpy as np
+import scipy.special as special
+import stats_arrays as sarrays # for uncertainty distributions
+# debugging
+import logging
+# local imports
+import ecopylot.stats as stats
+import ecopylot.inverse_cdf as inverse_cdf
+
+
+TRUNCATED_TYPES: tuple = (2, 3, 8, 9, 11, 12) # distributions whose minimum/maximum truncate (rather than define) the support
+VALUES_PER_BLOCK: int = 4 # 64-bit values per Philox counter block
+MAXIMUM_GAP_BLOCKS: int = 256 # gaps between requested iterations up to which the stream is generated rather than re-seeked
+CHUNK_SIZE_BYTES: int = 16 * 2**20
+
+
+def _fill_nan(values: np.ndarray, default: float) -> np.ndarray:
+    return np.where(np.isnan(values), default, values)
+
+
+def _beta_pert_shapes(params: np.ndarray) -> tuple:
+    """
+    Returns the Beta shape parameters ``(alpha, beta)`` of Beta-PERT distributions (as in ``stats_arrays``, with a default ``lambda`` of 4).
+    """
+    lambda_values = _fill_nan(params['scale'], 4.0)
+    minimum, mode, maximum = params['minimum'], params['loc'], params['maximum']
+    return 1 + lambda_values * (mode - minimum) / (maximum - minimum), 1 + lambda_values * (maximum - mode) / (maximum - minimum)
+
+
+def _triangular_ppf(params: np.ndarray, u: np.ndarray) -> np.ndarray:
+    minimum, mode, maximum = params['minimum'], params['loc'], params['maximum']
+    width = maximum - minimum
+    return np.where(
+        u < (mode - minimum) / width,
+        minimum + np.sqrt(u * width * (mode - minimum)),
+        maximum - np.sqrt((1 - u) * width * (maximum - mode)),
+    )
+
+
+# inverse cumulative distribution functions, by stats_arrays uncertainty type
+# (parameter columns have shape (rows, 1), uniforms have shape (rows, iterations))
+PPF: dict = {
+    0: lambda p, u: np.broadcast_to(p['loc'], u.shape),
+    1: lambda p, u: np.broadcast_to(p['loc'], u.shape),
+    2: lambda p, u: np.exp(p['loc'] + p['scale'] * special.ndtri(u)),
+    3: lambda p, u: p['loc'] + p['scale'] * special.ndtri(u),
+    4: lambda p, u: p['minimum'] + u * (p['maximum'] - p['minimum']),
+    5: _triangular_ppf,
+    6: lambda p, u: (u > 1 - p['loc']) * 1.0,
+    7: lambda p, u: np.floor(_fill_nan(p['minimum'], 0) + u * (p['maximum'] - _fill_nan(p['minimum'], 0))),
+    8: lambda p, u: _fill_nan(p['loc'], 0) + p['scale'] * (-np.log1p(-u)) ** (1 / p['shape']),
+    9: lambda p, u: _fill_nan(p['loc'], 0) + p['scale'] * special.gammaincinv(p['shape'], u),
+    10: lambda p, u: _fill_nan(p['minimum'], 0) + (_fill_nan(p['maximum'], 1) - _fill_nan(p['minimum'], 0)) * special.betaincinv(p['loc'], p['shape'], u),
+    11: lambda p, u: p['loc'] - p['scale'] * np.log(-np.log(u)),
+    12: lambda p, u: _fill_nan(p['loc'], 0) + _fill_nan(p['scale'], 1) * special.stdtrit(p['shape'], u),
+    13: lambda p, u: p['minimum'] + (p['maximum'] - p['minimum']) * special.betaincinv(*_beta_pert_shapes(p), u),
+}
+
+# cumulative distribution functions of the truncated distributions (see `TRUNCATED_TYPES`)
+CDF: dict = {
+    2: lambda p, x: special.ndtr((np.log(np.maximum(x, 0)) - p['loc']) / p['scale']),
+    3: lambda p, x: special.ndtr((x - p['loc']) / p['scale']),
+    8: lambda p, x: -np.expm1(-np.maximum((x - _fill_nan(p['loc'], 0)) / p['scale'], 0) ** p['shape']),
+    9: lambda p, x: special.gammainc(p['shape'], np.maximum((x - _fill_nan(p['loc'], 0)) / p['scale'], 0)),
+    11: lambda p, x: np.exp(-np.exp(-(x - p['loc']) / p['scale'])),
+    12: lambda p, x: special.stdtr(p['shape'], (x - _fill_nan(p['loc'], 0)) / _fill_nan(p['scale'], 1)),
+}
+
+
+def _iteration_positions(iterations: int | slice | list | np.ndarray) -> np.ndarray:
+    """
+    Converts an iteration selection (a number of iterations, a slice with a ``stop`` or a list of positions) to an array of positions.
+    """
+
+    if isinstance(iterations, (int, np.integer)):
+        return np.arange(int(iterations))
+    if isinstance(iterations, slice):
+        if iterations.stop is None:
+            raise ValueError("Iteration slices must have a stop (the number of iterations is not bounded).")
+        return np.arange(iterations.start or 0, iterations.stop, iterations.step or 1)
+    positions = np.asarray(iterations, dtype=np.int64).reshape(-1)
+    if (positions < 0).any():
+        raise ValueError("Iterations must be non-negative.")
+    return positions
+
+
+def _stream_segments(positions: np.ndarray) -> list:
+    """
+    Plans the Philox stream segments needed to generate the values at ``positions`` of a stream.
+
+    Positions are sorted and grouped into segments of nearby counter blocks (gaps of at most ``MAXIMUM_GAP_BLOCKS``).
+    Each segment is generated with a single seek of the counter. The plan is the same for every UID,
+    so it is computed once per request.
+
+    Returns
+    -------
+    list
+        A list of tuples ``(first block, number of blocks, destination positions, positions in the segment)``.
+    """
+
+    if len(positions) and np.array_equal(positions, np.arange(positions[0], positions[0] + len(positions))):
+        first: int = int(positions[0]) // VALUES_PER_BLOCK
+        number_blocks: int = -(-(int(positions[-1]) + 1) // VALUES_PER_BLOCK) - first
+        offset: int = int(positions[0]) - first * VALUES_PER_BLOCK
+        return [(first, number_blocks, slice(None), slice(offset, offset + len(positions)))]
+
+    order: np.ndarray = np.argsort(positions, kind='stable')
+    positions_sorted: np.ndarray = positions[order]
+    blocks: np.ndarray = positions_sorted // VALUES_PER_BLOCK
+    breaks: np.ndarray = np.flatnonzero(np.diff(blocks) > MAXIMUM_GAP_BLOCKS) + 1
+
+    list_segments: list = []
+    for start, stop in zip(np.concatenate([[0], breaks]), np.concatenate([breaks, [len(positions)]])):
+        first = int(blocks[start])
+        list_segments.append((
+            first,
+            int(blocks[stop - 1]) - first + 1,
+            order[start:stop],
+            positions_sorted[start:stop] - first * VALUES_PER_BLOCK,
+        ))
+
+    return list_segments
+
+
+def _uniforms(key: np.ndarray, segments: list, size: int) -> np.ndarray:
+    """
+    Returns the uniform random numbers of a Philox stream at the positions planned by `_stream_segments`.
+
+    The 64-bit raw values are converted to doubles in ``[2**-53, 1 - 2**-53]`` (52 random bits, offset by half a step;
+    with 53 bits, the largest value would round to ``1.0``), so that inverse cumulative distribution functions are finite.
+    """
+
+    raw: np.ndarray = np.empty(size, dtype=np.uint64)
+    for first, number_blocks, destination, source in segments:
+        stream = np.random.Philox(key=key, counter=[first, 0, 0, 0]).random_raw(number_blocks * VALUES_PER_BLOCK)
+        raw[destination] = stream[source]
+
+    return ((raw >> np.uint64(12)).astype(np.float64) + 0.5) * 2.0**-52
+
+
+def _truncate_uniforms(parameters: np.ndarray, uncertainty_type: int, u: np.ndarray) -> np.ndarray:
+    """
+    Maps uniforms to the interval ``[F(minimum), F(maximum)]`` of a distribution truncated by its bounds,
+    so that the inverse cumulative distribution function returns samples from the truncated distribution.
+
+    In contrast to rejection sampling (as in ``stats_arrays``), every sample consumes exactly one random number.
+    The cumulative distribution function is only evaluated for rows with a bound;
+    if no row has a bound, the uniforms are returned unchanged.
+
+    Raises
+    ------
+    ValueError
+        If the bounds of a row exclude (numerically) all of its distribution.
+    """
+
+    mask_lower: np.ndarray = ~np.isnan(parameters['minimum'])
+    mask_upper: np.ndarray = ~np.isnan(parameters['maximum'])
+    if not (mask_lower.any() or mask_upper.any()):
+        return u
+
+    lower: np.ndarray = np.zeros(parameters.shape)
+    upper: np.ndarray = np.ones(parameters.shape)
+    if mask_lower.any():
+        lower[mask_lower] = CDF[uncertainty_type](parameters[mask_lower], parameters['minimum'][mask_lower])
+    if mask_upper.any():
+        upper[mask_upper] = CDF[uncertainty_type](parameters[mask_upper], parameters['maximum'][mask_upper])
+
+    if (upper <= lower).any():
+        raise ValueError(f"Bounds exclude all of the distribution (uncertainty type {uncertainty_type}) for {int((upper <= lower).sum())} rows.")
+
+    return lower + u * (upper - lower)
+
+
+def _generate_samples_counter_based(
+        parameters: np.ndarray,
+        uids: pd.Index,
+        iterations: int | slice | list | np.ndarray,
+        seed: int,
+        dtype: np.dtype = np.float64,
+        precision: dict | None = None,
+        rtol: float | None = None
+    ) -> np.ndarray:
+    """
+    Generates samples for a ``stats_arrays`` parameter array with a counter-based random number generator.
+
+    The sample of iteration ``i`` of a UID is the inverse cumulative distribution function of the distribution
+    applied to the ``i``-th value of the `Philox <https://numpy.org/doc/stable/reference/random/bit_generators/philox.html>`_
+    stream keyed by ``(seed, hash(UID))`` (see `stats._uid_seed_entropy`). The counter of the stream is set
+    directly to the block of ``i``: any slice of iterations is generated without generating the iterations before it,
+    and every sample is a pure function of ``(seed, UID, iteration)`` and the distribution of the UID.
+
+    Uniforms are generated UID by UID; the inverse cumulative distribution functions are applied
+    to chunks of rows, per uncertainty type (see `PPF`).
+
+    Parameters
+    ----------
+    parameters : np.ndarray
+        A ``stats_arrays`` parameter array, as returned by `stats_arrays.UncertaintyBase.from_dicts`.
+
+    uids : pd.Index
+        The UIDs of the parameters (one per row of ``parameters``).
+
+    iterations : int, slice or list
+        The number of iterations (``0`` to ``iterations - 1``), a slice, or a list of iteration positions.
+
+    seed : int
+        The global seed.
+
+    dtype : np.dtype, optional
+        The data type in which the samples are stored.
+
+    precision : dict, optional
+        If provided, the rounding error introduced by ``dtype`` is accumulated in this dictionary
+        (see `stats._accumulate_precision_error`).
+
+    rtol : float, optional
+        If provided, the inverse cumulative distribution functions of gamma, beta, Student's t and Beta-PERT rows
+        are interpolated in lookup tables with this error bound (see `inverse_cdf.tabulated_ppf`).
+
+    Returns
+    -------
+    np.ndarray
+        The samples, of shape ``(len(parameters), #iterations)``.
+
+    Raises
+    ------
+    ValueError
+        If an uncertainty type is not valid, or if the bounds of a row exclude all of its distribution.
+    """
+
+    uncertainty_types: np.ndarray = parameters['uncertainty_type']
+    for uncertainty_type in np.unique(uncertainty_types):
+        if uncertainty_type not in sarrays.uncertainty_choices.id_dict:
+            raise ValueError(f"Uncertainty type id {uncertainty_type} is not valid")
+        sarrays.uncertainty_choices[uncertainty_type].validate(parameters[uncertainty_types == uncertainty_type])
+
+    positions: np.ndarray = _iteration_positions(iterations)
+    segments: list = _stream_segments(positions)
+    keys: np.ndarray = stats._uid_seed_entropy(uids, seed)
+
+    samples: np.ndarray = np.empty((len(parameters), len(positions)), dtype=dtype)
+    rows_per_chunk: int = max(1, CHUNK_SIZE_BYTES // (8 * max(len(positions), 1)))
+
+    for start in range(0, len(parameters), rows_per_chunk):
+        stop: int = min(start + rows_per_chunk, len(parameters))
+        u: np.ndarray = np.empty((stop - start, len(positions)))
+        for row in range(start, stop):
+            u[row - start] = _uniforms(keys[row], segments, len(positions))
+
+        chunk: np.ndarray = np.empty_like(u)
+        types_chunk: np.ndarray = uncertainty_types[start:stop]
+        for uncertainty_type in np.unique(types_chunk):
+            mask = types_chunk == uncertainty_type
+            params = parameters[start:stop][mask].reshape(-1, 1)
+            u_type = u[mask]
+            if uncertainty_type in TRUNCATED_TYPES:
+                u_type = _truncate_uniforms(params, int(uncertainty_type), u_type)
+            if rtol is not None and uncertainty_type in inverse_cdf.TABULATED_TYPES:
+                chunk[mask] = inverse_cdf.tabulated_ppf(params, u_type, rtol)
+            else:
+                chunk[mask] = PPF[int(uncertainty_type)](params, u_type)
+
+        samples[start:stop] = chunk
+        if precision is not None:
+            stats._accumulate_precision_error(precision, slice(start, stop), chunk, samples[start:stop])
+
+    return samples
+
+
+def generate_samples(
+        df: pd.DataFrame,
+        iterations: int | slice | list,
+        seed: int,
+        uids: list | None = None,
+        dtype: np.dtype = np.float64,
+        rtol: float | None = None
+    ) -> np.ndarray:
+    """
+    Generates any slice of the sample matrix of a parameter dataframe directly, with a counter-based random number generator.
+
+    Every sample is a pure function of ``(seed, UID, iteration)`` and the distribution of the UID
+    (see `_generate_samples_counter_based`): the samples of a block of iterations or UIDs are identical
+    whether the block is generated alone, as part of the full matrix, in another process or on another machine.
+    The full sample matrix therefore never needs to be generated or stored, eg.:
+
+    .. code-block:: python
+
+        value = counter_rng.generate_samples(df, iterations=[734512], seed=42, uids=['123'])[0, 0]
+        samples_block = counter_rng.generate_samples(df, iterations=slice(10000, 20000), seed=42)
+
+    The result for ``iterations=n`` is the sample matrix of ``stats.generate_stochastic_dataframe(df, n, seed, counter_based=True, rtol=rtol)``.
+
+    Samples are generated by inverse transform sampling. Bounded distributions (eg. normal with ``minimum``/``maximum``)
+    are sampled from the truncated distribution directly, which is equal in distribution
+    (but not in values) to the rejection sampling of ``stats_arrays``.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        A Pandas DataFrame containing the parameter data (see `stats.generate_stochastic_dataframe`).
+
+    iterations : int, slice or list
+        The number of iterations (``0`` to ``iterations - 1``), a slice (with a ``stop``), or a list of iteration positions.
+
+    seed : int
+        The global seed.
+
+    uids : list, optional
+        The UIDs of the rows to generate (default: all rows), in the order of the output.
+
+    dtype : np.dtype, optional
+        The data type of the samples.
+
+    rtol : float, optional
+        If provided, gamma, beta, Student's t and Beta-PERT rows are sampled by interpolation in cached
+        inverse cumulative distribution function tables with this error bound (eg. ``1e-8``),
+        which is faster than the exact (iterative) inverse functions if many rows share their shape parameters,
+        and slower if they do not (one table is built per shape, see `inverse_cdf.tabulated_ppf`). This only accelerates counter-based sampling relative to its exact inverse functions:
+        it is at best about as fast as the default sampling of `stats.generate_stochastic_dataframe` (``counter_based=False``).
+
+    Returns
+    -------
+    np.ndarray
+        The samples, of shape ``(#uids, #iterations)``.
+
+    Raises
+    ------
+    ValueError
+        If a UID is not part of the dataframe, or if an iteration selection is not valid.
+    """
+
+    if uids is not None:
+        positions = df.index.get_indexer(list(uids))
+        if (positions < 0).any():
+            raise ValueError(f"Unknown UIDs: {[uid for uid, position in zip(uids, positions) if position < 0]}")
+        df = df.iloc[positions]
+
+    df = stats._add_distribution_dict_column(df.copy())
+    parameters: np.ndarray = sarrays.UncertaintyBase.from_dicts(*df['parameter_value_distribution_dict'])
+
+    samples: np.ndarray = _generate_samples_counter_based(parameters, df.index, iterations, seed, np.dtype(dtype), rtol=rtol)
+
+    logging.info(f"Counter-based samples generated ({samples.shape[0]} UIDs, {samples.shape[1]} iterations).")
+
+    return samples
@@ -0,0 +1,434 @@
+# %%
+# data science
+import pandas as pd
+import numpy as np
+import stats_arrays as sarrays
+# system
+import json
+import time
+import struct
+import socket
+import asyncio
+import pathlib
+import multiprocessing
+from collections import deque
+# debugging
+import logging
+# local imports
+import ecopylot.stats as stats
+import ecopylot.counter_rng as counter_rng
+
+
+HEADER_LENGTH_FORMAT: str = '<I' # length of the JSON header of a message
+TASK_SIZE_BYTES: int = 64 * 2**20 # size of the samples of a task
+PROTOCOL_VERSION: int = 1
+
+
+async def _send_message(writer: asyncio.StreamWriter, header: dict, payload: bytes | memoryview = b'') -> None:
+    """
+    Sends a message: the length of the JSON header (``uint32``), the JSON header and a binary payload of ``header['nbytes']`` bytes.
+    """
+    data: bytes = json.dumps({**header, 'nbytes': len(payload)}).encode('utf-8')
+    writer.write(struct.pack(HEADER_LENGTH_FORMAT, len(data)) + data)
+    if len(payload):
+        writer.write(payload)
+    await writer.drain()
+
+
+async def _receive_message(reader: asyncio.StreamReader) -> tuple:
+    """
+    Receives a message sent with `_send_message` and returns the tuple ``(header, payload)``.
+    """
+    (length,) = struct.unpack(HEADER_LENGTH_FORMAT, await reader.readexactly(struct.calcsize(HEADER_LENGTH_FORMAT)))
+    header: dict = json.loads(await reader.readexactly(length))
+    payload: bytes = await reader.readexactly(header['nbytes']) if header['nbytes'] else b''
+    return header, payload
+
+
+def _task_grid(shape: tuple, rows_per_task: int | None, iterations_per_task: int | None, itemsize: int) -> list:
+    """
+    Splits a sample matrix of ``shape = (rows, iterations)`` into tiles ``(row start, row stop, iteration start, iteration stop)``.
+
+    By default, tasks contain all rows and as many iterations as fit in ``TASK_SIZE_BYTES``.
+    """
+    rows, iterations = shape
+    rows_per_task = max(1, rows_per_task or rows)
+    iterations_per_task = max(1, iterations_per_task or TASK_SIZE_BYTES // max(1, rows_per_task * itemsize))
+    return [
+        (row_start, min(row_start + rows_per_task, rows), iteration_start, min(iteration_start + iterations_per_task, iterations))
+        for row_start in range(0, rows, rows_per_task)
+        for iteration_start in range(0, iterations, iterations_per_task)
+    ]
+
+
+class ShardedSamplingJob:
+    """
+    Hands the tasks (tiles of the sample matrix) of a sampling job to connected workers and gathers their samples
+    into a memory-mapped output.
+
+    Every worker connection runs the same exchange:
+
+    1. worker: ``{"type": "hello"}``
+    2. coordinator: ``{"type": "job", ...}`` with the parameter array of the job as payload
+    3. coordinator: ``{"type": "task", "task": 0, "rows": [0, 1000], "iterations": [0, 5000]}``
+    4. worker: ``{"type": "result", "task": 0}`` with the samples of the tile as payload (or ``{"type": "error", ...}``)
+    5. steps 3 and 4 are repeated until all tasks are done, then coordinator: ``{"type": "done"}``
+
+    A worker has at most one task at a time. If a worker disconnects, its task is handed to another worker;
+    idle workers wait until all tasks are done, in case a task must be handed out again.
+    A task failing on a worker fails the whole job (the samples of a task are deterministic, so it would fail on any worker).
+
+    Parameters
+    ----------
+    parameters : np.ndarray
+        A ``stats_arrays`` parameter array.
+
+    uids : pd.Index
+        The UIDs of the parameters (one per row of ``parameters``).
+
+    samples : np.ndarray
+        The (memory-mapped) output array, of shape ``(len(parameters), iterations)``.
+
+    seed : int
+        The global seed.
+
+    tasks : list
+        The tiles of the sample matrix (see `_task_grid`).
+
+    rtol : float, optional
+        The error bound of tabulated inverse cumulative distribution functions (see `counter_rng.generate_samples`).
+    """
+
+    def __init__(
+            self,
+            parameters: np.ndarray,
+            uids: pd.Index,
+            samples: np.ndarray,
+            seed: int,
+            tasks: list,
+            rtol: float | None = None
+        ):
+        self.parameters: np.ndarray = parameters
+        self.uids: list = [str(uid) for uid in uids] # the random streams are keyed by the string of the UID
+        self.samples: np.ndarray = samples
+        self.seed: int = int(seed)
+        self.rtol: float | None = rtol
+        self.tasks: list = tasks
+        self.pending: deque = deque(range(len(tasks)))
+        self.number_done: int = 0
+        self.error: str | None = None
+        self.condition: asyncio.Condition = asyncio.Condition()
+        self.connections: set = set()
+        self.statistics: dict = {'workers': 0, 'disconnected': 0, 'reassigned': 0}
+
+    @property
+    def finished(self) -> bool:
+        return self.number_done == len(self.tasks) or self.error is not None
+
+    async def wait(self) -> None:
+        async with self.condition:
+            await self.condition.wait_for(lambda: self.finished)
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """
+        Serves one worker connection until all tasks are done.
+        """
+
+        task: int | None = None
+        self.connections.add(asyncio.current_task())
+        try:
+            header, _ = await _receive_message(reader)
+            if header.get('type') != 'hello' or header.get('version') != PROTOCOL_VERSION:
+                await _send_message(writer, {'type': 'error', 'error': f"Expected a hello message of protocol version {PROTOCOL_VERSION}."})
+                return
+            self.statistics['workers'] += 1
+            worker: str = header.get('worker', 'unknown')
+            logging.info(f"Worker {worker} connected.")
+
+            await _send_message(
+                writer,
+                {
+                    'type': 'job',
+                    'seed': self.seed,
+                    'dtype': self.samples.dtype.str,
+                    'rtol': self.rtol,
+                    'uids': self.uids,
+                    'parameters_dtype': self.parameters.dtype.descr,
+                },
+                memoryview(np.ascontiguousarray(self.parameters)).cast('B'),
+            )
+
+            while True:
+                async with self.condition:
+                    await self.condition.wait_for(lambda: self.pending or self.finished)
+                    if self.finished:
+                        break
+                    task = self.pending.popleft()
+
+                row_start, row_stop, iteration_start, iteration_stop = self.tasks[task]
+                await _send_message(writer, {'type': 'task', 'task': task, 'rows': [row_start, row_stop], 'iterations': [iteration_start, iteration_stop]})
+                header, payload = await _receive_message(reader)
+
+                async with self.condition:
+                    if header.get('type') == 'result' and header.get('task') == task:
+                        self.samples[row_start:row_stop, iteration_start:iteration_stop] = np.frombuffer(
+                            payload, dtype=self.samples.dtype
+                        ).reshape(row_stop - row_start, iteration_stop - iteration_start)
+                        self.number_done += 1
+                    else:
+                        self.error = f"Task {task} failed on worker {worker}: {header.get('error', header)}"
+                        logging.error(self.error)
+                    task = None
+                    self.condition.notify_all()
+
+            await _send_message(writer, {'type': 'done'})
+        except (ConnectionError, asyncio.IncompleteReadError):
+            self.statistics['disconnected'] += 1
+            logging.warning(f"Worker disconnected{'' if task is None else f' (task {task} is handed out again)'}.")
+        finally:
+            if task is not None:
+                async with self.condition:
+                    self.statistics['reassigned'] += 1
+                    self.pending.appendleft(task)
+                    self.condition.notify_all()
+            writer.close()
+            self.connections.discard(asyncio.current_task())
+
+
+async def _run_worker(host: str, port: int, connect_timeout: float) -> int:
+
+    time_start: float = time.monotonic()
+    while True:
+        try:
+            reader, writer = await asyncio.open_connection(host, port)
+            break
+        except OSError:
+            if time.monotonic() - time_start > connect_timeout:
+                raise
+            await asyncio.sleep(0.2)
+
+    number_tasks: int = 0
+    try:
+        await _send_message(writer, {'type': 'hello', 'version': PROTOCOL_VERSION, 'worker': f"{socket.gethostname()}:{multiprocessing.current_process().pid}"})
+        header, payload = await _receive_message(reader)
+        if header['type'] != 'job':
+            raise ValueError(f"Coordinator error: {header.get('error', header)}")
+
+        parameters: np.ndarray = np.frombuffer(payload, dtype=np.dtype([tuple(field) for field in header['parameters_dtype']]))
+        uids: pd.Index = pd.Index(header['uids'])
+        dtype: np.dtype = np.dtype(header['dtype'])
+
+        while True:
+            message, _ = await _receive_message(reader)
+            if message['type'] != 'task':
+                break
+            row_start, row_stop = message['rows']
+            try:
+                samples = counter_rng._generate_samples_counter_based(
+                    parameters[row_start:row_stop],
+                    uids[row_start:row_stop],
+                    slice(*message['iterations']),
+                    header['seed'],
+                    dtype,
+                    rtol = header['rtol'],
+                )
+            except Exception as error:
+                await _send_message(writer, {'type': 'error', 'task': message['task'], 'error': f"{type(error).__name__}: {error}"})
+                raise
+            await _send_message(writer, {'type': 'result', 'task': message['task']}, memoryview(samples).cast('B'))
+            number_tasks += 1
+    finally:
+        writer.close()
+
+    return number_tasks
+
+
+def run_worker(
+        host: str = '127.0.0.1',
+        port: int = 8766,
+        connect_timeout: float = 60.0
+    ) -> int:
+    """
+    Connects to a coordinator (see `generate_stochastic_dataframe_sharded`) and samples its tasks until the job is done.
+
+    Workers can be started before the coordinator: the connection is retried for ``connect_timeout`` seconds.
+
+    Example
+    -------
+    .. code-block:: bash
+
+        ecopylot work --host coordinator.example.org --port 8766
+
+    Parameters
+    ----------
+    host : str, optional
+        The host of the coordinator.
+
+    port : int, optional
+        The port of the coordinator.
+
+    connect_timeout : float, optional
+        The time to retry connecting to the coordinator, in seconds.
+
+    Returns
+    -------
+    int
+        The number of tasks sampled by the worker.
+    """
+    return asyncio.run(_run_worker(host, port, connect_timeout))
+
+
+async def _coordinate(
+        job_arguments: tuple,
+        host: str,
+        port: int,
+        local_workers: int,
+        timeout: float | None
+    ) -> dict:
+
+    job = ShardedSamplingJob(*job_arguments)
+    server = await asyncio.start_server(job.handle_connection, host=host, port=port)
+    port = server.sockets[0].getsockname()[1]
+    logging.info(f"Coordinator listening on {host}:{port} ({len(job.tasks)} tasks).")
+
+    context = multiprocessing.get_context('spawn')
+    processes: list = [
+        context.Process(target=run_worker, args=('127.0.0.1' if host in ('0.0.0.0', '') else host, port), daemon=True)
+        for _ in range(local_workers)
+    ]
+    for process in processes:
+        process.start()
+
+    try:
+        async with server:
+            await asyncio.wait_for(job.wait(), timeout)
+            # let the connections send their final message to the workers
+            await asyncio.wait(job.connections, timeout=10) if job.connections else None
+    finally:
+        for process in processes:
+            await asyncio.get_running_loop().run_in_executor(None, process.join, 10)
+            if process.is_alive():
+                process.terminate()
+
+    if job.error is not None:
+        raise ValueError(job.error)
+
+    return job.statistics
+
+
+def generate_stochastic_dataframe_sharded(
+        df: pd.DataFrame,
+        iterations: int,
+        seed: int,
+        output: str | pathlib.PurePath,
+        host: str = '127.0.0.1',
+        port: int = 8766,
+        local_workers: int = 0,
+        rows_per_task: int | None = None,
+        iterations_per_task: int | None = None,
+        dtype: np.dtype = np.float64,
+        rtol: float | None = None,
+        timeout: float | None = None
+    ) -> pd.DataFrame:
+    """
+    Adds a stochastic column to the dataframe, as `stats.generate_stochastic_dataframe`,
+    with the sampling spread over worker processes on one or several machines.
+
+    The function acts as the coordinator: the sample matrix is split into tasks
+    (tiles of ``rows_per_task`` rows and ``iterations_per_task`` iterations), which are handed to the workers
+    connecting to ``host:port`` (see `ShardedSamplingJob` for the protocol and `run_worker` for the workers).
+    The samples returned by the workers are written into a memory-mapped ``.npy`` file ``output``
+    (see `numpy.lib.format.open_memmap`), whose rows become the ``parameter_value_stochastic`` column.
+
+    Samples are generated with the counter-based random number generator (see `counter_rng.generate_samples`):
+    every sample is a pure function of ``(seed, UID, iteration)``, so the result does not depend on the number of workers,
+    the task shape or the order in which the tasks are done, and is identical to
+    ``stats.generate_stochastic_dataframe(df, iterations, seed, counter_based=True)``.
+
+    To test on a single machine, workers can be started as local processes with ``local_workers``.
+    For several machines, listen on a public interface (eg. ``host='0.0.0.0'``) and start workers
+    with ``ecopylot work --host <coordinator> --port <port>``. The protocol does not implement authentication
+    and should only be used on trusted networks.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        A Pandas DataFrame containing the parameter data.
+
+    iterations : int
+        The number of iterations to generate.
+
+    seed : int
+        The global seed.
+
+    output : str or pathlib.PurePath
+        The path of the ``.npy`` output file.
+
+    host : str, optional
+        The interface the coordinator listens on.
+
+    port : int, optional
+        The port the coordinator listens on (``0``: any free port, only useful with ``local_workers``).
+
+    local_workers : int, optional
+        The number of worker processes to start on this machine.
+
+    rows_per_task : int, optional
+        The number of rows per task (default: all rows).
+
+    iterations_per_task : int, optional
+        The number of iterations per task (default: as many as fit in ``TASK_SIZE_BYTES``).
+
+    dtype : np.dtype, optional
+        The data type of the samples.
+
+    rtol : float, optional
+        The error bound of tabulated inverse cumulative distribution functions (see `counter_rng.generate_samples`).
+
+    timeout : float, optional
+        The maximum time to wait for the job to be done, in seconds (default: no limit).
+
+    Returns
+    -------
+    pd.DataFrame
+        The dataframe with the ``parameter_value_distribution_dict`` and ``parameter_value_stochastic`` columns.
+        The job statistics (number of workers, disconnections and reassigned tasks) are stored in ``df.attrs['sharded_sampling']``.
+
+    Raises
+    ------
+    ValueError
+        If an uncertainty type or its parameters are not valid, or if a task fails on a worker.
+
+    TimeoutError
+        If the job is not done within ``timeout`` seconds.
+    """
+
+    df = stats._add_distribution_dict_column(df)
+    parameters: np.ndarray = sarrays.UncertaintyBase.from_dicts(*df['parameter_value_distribution_dict'])
+
+    # invalid parameters fail here, rather than on the first worker
+    uncertainty_types: np.ndarray = parameters['uncertainty_type']
+    for uncertainty_type in np.unique(uncertainty_types):
+        if uncertainty_type not in sarrays.uncertainty_choices.id_dict:
+            raise ValueError(f"Uncertainty type id {uncertainty_type} is not valid")
+        sarrays.uncertainty_choices[uncertainty_type].validate(parameters[uncertainty_types == uncertainty_type])
+
+    dtype = np.dtype(dtype)
+    samples: np.ndarray = np.lib.format.open_memmap(output, mode='w+', dtype=dtype, shape=(len(df), int(iterations)))
+    tasks: list = _task_grid(samples.shape, rows_per_task, iterations_per_task, dtype.itemsize)
+
+    statistics: dict = asyncio.run(_coordinate(
+        (parameters, df.index, samples, seed, tasks, rtol),
+        host,
+        port,
+        local_workers,
+        timeout,
+    ))
+    samples.flush()
+
+    logging.info(f"Sharded sampling done ({len(tasks)} tasks, {statistics}).")
+
+    df['parameter_value_stochastic'] = list(samples)
+    df.attrs['sharded_sampling'] = statistics | {'tasks': len(tasks), 'output': str(output)}
+
+    return df
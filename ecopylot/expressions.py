@@ -0,0 +1,309 @@
+# %%
+# data science
+import pandas as pd
+import numpy as np
+# system
+import ast
+import re
+from graphlib import TopologicalSorter, CycleError
+# debugging
+import logging
+# local imports
+import ecopylot.stats as stats
+
+
+FUNCTIONS: dict = {
+    'exp': np.exp,
+    'log': np.log,
+    'sqrt': np.sqrt,
+    'abs': np.abs,
+    'minimum': np.minimum,
+    'maximum': np.maximum,
+}
+
+OPERATORS: dict = {
+    ast.Add: np.add,
+    ast.Sub: np.subtract,
+    ast.Mult: np.multiply,
+    ast.Div: np.divide,
+    ast.Pow: np.power,
+}
+
+COMMUTATIVE_OPERATORS: tuple = (ast.Add, ast.Mult)
+
+
+def _parse_formula(formula: str) -> tuple:
+    """
+    Parses a formula into a Python expression tree and returns the tree and the set of referenced parameters.
+
+    Parameters are referenced by their ``parameter`` name. Names which are not valid Python identifiers
+    (eg. containing spaces) are quoted with backticks, eg.:
+
+    .. code-block:: python
+
+        "`curb mass` * `energy consumption` / efficiency"
+
+    Only arithmetic operators (``+ - * / **``), numbers and the functions in ``FUNCTIONS`` are allowed.
+
+    Returns
+    -------
+    tuple
+        A tuple ``(tree, names)`` of the expression tree (with ``ast.Name`` nodes holding the parameter names) and the set of names.
+
+    Raises
+    ------
+    ValueError
+        If the formula is not a valid expression or contains unsupported syntax.
+    """
+
+    quoted: dict = {}
+
+    def quote(match: re.Match) -> str:
+        placeholder = f"__quoted_{len(quoted)}__"
+        quoted[placeholder] = match.group(1)
+        return placeholder
+
+    try:
+        tree = ast.parse(re.sub(r"`([^`]+)`", quote, formula).strip(), mode='eval').body
+    except SyntaxError as error:
+        raise ValueError(f"Invalid formula '{formula}': {error.msg}") from None
+
+    names: set = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name):
+            if node.id in FUNCTIONS:
+                continue
+            node.id = quoted.get(node.id, node.id)
+            names.add(node.id)
+        elif isinstance(node, ast.Call):
+            if not isinstance(node.func, ast.Name) or node.func.id not in FUNCTIONS or node.keywords:
+                raise ValueError(f"Unsupported function call in formula '{formula}' (supported: {list(FUNCTIONS)}).")
+        elif isinstance(node, ast.BinOp):
+            if type(node.op) not in OPERATORS:
+                raise ValueError(f"Unsupported operator {type(node.op).__name__} in formula '{formula}'.")
+        elif isinstance(node, ast.UnaryOp):
+            if not isinstance(node.op, (ast.USub, ast.UAdd)):
+                raise ValueError(f"Unsupported operator {type(node.op).__name__} in formula '{formula}'.")
+        elif isinstance(node, ast.Constant):
+            if not isinstance(node.value, (int, float)) or isinstance(node.value, bool):
+                raise ValueError(f"Unsupported constant {node.value!r} in formula '{formula}'.")
+        elif not isinstance(node, (ast.operator, ast.unaryop, ast.Load)):
+            raise ValueError(f"Unsupported syntax {type(node).__name__} in formula '{formula}'.")
+
+    return tree, names
+
+
+def _canonical_key(node: ast.AST) -> str:
+    """
+    Returns a canonical string representation of an expression tree, used to identify common subexpressions.
+
+    Operands of commutative operators are sorted, so that eg. ``a * b`` and ``b * a`` have the same key.
+    """
+
+    if isinstance(node, ast.Name):
+        return f"name({node.id!r})"
+    if isinstance(node, ast.Constant):
+        return f"const({float(node.value)!r})"
+    if isinstance(node, ast.UnaryOp):
+        return f"{type(node.op).__name__}({_canonical_key(node.operand)})"
+    if isinstance(node, ast.Call):
+        return f"{node.func.id}({', '.join(_canonical_key(arg) for arg in node.args)})"
+    operands: list = [_canonical_key(node.left), _canonical_key(node.right)]
+    if isinstance(node.op, COMMUTATIVE_OPERATORS):
+        operands.sort()
+    return f"{type(node.op).__name__}({', '.join(operands)})"
+
+
+def _expand_key_combinations(df: pd.DataFrame, keys: list) -> pd.DataFrame:
+    """
+    Expands rows whose key columns hold lists or missing values into one row per key combination.
+
+    A list-valued key (eg. ``["Small", "Medium"]``) applies to each of its elements,
+    a missing key applies to all values of that key found in the dataframe.
+    A key without any value in the dataframe (eg. the ``year`` of year-independent parameters) stays missing,
+    ie. all rows share a single wildcard value of the key.
+    The returned dataframe has one row per (original row, key combination), with the original row position in column ``row``
+    and the number of keys filled from missing values in column ``wildcards``.
+    """
+
+    df_keys = df[keys].copy()
+    df_keys['row'] = np.arange(len(df))
+    df_keys['wildcards'] = 0
+
+    for key in keys:
+        df_keys = df_keys.explode(key)
+        values = pd.unique(df_keys[key].dropna())
+        mask_missing = df_keys[key].isna().to_numpy()
+        if mask_missing.any() and len(values):
+            df_keys[key] = df_keys[key].astype(object)
+            df_keys.loc[mask_missing, 'wildcards'] += 1
+            df_keys.loc[mask_missing, key] = pd.Series([list(values)] * mask_missing.sum(), index=df_keys.index[mask_missing], dtype=object)
+            df_keys = df_keys.explode(key)
+
+    return df_keys.reset_index(drop=True)
+
+
+def evaluate_expressions(
+        df: pd.DataFrame,
+        formulas: dict,
+        keys: list,
+        parameter_col: str = 'parameter'
+    ) -> pd.DataFrame:
+    """
+    Evaluates derived parameters, defined by formulas over parameters, across all iterations and key combinations at once.
+
+    The function takes a stochastic dataframe (as returned by `stats.generate_stochastic_dataframe`) of the form:
+
+    +-------------+------------+------+------------+----------------------------+
+    | UID (index) | parameter  | year | powertrain | parameter_value_stochastic |
+    +=============+============+======+============+============================+
+    | 1           | mass       | 2020 | BEV        | [1510, 1490, 1502]         |
+    +-------------+------------+------+------------+----------------------------+
+    | 2           | mass       | 2020 | ICEV       | [1205, 1190, 1213]         |
+    +-------------+------------+------+------------+----------------------------+
+    | 3           | efficiency | NaN  | BEV        | [0.91, 0.89, 0.9]          |
+    +-------------+------------+------+------------+----------------------------+
+
+    and a dictionary of formulas, eg. ``{'specific mass': 'mass / efficiency'}`` with ``keys=['year', 'powertrain']``,
+    and returns a dataframe of derived parameters of the form:
+
+    +-----------------------------+---------------+------+------------+----------------------------+
+    | UID (index)                 | parameter     | year | powertrain | parameter_value_stochastic |
+    +=============================+===============+======+============+============================+
+    | specific mass|2020|BEV      | specific mass | 2020 | BEV        | [1659.3, 1674.2, 1668.9]   |
+    +-----------------------------+---------------+------+------------+----------------------------+
+
+    Each parameter is identified by its ``parameter`` name and the values of the ``keys`` columns.
+    A formula is evaluated for every combination of keys for which all referenced parameters exist.
+    List-valued keys apply to each of their elements and missing keys apply to all values of the key
+    (eg. a year-independent ``efficiency``), unless the parameter is also defined for the specific value of the key.
+
+    Formulas may reference other formulas. A dependency graph of the formulas is built
+    and formulas are evaluated in topological order. Each formula is evaluated once,
+    as a NumPy operation on arrays of shape ``(key combinations, iterations)``,
+    and common subexpressions (eg. ``mass / efficiency`` in several formulas, up to the order of operands of ``+`` and ``*``)
+    are computed only once.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        A stochastic dataframe.
+
+    formulas : dict
+        A dictionary mapping the names of derived parameters to formulas (see `_parse_formula`).
+
+    keys : list
+        The metadata columns identifying a parameter, in addition to ``parameter_col``.
+
+    parameter_col : str, optional
+        The column containing the parameter names.
+
+    Returns
+    -------
+    pd.DataFrame
+        A stochastic dataframe of the derived parameters,
+        which can be concatenated to the input dataframe.
+
+    Raises
+    ------
+    ValueError
+        If a formula is invalid, references an unknown parameter, the formulas contain a cycle,
+        a formula name is already a parameter name, or a parameter is defined more than once for a key combination.
+    """
+
+    parameter_names: set = set(df[parameter_col].unique())
+
+    trees: dict = {}
+    dependencies: dict = {}
+    for name, formula in formulas.items():
+        if name in parameter_names:
+            raise ValueError(f"Formula name '{name}' is already a parameter name.")
+        trees[name], names = _parse_formula(formula)
+        unknown = names - parameter_names - set(formulas)
+        if unknown:
+            raise ValueError(f"Formula '{name}' references unknown parameters: {sorted(unknown)}")
+        dependencies[name] = names & set(formulas)
+
+    try:
+        order: list = list(TopologicalSorter(dependencies).static_order())
+    except CycleError as error:
+        raise ValueError(f"Formulas contain a cycle: {error.args[1]}") from None
+
+    # align all referenced parameters on a common set of key combinations
+
+    referenced: set = set().union(*(
+        {node.id for node in ast.walk(tree) if isinstance(node, ast.Name) and node.id not in FUNCTIONS}
+        for tree in trees.values()
+    )) - set(formulas)
+    mask_referenced = df[parameter_col].isin(referenced).to_numpy()
+    rows_referenced = np.flatnonzero(mask_referenced)
+
+    df_expanded = _expand_key_combinations(df.iloc[rows_referenced], keys)
+    df_expanded['row'] = rows_referenced[df_expanded['row'].to_numpy()]
+    df_expanded[parameter_col] = df[parameter_col].to_numpy()[df_expanded['row'].to_numpy()]
+
+    # a parameter defined for a specific key takes precedence over the same parameter defined for a missing (= any) key
+    df_expanded = df_expanded.sort_values('wildcards', kind='stable')
+    duplicated = df_expanded.duplicated([parameter_col] + keys + ['wildcards'])
+    if duplicated.any():
+        raise ValueError(f"Parameters defined more than once for a key combination: {sorted(df_expanded.loc[duplicated, parameter_col].unique())}")
+    df_expanded = df_expanded[~df_expanded.duplicated([parameter_col] + keys)]
+
+    # keys without any value remain missing (see `_expand_key_combinations`) and form a group of their own
+    codes = df_expanded.groupby(keys, sort=True, dropna=False).ngroup().to_numpy()
+    df_combinations = df_expanded.groupby(keys, sort=True, dropna=False)[keys].first().reset_index(drop=True)
+
+    samples: np.ndarray = stats.get_sample_matrix(df)
+    number_combinations: int = len(df_combinations)
+
+    def load_parameter(name: str) -> np.ndarray:
+        mask = (df_expanded[parameter_col] == name).to_numpy()
+        values = np.full((number_combinations, samples.shape[1]), np.nan)
+        values[codes[mask]] = samples[df_expanded['row'].to_numpy()[mask]]
+        return values
+
+    # evaluate formulas in topological order, with common subexpressions cached
+
+    cache: dict = {}
+    cache_hits: list = [0]
+
+    def evaluate(node: ast.AST) -> np.ndarray | float:
+        if isinstance(node, ast.Constant):
+            return float(node.value)
+        key = _canonical_key(node)
+        if key in cache:
+            cache_hits[0] += 1
+            return cache[key]
+        if isinstance(node, ast.Name):
+            result = load_parameter(node.id)
+        elif isinstance(node, ast.UnaryOp):
+            result = np.negative(evaluate(node.operand)) if isinstance(node.op, ast.USub) else evaluate(node.operand)
+        elif isinstance(node, ast.Call):
+            result = FUNCTIONS[node.func.id](*(evaluate(arg) for arg in node.args))
+        else:
+            result = OPERATORS[type(node.op)](evaluate(node.left), evaluate(node.right))
+        cache[key] = result
+        return result
+
+    list_results: list = []
+    with np.errstate(invalid='ignore', divide='ignore'):
+        for name in order:
+            if name not in formulas:
+                continue
+            values = np.broadcast_to(evaluate(trees[name]), (number_combinations, samples.shape[1]))
+            cache[f"name({name!r})"] = values
+            mask_valid = ~np.isnan(values).all(axis=1)
+            df_result = df_combinations[mask_valid].copy()
+            df_result.insert(0, parameter_col, name)
+            df_result['parameter_value_stochastic'] = list(np.ascontiguousarray(values[mask_valid]))
+            list_results.append(df_result)
+
+    logging.info(f"{len(formulas)} formulas evaluated over {number_combinations} key combinations ({cache_hits[0]} common subexpressions reused).")
+
+    df_derived = pd.concat(list_results, ignore_index=True)
+    df_derived.index = pd.Index(
+        ['|'.join(map(str, values)) for values in df_derived[[parameter_col] + keys].itertuples(index=False)],
+        name = df.index.name,
+    )
+
+    return df_derived
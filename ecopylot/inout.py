@@ -1,12 +1,21 @@
 # %%
 # data science
 import pandas as pd
+import numpy as np
 # system
 import sys
 import json
 import pathlib
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 # debugging
 import logging
+# local imports
+import ecopylot.utils as utils
+
+
+JSON_SUFFIXES: tuple = ('.json',)
+EXCEL_SUFFIXES: tuple = ('.xlsx', '.xls')
+EXCEL_NA_VALUES: list = ['None', 'none', 'N/A', 'n/a', 'NA', 'na', 'NaN', 'nan', '', ' ']
 
 
 def _load_json(json_input: str | pathlib.PurePath) -> dict:
@@ -54,6 +63,130 @@ def _load_json(json_input: str | pathlib.PurePath) -> dict:
     return json_data
 
 
+def _matches(value, condition) -> bool:
+    """
+    Returns whether a cell value matches a filter condition.
+
+    A condition is either a callable (``condition(value) -> bool``),
+    a list (or tuple, set) of accepted values, or a single accepted value.
+    List-valued cells (eg. string enumerations) match if any of their items is accepted.
+    Missing values are passed as ``None``.
+    """
+
+    if callable(condition):
+        return bool(condition(value))
+    accepted = condition if isinstance(condition, (list, tuple, set, frozenset, pd.Index, np.ndarray)) else [condition]
+    if isinstance(value, (list, tuple)):
+        return any(item in accepted for item in value)
+    return value in accepted
+
+
+def _cell_matcher(condition, list_string: bool = False):
+    """
+    Returns a function testing whether a cell matches a filter condition (see `_matches`).
+
+    The condition is evaluated once per distinct cell value: metadata columns contain few unique values,
+    so the cost per row is a dictionary lookup.
+
+    Parameters
+    ----------
+    condition : callable, list or scalar
+        The filter condition.
+
+    list_string : bool, optional
+        If ``True``, string cells are string enumerations, which are split at commas before matching
+        (as in `_columns_string_to_list`).
+
+    Returns
+    -------
+    callable
+        A function ``matches(cell) -> bool``.
+    """
+
+    cache: dict = {}
+
+    def matches(cell) -> bool:
+        key = tuple(cell) if isinstance(cell, list) else cell
+        if key not in cache:
+            if list_string and isinstance(cell, str):
+                value = [item.strip() for item in cell.split(',')]
+            elif not isinstance(cell, (list, tuple)) and pd.isna(cell):
+                value = None
+            else:
+                value = cell
+            cache[key] = _matches(value, condition)
+        return cache[key]
+
+    return matches
+
+
+def _filter_conditions(
+        parameters: list | None = None,
+        years: list | None = None,
+        filters: dict | None = None
+    ) -> list:
+    """
+    Combines the ``parameters``, ``years`` and ``filters`` arguments of the loaders into a list of ``(column, condition)`` pairs.
+    """
+
+    conditions: list = list((filters or {}).items())
+    if parameters is not None:
+        conditions.append(('parameter', list(parameters)))
+    if years is not None:
+        conditions.append(('year', list(years)))
+
+    return conditions
+
+
+def _filter_json_records(
+        json_data: dict,
+        columns: list | None,
+        conditions: list
+    ) -> dict:
+    """
+    Filters and projects the records of decoded JSON data, before they are converted to a DataFrame.
+
+    Records are the values of the top-level object (one per UID). Records not matching all ``conditions`` are removed,
+    the other records are reduced to ``columns``. Non-matching records are therefore never
+    converted to DataFrame rows, and unselected fields never become columns.
+    Fields holding objects (eg. ``{"meta": {...}}``) are fields like any other, and values of the top-level object
+    which are not objects are kept unchanged.
+
+    Parameters
+    ----------
+    json_data : dict
+        A dictionary representation of the JSON data, as returned by `_load_json`.
+
+    columns : list or None
+        The fields to keep (``None``: all fields).
+
+    conditions : list
+        A list of ``(field, condition)`` pairs (see `_filter_conditions`).
+
+    Returns
+    -------
+    dict
+        The selected records, by UID.
+    """
+
+    if not isinstance(json_data, dict):
+        return json_data
+
+    set_columns: set | None = None if columns is None else set(columns)
+    list_matchers: list = [(col, _cell_matcher(condition)) for col, condition in conditions]
+
+    json_filtered: dict = {}
+    for uid, record in json_data.items():
+        if isinstance(record, dict):
+            if not all(matches(record.get(col)) for col, matches in list_matchers):
+                continue
+            if set_columns is not None:
+                record = {key: value for key, value in record.items() if key in set_columns}
+        json_filtered[uid] = record
+
+    return json_filtered
+
+
 def _parse_json(json_data: dict) -> pd.DataFrame:
     """
     Parses JSON data into a Pandas DataFrame.
@@ -121,7 +254,13 @@ def _parse_json(json_data: dict) -> pd.DataFrame:
     return df
 
 
-def load_data_from_json(json_input: str | pathlib.PurePath) -> pd.DataFrame:
+def load_data_from_json(
+        json_input: str | pathlib.PurePath,
+        columns: list | None = None,
+        parameters: list | None = None,
+        years: list | None = None,
+        filters: dict | None = None
+    ) -> pd.DataFrame:
     """
     Loads data from a JSON file or string into a DataFrame.
 
@@ -164,11 +303,40 @@ def load_data_from_json(json_input: str | pathlib.PurePath) -> pd.DataFrame:
     | 456          | bar       | 6     | 6   | None | None | 1           | "beta"            | ["gamma", "delta"]  | ... |
     +--------------+-----------+-------+-----+------+------+-------------+-------------------+---------------------+-----+
 
+    A subset of the data can be selected with ``columns``, ``parameters``, ``years`` and ``filters``, eg.:
+
+    .. code-block:: python
+
+        df = load_data_from_json(
+            pathlib.Path('parameters.json'),
+            columns = ['parameter', 'loc', 'minimum', 'maximum', 'uncertainty'],
+            parameters = ['foo'],
+            filters = {'metadata1': ['alpha'], 'value': lambda value: value is not None and value > 10},
+        )
+
+    The selection is applied to the decoded JSON data (see `_filter_json_records`):
+    non-matching records and unselected fields are dropped before the DataFrame is built,
+    so that the cost of building the DataFrame scales with the selected subset.
+
     Parameters
     ----------
     json_input : str or pathlib.PurePath
         A JSON string or a path to a JSON file.
 
+    columns : list, optional
+        The fields to load (default: all fields). Fields used by filters need not be loaded.
+
+    parameters : list, optional
+        The parameters to load (values of the ``parameter`` field).
+
+    years : list, optional
+        The years to load (values of the ``year`` field).
+
+    filters : dict, optional
+        A dictionary ``{field: condition}`` of additional conditions, all of which must match.
+        A condition is a list of accepted values, a single accepted value or a callable ``condition(value) -> bool``.
+        List-valued fields match if any of their items is accepted. Missing values are passed to callables as ``None``.
+
     Returns
     -------
     pandas.DataFrame
@@ -181,13 +349,16 @@ def load_data_from_json(json_input: str | pathlib.PurePath) -> pd.DataFrame:
     for more details.
     """
 
+    conditions: list = _filter_conditions(parameters, years, filters)
     json_data = _load_json(json_input)
+    if columns is not None or conditions:
+        json_data = _filter_json_records(json_data, columns, conditions)
     df = _parse_json(json_data)
 
     return df
 
 
-def _load_excel(excel_input: pathlib.PurePath) -> pd.DataFrame:
+def _load_excel(excel_input: pathlib.PurePath, sheet_name: str | int = 0) -> pd.DataFrame:
     """
     Loads data from an Excel `xls` or `xlsx` file into a DataFrame.
 
@@ -195,6 +366,9 @@ def _load_excel(excel_input: pathlib.PurePath) -> pd.DataFrame:
     ----------
     excel_input : pathlib.PurePath
         The path to the Excel file.
+
+    sheet_name : str or int, optional
+        The name or position of the sheet. Defaults to the first sheet.
     
     Returns
     -------
@@ -214,9 +388,10 @@ def _load_excel(excel_input: pathlib.PurePath) -> pd.DataFrame:
 
     df = pd.read_excel(
         io = excel_input,
+        sheet_name = sheet_name,
         header = None,
         engine = 'openpyxl',
-        na_values = ['None', 'none', 'N/A', 'n/a', 'NA', 'na', 'NaN', 'nan', '', ' '],
+        na_values = EXCEL_NA_VALUES,
         keep_default_na = True,
         na_filter = True,
         decimal = '.',
@@ -317,6 +492,7 @@ def _stack_dataframe(df: pd.DataFrame) -> pd.DataFrame:
 
     See Also
     --------
+    `_reshape_dataframe_to_long` : Faster equivalent of ``_stack_dataframe(_set_dataframe_indices(df))``.
     `Stack Overflow question <https://stackoverflow.com/a/77945979>`__
     `Pandas User Guide - Reshaping <https://pandas.pydata.org/docs/user_guide/reshaping.html#stack-and-unstack>`__
 
@@ -363,6 +539,470 @@ def _stack_dataframe(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
+def _parse_excel_header(header_years: list, header_metrics: list) -> tuple:
+    """
+    Computes the year/metric layout of the value columns of an Excel sheet from its two header rows.
+
+    The function takes the two header rows of the value columns, eg.:
+
+    +------+------+------+------+------+------+
+    | 2001 | 2001 | 2001 | 2002 | 2002 | 2002 |
+    +------+------+------+------+------+------+
+    | loc  | low  | high | loc  | low  | high |
+    +------+------+------+------+------+------+
+
+    and returns the unique years and metrics (in order of first appearance)
+    as well as a ``layout`` array of shape ``(#years, #metrics)`` containing
+    the position of the column of each year/metric pair (or ``-1`` if the pair is not present).
+    If the columns form a regular grid (each year is a contiguous block of the same metrics, in the same order),
+    the layout is ``None`` and the values can be reshaped without any indexing.
+
+    Parameters
+    ----------
+    header_years : list
+        The first header row (years) of the value columns.
+
+    header_metrics : list
+        The second header row (uncertainty metrics) of the value columns.
+
+    Returns
+    -------
+    tuple
+        A tuple ``(years, metrics, layout)``.
+
+    Raises
+    ------
+    ValueError
+        If a year/metric pair is present more than once.
+    """
+
+    years = pd.Index(header_years).unique()
+    metrics = pd.Index(header_metrics).unique()
+
+    positions_year = years.get_indexer(header_years)
+    positions_metric = metrics.get_indexer(header_metrics)
+
+    layout = np.full((len(years), len(metrics)), -1, dtype=np.intp)
+    layout[positions_year, positions_metric] = np.arange(len(header_years))
+
+    if np.count_nonzero(layout >= 0) != len(header_years):
+        raise ValueError("Excel header contains duplicate year/uncertainty metric column pairs.")
+
+    if np.array_equal(layout.ravel(), np.arange(layout.size)):
+        layout = None
+
+    return years, metrics, layout
+
+
+def _long_form_from_blocks(
+        df_strings: pd.DataFrame,
+        values: np.ndarray,
+        years: pd.Index,
+        metrics: pd.Index,
+        layout: np.ndarray | None
+    ) -> pd.DataFrame:
+    """
+    Builds the long-form DataFrame from the string columns and the value matrix of a wide Excel sheet.
+
+    Every row of ``df_strings``/``values`` is expanded to one row per year.
+    Rows for which all metrics of a year are missing are removed.
+
+    Parameters
+    ----------
+    df_strings : pd.DataFrame
+        The string columns (eg. ``parameter``, ``unit``, ...), one row per sheet row.
+
+    values : np.ndarray
+        The value columns, of shape ``(#rows, #value columns)``.
+
+    years : pd.Index
+        The unique years, as returned by `_parse_excel_header`.
+
+    metrics : pd.Index
+        The unique uncertainty metrics, as returned by `_parse_excel_header`.
+
+    layout : np.ndarray or None
+        The layout of the value columns, as returned by `_parse_excel_header`.
+
+    Returns
+    -------
+    pd.DataFrame
+        The long-form DataFrame, with the string columns, a ``year`` column and one column per metric.
+    """
+
+    number_rows: int = values.shape[0]
+
+    if layout is None:
+        values_blocks = values.reshape(number_rows * len(years), len(metrics))
+    else:
+        values_padded = np.concatenate([values, np.full((number_rows, 1), np.nan, dtype=values.dtype)], axis=1)
+        values_blocks = values_padded[:, layout].reshape(number_rows * len(years), len(metrics)) # -1 selects the padding column
+
+    mask_keep = ~pd.isna(values_blocks).all(axis=1)
+    positions_row = np.repeat(np.arange(number_rows), len(years))[mask_keep]
+    positions_year = np.tile(np.arange(len(years)), number_rows)[mask_keep]
+
+    data: dict = {}
+    for pos, col in enumerate(df_strings.columns):
+        series_col = df_strings.iloc[:, pos]
+        if isinstance(series_col.dtype, pd.CategoricalDtype):
+            data[col] = series_col.array.take(positions_row)
+        else:
+            data[col] = pd.Index(series_col.to_numpy()).take(positions_row)
+    data['year'] = years.take(positions_year)
+    values_blocks = values_blocks[mask_keep]
+    for pos, metric in enumerate(metrics):
+        data[metric] = values_blocks[:, pos]
+
+    df = pd.DataFrame(data)
+    df = df.set_axis(pd.Index(list(data), dtype=object), axis=1) # same column dtype as `_stack_dataframe`
+
+    return df
+
+
+def _select_sheet_subset(
+        df: pd.DataFrame,
+        columns: list | None = None,
+        years: list | None = None,
+        conditions: list = [],
+        list_string_cols: list = []
+    ) -> pd.DataFrame:
+    """
+    Selects string columns, year column blocks and rows of a wide Excel sheet, before it is reshaped to long-form.
+
+    The function takes a sheet as returned by `_load_excel` (including the two header rows)
+    and returns the sheet reduced to:
+
+    - the string columns in ``columns`` (all string columns if ``None``),
+    - the value columns of the years in ``years`` (all years if ``None``),
+    - the rows matching all ``conditions`` (evaluated on the string columns, before any column is dropped).
+
+    `_reshape_dataframe_to_long` then only expands the selected rows and year blocks.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        The sheet, including the two header rows.
+
+    columns : list, optional
+        The string columns to keep.
+
+    years : list, optional
+        The years to keep.
+
+    conditions : list, optional
+        A list of ``(column, condition)`` pairs (see `_filter_conditions` and `_matches`).
+
+    list_string_cols : list, optional
+        The columns containing string enumerations, which are split at commas before matching.
+
+    Returns
+    -------
+    pd.DataFrame
+        The reduced sheet, including the two header rows.
+    """
+
+    header_1: pd.Series = df.iloc[0]
+    mask_string: np.ndarray = np.array([isinstance(colname, str) for colname in header_1], dtype=bool)
+
+    mask_rows: np.ndarray = np.ones(len(df), dtype=bool)
+    for col, condition in conditions:
+        positions = np.flatnonzero(mask_string & (header_1 == col).to_numpy())
+        if len(positions) == 0:
+            raise ValueError(f"Filter column '{col}' is not a column of the Excel sheet.")
+        matches = _cell_matcher(condition, list_string = col in list_string_cols)
+        mask_rows[2:] &= np.fromiter((matches(cell) for cell in df.iloc[2:, positions[0]]), dtype=bool, count=len(df) - 2)
+
+    mask_columns: np.ndarray = np.ones(df.shape[1], dtype=bool)
+    if columns is not None:
+        mask_columns[mask_string] = header_1[mask_string].isin(columns).to_numpy()
+    if years is not None:
+        mask_columns[~mask_string] = pd.Index(header_1[~mask_string]).isin(years)
+
+    return df.iloc[mask_rows, mask_columns]
+
+
+def _reshape_dataframe_to_long(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Reshapes a wide Excel sheet to long-form, without using the ``stack`` function.
+
+    The function takes a table of the form (as returned by `_load_excel`):
+
+    |       | 0         | 1    | 2    | 3    | 4    | ... |
+    |-------|-----------|------|------|------|------|-----|
+    | 0     | parameter | 2001 | 2001 | 2002 | 2002 | ... |
+    | 1     |           | low  | high | low  | high | ... |
+    | 2     | foo       | 1    | 2    | 7    | 8    | ... |
+    | 3     | bar       | NaN  | NaN  | 12   | 13   | ... |
+
+    and transforms it into a table of the form:
+
+    |       | parameter | year | low | high | ... |
+    |-------|-----------|------|-----|------|-----|
+    | 0     | foo       | 2001 | 1   | 2    | ... |
+    | 1     | foo       | 2002 | 7   | 8    | ... |
+    | 2     | bar       | 2002 | 12  | 13   | ... |
+
+    The output is identical to ``_stack_dataframe(_set_dataframe_indices(df))``.
+    Instead of building a column MultiIndex and stacking it, the year/metric layout is computed once
+    from the header rows (see `_parse_excel_header`). The value columns are then reshaped to
+    an array of shape ``(#rows * #years, #metrics)`` using NumPy, and all-NaN year blocks
+    are removed with a single boolean mask (see `_long_form_from_blocks`).
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        The DataFrame containing the data, including the two header rows.
+
+    Returns
+    -------
+    pd.DataFrame
+        The long-form DataFrame.
+    """
+
+    list_header_1: list = list(df.iloc[0])
+
+    list_string_column_positions: list = [pos for pos, colname in enumerate(list_header_1) if isinstance(colname, str)]
+    list_string_column_names: list = [colname for pos, colname in enumerate(list_header_1) if isinstance(colname, str)]
+    list_value_column_positions: list = [pos for pos, colname in enumerate(list_header_1) if not isinstance(colname, str)]
+
+    years, metrics, layout = _parse_excel_header(
+        header_years = list(df.iloc[0, list_value_column_positions]),
+        header_metrics = list(df.iloc[1, list_value_column_positions]),
+    )
+
+    df_strings = df.iloc[2:, list_string_column_positions].set_axis(list_string_column_names, axis=1)
+    values = df.iloc[2:, list_value_column_positions].to_numpy()
+
+    df = _long_form_from_blocks(df_strings, values, years, metrics, layout)
+
+    logging.info(f"DataFrame reshaped to long-form (#years: {len(years)}, #metrics: {len(metrics)}).")
+
+    return df
+
+
+def _read_excel_streaming(
+        excel_input: pathlib.PurePath,
+        sheet_name: str | int = 0,
+        columns: list | None = None,
+        years: list | None = None,
+        conditions: list = [],
+        list_string_cols: list = []
+    ) -> pd.DataFrame:
+    """
+    Reads a wide Excel ``xlsx`` sheet row by row and reshapes it to long-form.
+
+    In contrast to `_load_excel`, which loads the whole sheet into an ``object`` DataFrame
+    (every cell is a Python object), the function iterates over the rows of the sheet
+    in `openpyxl read-only mode <https://openpyxl.readthedocs.io/en/stable/optimized.html>`_.
+    The two header rows are parsed into a year/metric layout up front (see `_parse_excel_header`).
+    Numeric year/metric cells are then written directly into a preallocated ``float64`` array
+    and string cells are dictionary-encoded into integer codes (categorical buffers).
+
+    The returned DataFrame has the same form as the output of `_reshape_dataframe_to_long`,
+    but the metric columns are of type ``float64`` and the string columns are categorical.
+
+    Selections are applied while reading (as in `_select_sheet_subset`): rows not matching the ``conditions``
+    are skipped before their values are read, and only the cells of the selected string columns and years are read.
+
+    Parameters
+    ----------
+    excel_input : pathlib.PurePath
+        The path to the Excel file.
+
+    sheet_name : str or int, optional
+        The name or position of the sheet. Defaults to the first sheet.
+
+    columns : list, optional
+        The string columns to keep (default: all string columns).
+
+    years : list, optional
+        The years to keep (default: all years).
+
+    conditions : list, optional
+        A list of ``(column, condition)`` pairs (see `_filter_conditions` and `_matches`).
+
+    list_string_cols : list, optional
+        The columns containing string enumerations, which are split at commas before matching.
+
+    Returns
+    -------
+    pd.DataFrame
+        The long-form DataFrame.
+
+    Raises
+    ------
+    ValueError
+        If a year/metric cell contains a string that is not a number or a missing value,
+        or if a filter column is not a column of the sheet.
+    """
+
+    # openpyxl is a dependency of the pandas Excel reader used by `_load_excel`
+    import openpyxl
+
+    workbook = openpyxl.load_workbook(excel_input, read_only=True, data_only=True)
+
+    try:
+        worksheet = workbook.worksheets[sheet_name] if isinstance(sheet_name, int) else workbook[sheet_name]
+        rows = worksheet.iter_rows(values_only=True)
+
+        header_1: tuple = next(rows)
+        header_2: tuple = next(rows)
+
+        list_string_column_positions: list = [
+            pos for pos, colname in enumerate(header_1)
+            if isinstance(colname, str) and (columns is None or colname in columns)
+        ]
+        list_string_column_names: list = [header_1[pos] for pos in list_string_column_positions]
+        list_value_column_positions: list = [
+            pos for pos, colname in enumerate(header_1)
+            if not isinstance(colname, str) and colname is not None
+        ]
+        if years is not None:
+            list_value_column_positions = [pos for pos, selected in zip(list_value_column_positions, pd.Index([header_1[pos] for pos in list_value_column_positions]).isin(years)) if selected]
+
+        list_condition_matchers: list = []
+        for col, condition in conditions:
+            if col not in header_1:
+                raise ValueError(f"Filter column '{col}' is not a column of the Excel sheet.")
+            list_condition_matchers.append((header_1.index(col), _cell_matcher(condition, list_string = col in list_string_cols)))
+
+        years, metrics, layout = _parse_excel_header(
+            header_years = [header_1[pos] for pos in list_value_column_positions],
+            header_metrics = [header_2[pos] if pos < len(header_2) else None for pos in list_value_column_positions],
+        )
+
+        # preallocate buffers, growing them if the sheet dimensions are unreliable
+
+        capacity: int = max((worksheet.max_row or 0) - 2, 16)
+        values: np.ndarray = np.full((capacity, len(list_value_column_positions)), np.nan)
+        codes: np.ndarray = np.full((capacity, len(list_string_column_positions)), -1, dtype=np.int32)
+        list_categories: list = [{} for _ in list_string_column_positions]
+
+        number_rows: int = 0
+        for row in rows:
+            if row is None or all(cell is None for cell in row):
+                continue
+            if not all(
+                matches(None if pos >= len(row) or row[pos] in EXCEL_NA_VALUES else row[pos])
+                for pos, matches in list_condition_matchers
+            ):
+                continue
+            if number_rows == capacity:
+                capacity *= 2
+                values = np.concatenate([values, np.full_like(values, np.nan)])
+                codes = np.concatenate([codes, np.full_like(codes, -1)])
+
+            for col, pos in enumerate(list_string_column_positions):
+                cell = row[pos] if pos < len(row) else None
+                if cell is None or cell in EXCEL_NA_VALUES:
+                    continue
+                codes[number_rows, col] = list_categories[col].setdefault(cell, len(list_categories[col]))
+
+            cells: list = [row[pos] if pos < len(row) else None for pos in list_value_column_positions]
+            try:
+                values[number_rows] = cells # None is converted to NaN
+            except (ValueError, TypeError):
+                for col, cell in enumerate(cells):
+                    if isinstance(cell, str) and cell in EXCEL_NA_VALUES:
+                        continue
+                    try:
+                        values[number_rows, col] = cell
+                    except (ValueError, TypeError):
+                        raise ValueError(f"Non-numeric value {cell!r} in row {number_rows + 3}, column {list_value_column_positions[col] + 1} of the Excel sheet.")
+            number_rows += 1
+    finally:
+        workbook.close()
+
+    df_strings = pd.DataFrame({
+        name: pd.Categorical.from_codes(codes[:number_rows, col], categories=list(list_categories[col]))
+        for col, name in enumerate(list_string_column_names)
+    })
+
+    df = _long_form_from_blocks(df_strings, values[:number_rows], years, metrics, layout)
+
+    logging.info(f"Excel data streamed to long-form (#rows: {number_rows}, #years: {len(years)}, #metrics: {len(metrics)}).")
+
+    return df
+
+
+def _encode_string_enumerations(series: pd.Series) -> tuple:
+    """
+    Encodes a column of string enumerations (or lists) into a compact offsets/values representation.
+
+    The function takes a column of the form:
+
+    +-------+---------------+
+    | index | col           |
+    +=======+===============+
+    | 0     | alpha, beta   |
+    +-------+---------------+
+    | 1     | NaN           |
+    +-------+---------------+
+    | 2     | ["gamma"]     |
+    +-------+---------------+
+    | 3     | alpha,beta    |
+    +-------+---------------+
+
+    and returns the arrays:
+
+    .. code-block:: python
+
+        offsets = [0, 2, 2, 3, 5]
+        codes = [0, 1, 2, 0, 1]
+        categories = Index(['alpha', 'beta', 'gamma'])
+        mask_valid = [True, False, True, True]
+
+    where the items of row ``i`` are ``categories[codes[offsets[i]:offsets[i+1]]]``.
+    Strings are split at commas and stripped of whitespace; list-like cells are used as-is;
+    missing cells are empty and marked as invalid; other scalars become single items.
+
+    Only the unique cells of the column are split (in Python).
+    The expansion to rows is done with NumPy, so the cost per row is constant.
+
+    Parameters
+    ----------
+    series : pd.Series
+        The column to encode.
+
+    Returns
+    -------
+    tuple
+        A tuple ``(offsets, codes, categories, mask_valid)``.
+    """
+
+    values: np.ndarray = series.to_numpy(dtype=object)
+    keys: np.ndarray = np.empty(len(values), dtype=object)
+    keys[:] = [
+        tuple(value) if isinstance(value, (list, tuple, np.ndarray)) else value
+        for value in values
+    ]
+
+    codes_cell, uniques_cell = pd.factorize(keys, use_na_sentinel=True)
+
+    dict_categories: dict = {}
+    list_codes_unique: list = []
+    for unique in uniques_cell:
+        if isinstance(unique, str):
+            items = [item.strip() for item in unique.split(',')]
+        elif isinstance(unique, tuple):
+            items = list(unique)
+        else:
+            items = [unique]
+        list_codes_unique.append([dict_categories.setdefault(item, len(dict_categories)) for item in items])
+
+    lengths_unique: np.ndarray = np.array([len(codes) for codes in list_codes_unique] + [0], dtype=np.int64) # last entry: missing cells
+    offsets_unique: np.ndarray = np.concatenate([[0], np.cumsum(lengths_unique[:-1])])
+    codes_unique: np.ndarray = np.array([code for codes in list_codes_unique for code in codes], dtype=np.int32)
+
+    lengths: np.ndarray = lengths_unique[codes_cell] # codes_cell == -1 selects the missing-cell entry
+    offsets: np.ndarray = np.concatenate([[0], np.cumsum(lengths)])
+    positions: np.ndarray = np.repeat(offsets_unique[np.maximum(codes_cell, 0)] - offsets[:-1], lengths) + np.arange(offsets[-1])
+    codes: np.ndarray = codes_unique[positions]
+
+    return offsets, codes, pd.Index(list(dict_categories), dtype=object), codes_cell >= 0
+
+
 def _columns_string_to_list(df: pd.DataFrame, list_string_cols: list) -> pd.DataFrame:
     """
     Converts the content of columns containing string enumerations to lists.
@@ -378,6 +1018,9 @@ def _columns_string_to_list(df: pd.DataFrame, list_string_cols: list) -> pd.Data
     If the column contains a single value, the function will convert it into a list with a single element.
     If the data type of the column is not a string, the function will leave it unchanged.
 
+    Each unique string is split only once (columns of string enumerations
+    typically contain few unique values); rows then receive a copy of the list of their unique string.
+
     Parameters
     ----------
     df : pd.DataFrame
@@ -390,19 +1033,34 @@ def _columns_string_to_list(df: pd.DataFrame, list_string_cols: list) -> pd.Data
     -------
     pd.DataFrame
         The DataFrame with the content of the columns containing string enumerations converted to lists.
+
+    See Also
+    --------
+    `_encode_string_enumerations` : Compact offsets/values representation of string enumerations.
     """
     for col in list_string_cols:
-        df[col] = df[col].apply(
-            lambda x:
-            [item.strip() for item in x.split(',')]
-            if isinstance(x, str) else x
-        )
+        values: np.ndarray = df[col].to_numpy(dtype=object)
+        mask_string: np.ndarray = np.fromiter((isinstance(value, str) for value in values), dtype=bool, count=len(values))
+        codes, uniques = pd.factorize(values[mask_string])
+        list_unique_lists: list = [[item.strip() for item in unique.split(',')] for unique in uniques]
+        values = values.copy()
+        values[mask_string] = np.fromiter((list(list_unique_lists[code]) for code in codes), dtype=object, count=len(codes))
+        df[col] = values
 
     logging.info(f"Columns {list_string_cols} converted to lists.")
 
     return df
 
 
+def _normalize_uncertainty_name(name: str) -> str:
+    """
+    Normalizes an uncertainty distribution name for a case- and whitespace-insensitive lookup.
+
+    Example: ``'  Discrete   Uniform '`` becomes ``'discrete uniform'``.
+    """
+    return ' '.join(name.split()).lower()
+
+
 def _uncertainty_distribution_string_to_code(
         df: pd.DataFrame,
         uncertainty_col: str,
@@ -417,18 +1075,21 @@ def _uncertainty_distribution_string_to_code(
     | uncertainty_col | ... |
     |-----------------|-----|
     | triangular      | ... |
-    | normal          | ... |
+    | Normal          | ... |
 
     into `stats_arrays` integer codes in a new column `uncertainty` of the form:
 
     | uncertainty_col | uncertainty | ... |
     |-----------------|-------------|-----|
     | triangular      | 5           | ... |
-    | normal          | 3           | ... |
+    | Normal          | 3           | ... |
 
     The dictionary `uncertainty_dict` is expected to contain
     the mapping between the string description of
-    the uncertainty distributions and the `stats_arrays` integer codes.
+    the uncertainty distributions and the `stats_arrays` integer codes
+    (eg. as returned by `utils.load_project_configuration`).
+    The lookup is case- and whitespace-insensitive and is done once per unique name (categorical lookup).
+    Cells that already contain a valid integer code are kept.
 
     Parameters
     ----------
@@ -446,15 +1107,46 @@ def _uncertainty_distribution_string_to_code(
     pd.DataFrame
         The DataFrame with the string description of the uncertainty distributions converted to `stats_arrays` integer codes.
 
+    Raises
+    ------
+    ValueError
+        If any row contains an unknown or missing uncertainty distribution name.
+        The error message lists all invalid rows.
+
     See Also
     --------
     ``stats_arrays` list of uncertainty distributions <https://stats-arrays.readthedocs.io/en/latest/#mapping-parameter-array-columns-to-uncertainty-distributions>`__
 
     """
-    try:
-        df['uncertainty'] = df[uncertainty_col].replace(uncertainty_dict).astype('int64')
-    except ValueError:
-        raise Exception("Conversion of uncertainty string desciption to integer code failed. Are your strings valid 'stats_arrays' uncertainty distribution names?")
+    dict_normalized: dict = {_normalize_uncertainty_name(key): value for key, value in uncertainty_dict.items()}
+    set_codes: set = set(uncertainty_dict.values())
+
+    codes, uniques = pd.factorize(df[uncertainty_col], use_na_sentinel=True)
+
+    codes_unique: np.ndarray = np.array(
+        [
+            dict_normalized.get(_normalize_uncertainty_name(unique), -1) if isinstance(unique, str)
+            else int(unique) if isinstance(unique, (int, float, np.number)) and unique in set_codes
+            else -1
+            for unique in uniques
+        ] + [-1], # last entry: missing cells
+        dtype = np.int64
+    )
+    codes_uncertainty: np.ndarray = codes_unique[codes]
+
+    mask_invalid: np.ndarray = codes_uncertainty < 0
+    if mask_invalid.any():
+        series_invalid = df.loc[mask_invalid, uncertainty_col].astype(object)
+        list_invalid: list = [
+            f"{series_value.iloc[0]!r} in rows {list(series_value.index)}"
+            for _, series_value in series_invalid.groupby(series_invalid.map(repr), sort=False)
+        ]
+        raise ValueError(
+            f"Conversion of uncertainty string description to integer code failed for {mask_invalid.sum()} rows "
+            f"(valid names: {list(uncertainty_dict)}):\n" + "\n".join(list_invalid)
+        )
+
+    df['uncertainty'] = codes_uncertainty
 
     logging.info(f"Column {uncertainty_col} converted to `stats_arrays` integer codes.")
 
@@ -465,13 +1157,19 @@ def load_data_from_excel(
         excel_input: pathlib.PurePath,
         uncertainty_col: str,
         uncertainty_dict: dict,
-        list_string_cols: list
+        list_string_cols: list,
+        streaming: bool = False,
+        sheet_name: str | int = 0,
+        columns: list | None = None,
+        parameters: list | None = None,
+        years: list | None = None,
+        filters: dict | None = None
     ) -> pd.DataFrame:
     """
     Loads data from an Excel ``xls`` or ``xlsx`` file into a DataFrame.
 
     The function converts an Excel file containing data into a
-    Pandas DataFrame, using the ``stack`` function to make it long-form.
+    Pandas DataFrame, reshaping it to long-form (see `_reshape_dataframe_to_long`).
     It additionally converts the content of some columns.
     
     The Excel sheet is expected to be of the form:
@@ -501,6 +1199,11 @@ def load_data_from_excel(
     +-------+-----------+------+---------------------+------------------+-----+-----+------+-----+
 
     Instead of ``loc``, ``low``, ``high``, other statistical measures can be provided for each year.
+
+    A subset of the data can be selected with ``columns``, ``parameters``, ``years`` and ``filters``.
+    The selection is applied to the wide sheet, before it is reshaped to long-form (see `_select_sheet_subset`);
+    with ``streaming=True``, non-matching rows and unselected cells are skipped while reading (see `_read_excel_streaming`).
+    The cost of the reshape and of the column conversions therefore scales with the selected subset.
     
     Parameters
     ----------
@@ -516,6 +1219,31 @@ def load_data_from_excel(
     list_string_cols : list
         The list of column names containing string enumerations.
 
+    streaming : bool, optional
+        If ``True``, the ``xlsx`` file is read row by row (see `_read_excel_streaming`),
+        which is faster and uses less memory for large workbooks.
+        The metric columns are then of type ``float64`` instead of ``object``
+        and the string columns are categorical.
+
+    sheet_name : str or int, optional
+        The name or position of the sheet. Defaults to the first sheet.
+
+    columns : list, optional
+        The string columns to load (default: all string columns).
+        The ``year`` and metric columns and ``uncertainty_col`` are always loaded. Columns used by filters need not be loaded.
+
+    parameters : list, optional
+        The parameters to load (values of the ``parameter`` column).
+
+    years : list, optional
+        The years to load.
+
+    filters : dict, optional
+        A dictionary ``{column: condition}`` of additional conditions on string columns, all of which must match.
+        A condition is a list of accepted values, a single accepted value or a callable ``condition(value) -> bool``.
+        Cells of ``list_string_cols`` are split into lists first and match if any of their items is accepted.
+        Missing values are passed to callables as ``None``.
+
     Returns
     -------
     pd.DataFrame
@@ -526,8 +1254,9 @@ def load_data_from_excel(
     TypeError
         If the input is not a ``pathlib.PurePath`` to an Excel file.
 
-    Exception
-        If the conversion of the string description of the uncertainty distributions to integer codes fails.
+    ValueError
+        If the conversion of the string description of the uncertainty distributions to integer codes fails,
+        or if a filter column is not a string column of the sheet.
 
     See Also
     --------
@@ -541,9 +1270,18 @@ def load_data_from_excel(
     else:
         raise TypeError("Input must be a pathlib.PurePath to a JSON file.")
 
-    df = _load_excel(excel_input)
-    df = _set_dataframe_indices(df)
-    df = _stack_dataframe(df)
+    conditions: list = _filter_conditions(parameters, None, filters)
+    if columns is not None:
+        columns = list(columns) + [uncertainty_col]
+        list_string_cols = [col for col in list_string_cols if col in columns]
+
+    if streaming:
+        df = _read_excel_streaming(excel_input, sheet_name, columns, years, conditions, list_string_cols)
+    else:
+        df = _load_excel(excel_input, sheet_name)
+        if columns is not None or years is not None or conditions:
+            df = _select_sheet_subset(df, columns, years, conditions, list_string_cols)
+        df = _reshape_dataframe_to_long(df)
     df = _uncertainty_distribution_string_to_code(
             df = df,
             uncertainty_col = uncertainty_col,
@@ -554,4 +1292,840 @@ def load_data_from_excel(
             list_string_cols = list_string_cols
     )
 
-    return df
\ No newline at end of file
+    return df
+
+
+DISTRIBUTION_COLUMNS: list = ['uncertainty_type', 'loc', 'scale', 'shape', 'minimum', 'maximum']
+DISTRIBUTION_COLUMNS_REQUIRED: dict = { # columns required by each `stats_arrays` uncertainty type
+    0: ['loc'],
+    1: ['loc'],
+    2: ['loc', 'scale'],
+    3: ['loc', 'scale'],
+    4: ['minimum', 'maximum'],
+    5: ['loc', 'minimum', 'maximum'],
+    6: ['loc'],
+    7: ['maximum'],
+    8: ['scale', 'shape'],
+    9: ['scale', 'shape'],
+    10: ['loc', 'shape'],
+    11: ['loc', 'scale'],
+    12: ['shape'],
+    13: ['loc', 'minimum', 'maximum'],
+}
+
+
+def normalize_distribution_columns(
+        df: pd.DataFrame,
+        columns_mapping: dict | None = None
+    ) -> pd.DataFrame:
+    """
+    Renames the distribution-related columns of a loaded parameter dataframe to the ``stats_arrays`` columns
+    (``uncertainty_type``, ``loc``, ``scale``, ``shape``, ``minimum``, ``maximum``) expected by `stats.generate_stochastic_dataframe`.
+
+    The function takes a dataframe of the form (eg. as returned by `load_data_from_excel`):
+
+    +-------+-----------+------+-------------+------+------+------+-----+
+    | index | parameter | year | uncertainty | base | low  | high | ... |
+    +=======+===========+======+=============+======+======+======+=====+
+    | 0     | foo       | 2001 | 5           | 1.5  | 1    | 2    | ... |
+    +-------+-----------+------+-------------+------+------+------+-----+
+
+    and returns a dataframe of the form:
+
+    +-------+-----------+------+------------------+-----+---------+---------+-----+
+    | index | parameter | year | uncertainty_type | loc | minimum | maximum | ... |
+    +=======+===========+======+==================+=====+=========+=========+=====+
+    | 0     | foo       | 2001 | 5                | 1.5 | 1       | 2       | ... |
+    +-------+-----------+------+------------------+-----+---------+---------+-----+
+
+    Columns already named after a ``stats_arrays`` column are kept. Other columns are renamed according to ``columns_mapping``
+    (case- and whitespace-insensitive, eg. ``{'base': 'loc', 'low': 'minimum', 'high': 'maximum'}``).
+    The distribution columns are converted to numbers (``int64`` for ``uncertainty_type``, ``float64`` otherwise).
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        The parameter data, as returned by `load_data_from_json` or `load_data_from_excel`.
+
+    columns_mapping : dict, optional
+        The mapping of source column names to ``stats_arrays`` column names.
+        Defaults to the ``distribution_columns_mapping`` of the project configuration (see `utils.load_project_configuration`).
+
+    Returns
+    -------
+    pd.DataFrame
+        The dataframe with ``stats_arrays`` distribution columns.
+
+    Raises
+    ------
+    ValueError
+        If the mapping renames two columns to the same ``stats_arrays`` column,
+        if a distribution column is not numeric,
+        or if the uncertainty type column or a column required by one of the uncertainty types of the dataframe is missing.
+
+    See Also
+    --------
+    `stats_arrays uncertainty types <https://stats-arrays.readthedocs.io/en/latest/#mapping-parameter-array-columns-to-uncertainty-distributions>`_.
+    """
+
+    if columns_mapping is None:
+        columns_mapping = utils.load_project_configuration('distribution_columns_mapping')
+    dict_normalized: dict = {_normalize_uncertainty_name(key): value for key, value in columns_mapping.items()}
+
+    dict_rename: dict = {}
+    for col in df.columns:
+        if col in DISTRIBUTION_COLUMNS or not isinstance(col, str):
+            continue
+        target = dict_normalized.get(_normalize_uncertainty_name(col))
+        if target is None:
+            continue
+        if target in df.columns or target in dict_rename.values():
+            sources: list = [target] * (target in df.columns) + [source for source, value in dict_rename.items() if value == target] + [col]
+            raise ValueError(f"Several columns would be mapped to the distribution column '{target}': {sources}.")
+        dict_rename[col] = target
+    df = df.rename(columns=dict_rename)
+
+    if 'uncertainty_type' not in df.columns:
+        raise ValueError(f"DataFrame does not contain an uncertainty type column (columns: {list(df.columns)}).")
+
+    for col in [col for col in DISTRIBUTION_COLUMNS if col in df.columns]:
+        try:
+            df[col] = pd.to_numeric(df[col]).astype(np.float64)
+        except (ValueError, TypeError) as exception:
+            raise ValueError(f"Distribution column '{col}' is not numeric: {exception}")
+    if df['uncertainty_type'].isna().any():
+        raise ValueError(f"Missing uncertainty type in rows {list(df.index[df['uncertainty_type'].isna()][:10])}.")
+    df['uncertainty_type'] = df['uncertainty_type'].astype(np.int64)
+
+    list_missing: list = [
+        f"type {uncertainty_type}: {[col for col in DISTRIBUTION_COLUMNS_REQUIRED[uncertainty_type] if col not in df.columns]}"
+        for uncertainty_type in np.unique(df['uncertainty_type'].to_numpy())
+        if uncertainty_type in DISTRIBUTION_COLUMNS_REQUIRED
+        and not set(DISTRIBUTION_COLUMNS_REQUIRED[uncertainty_type]).issubset(df.columns)
+    ]
+    if list_missing:
+        raise ValueError(f"DataFrame is missing distribution columns required by its uncertainty types ({'; '.join(list_missing)}).")
+
+    if dict_rename:
+        logging.info(f"Columns {dict_rename} renamed to `stats_arrays` distribution columns.")
+
+    return df
+
+
+def load_parameter_file(
+        path: pathlib.PurePath,
+        uncertainty_col: str = 'uncertainty distribution',
+        list_string_cols: list | None = None,
+        columns_mapping: dict | None = None
+    ) -> pd.DataFrame:
+    """
+    Loads a JSON or Excel parameter file into a DataFrame ready for sampling, depending on its suffix.
+
+    The file is loaded with `load_data_from_json` or `load_data_from_excel`
+    (with the uncertainty distribution names mapping of the project configuration, see `utils.load_project_configuration`),
+    and the distribution-related columns are renamed to the ``stats_arrays`` columns expected by the sampling functions
+    (eg. the ``uncertainty`` codes and the ``base``/``low``/``high`` metrics of Excel files to ``uncertainty_type``, ``loc``, ``minimum`` and ``maximum``,
+    see `normalize_distribution_columns`).
+
+    Parameters
+    ----------
+    path : pathlib.PurePath
+        The path to the JSON or Excel file.
+
+    uncertainty_col : str, optional
+        The name of the column containing the string description of the uncertainty distributions (Excel only).
+
+    list_string_cols : list, optional
+        The list of column names containing string enumerations (Excel only).
+
+    columns_mapping : dict, optional
+        The mapping of source column names to ``stats_arrays`` column names (see `normalize_distribution_columns`).
+
+    Returns
+    -------
+    pd.DataFrame
+        The parameter data, with ``stats_arrays`` distribution columns.
+
+    Raises
+    ------
+    ValueError
+        If the file suffix is neither a JSON nor an Excel suffix,
+        or if the distribution columns cannot be mapped to ``stats_arrays`` columns.
+    """
+
+    path = pathlib.Path(path)
+    suffix: str = path.suffix.lower()
+    if suffix in JSON_SUFFIXES:
+        df = load_data_from_json(path)
+    elif suffix in EXCEL_SUFFIXES:
+        df = load_data_from_excel(
+            excel_input = path,
+            uncertainty_col = uncertainty_col,
+            uncertainty_dict = utils.load_project_configuration(),
+            list_string_cols = list_string_cols or []
+        )
+    else:
+        raise ValueError(f"Unsupported file type '{path.suffix}' (expected one of {JSON_SUFFIXES + EXCEL_SUFFIXES}).")
+
+    return normalize_distribution_columns(df, columns_mapping)
+
+
+def _list_excel_sheets(excel_input: pathlib.PurePath) -> list:
+    """
+    Lists the sheet names of an Excel file.
+
+    Parameters
+    ----------
+    excel_input : pathlib.PurePath
+        The path to the Excel file.
+
+    Returns
+    -------
+    list
+        The names of all sheets, in workbook order.
+    """
+
+    with pd.ExcelFile(excel_input, engine='openpyxl') as excel_file:
+        return list(excel_file.sheet_names)
+
+
+def _concat_dataframes_with_origin(list_df: list, list_files: list, list_sheets: list) -> pd.DataFrame:
+    """
+    Concatenates long-form DataFrames and tags each row with its file and sheet of origin.
+
+    The DataFrames are concatenated in a single step.
+    Categorical columns are first recoded to the union of their categories,
+    so that they remain categorical after concatenation.
+    The columns ``source_file`` and ``source_sheet`` are built as categoricals
+    directly from the lengths of the DataFrames, without per-DataFrame intermediate columns.
+
+    Parameters
+    ----------
+    list_df : list
+        A list of long-form DataFrames.
+
+    list_files : list
+        The file name of each DataFrame.
+
+    list_sheets : list
+        The sheet name of each DataFrame.
+
+    Returns
+    -------
+    pd.DataFrame
+        The concatenated DataFrame, with the additional columns ``source_file`` and ``source_sheet``.
+    """
+
+    columns_categorical: set = {
+        col for df in list_df for col in df.columns
+        if isinstance(df[col].dtype, pd.CategoricalDtype)
+    }
+    for col in columns_categorical:
+        categories = pd.api.types.union_categoricals(
+            [df[col].array for df in list_df if col in df.columns and isinstance(df[col].dtype, pd.CategoricalDtype)],
+            ignore_order = True
+        ).categories
+        for df in list_df:
+            if col in df.columns and isinstance(df[col].dtype, pd.CategoricalDtype):
+                df[col] = df[col].cat.set_categories(categories)
+
+    df = pd.concat(list_df, ignore_index=True)
+
+    lengths: np.ndarray = np.array([len(df_sheet) for df_sheet in list_df])
+    for col, list_values in [('source_file', list_files), ('source_sheet', list_sheets)]:
+        categories = pd.Index(list_values).unique()
+        df[col] = pd.Categorical.from_codes(
+            codes = np.repeat(categories.get_indexer(list_values), lengths),
+            categories = categories
+        )
+
+    return df
+
+
+def _load_excel_sheet_task(task: tuple) -> pd.DataFrame:
+    """
+    Loads a single Excel sheet using `load_data_from_excel` (worker process task).
+
+    Parameters
+    ----------
+    task : tuple
+        A tuple ``(excel_input, sheet_name, kwargs)``, where ``kwargs`` are passed to `load_data_from_excel`.
+
+    Returns
+    -------
+    pd.DataFrame
+        The long-form DataFrame of the sheet.
+    """
+
+    excel_input, sheet_name, kwargs = task
+
+    try:
+        return load_data_from_excel(excel_input=excel_input, sheet_name=sheet_name, **kwargs)
+    except Exception as exception:
+        raise ValueError(f"Failed to load sheet '{sheet_name}' of Excel file '{excel_input}': {exception}") from exception
+
+
+def load_data_from_excel_sheets(
+        excel_inputs: list,
+        uncertainty_col: str,
+        uncertainty_dict: dict,
+        list_string_cols: list,
+        sheet_names: list | None = None,
+        streaming: bool = False,
+        max_workers: int | None = None,
+        columns: list | None = None,
+        parameters: list | None = None,
+        years: list | None = None,
+        filters: dict | None = None
+    ) -> pd.DataFrame:
+    """
+    Loads data from several sheets of several Excel files concurrently into a single DataFrame.
+
+    Each selected sheet of each Excel file is loaded by a separate worker process using `load_data_from_excel`
+    (ie. the same reshape, uncertainty code and string enumeration pipeline).
+    The resulting DataFrames are concatenated once, and each row is tagged with its file and sheet of origin:
+
+    +-------+-----------+------+-----+-----+------+-----+-------------+--------------+
+    | index | parameter | year | loc | low | high | ... | source_file | source_sheet |
+    +=======+===========+======+=====+=====+======+=====+=============+==============+
+    | 0     | foo       | 2001 | 1.5 | 1   | 2    | ... | narrow.xlsx | A320         |
+    +-------+-----------+------+-----+-----+------+-----+-------------+--------------+
+    | 1     | foo       | 2001 | 1.7 | 1.2 | 2.1  | ... | narrow.xlsx | B737         |
+    +-------+-----------+------+-----+-----+------+-----+-------------+--------------+
+    | 2     | bar       | 2002 | 14  | 12  | 17   | ... | wide.xlsx   | A350         |
+    +-------+-----------+------+-----+-----+------+-----+-------------+--------------+
+
+    Parameters
+    ----------
+    excel_inputs : list
+        A list of paths (``pathlib.PurePath``) to Excel files.
+
+    uncertainty_col : str
+        The name of the column containing the string description of the uncertainty distributions.
+
+    uncertainty_dict : dict
+        The dictionary containing the mapping between the string description of the uncertainty distributions and the ``stats_arrays`` integer codes.
+
+    list_string_cols : list
+        The list of column names containing string enumerations.
+
+    sheet_names : list, optional
+        The names of the sheets to load. Sheets missing from a file are skipped.
+        Defaults to all sheets of all files.
+
+    streaming : bool, optional
+        If ``True``, sheets are read row by row (see `_read_excel_streaming`).
+
+    max_workers : int, optional
+        The maximum number of worker processes. Defaults to the number of CPUs.
+
+    columns, parameters, years, filters : optional
+        Selections applied to every sheet (see `load_data_from_excel`).
+        Callable conditions must be picklable (eg. module-level functions).
+
+    Returns
+    -------
+    pd.DataFrame
+        A Pandas DataFrame containing the parsed Excel data of all sheets,
+        with the additional categorical columns ``source_file`` and ``source_sheet``.
+
+    Raises
+    ------
+    TypeError
+        If an input is not a ``pathlib.PurePath`` to an Excel file.
+
+    ValueError
+        If no sheet is selected, or if a sheet fails to load.
+
+    See Also
+    --------
+    `concurrent.futures.ProcessPoolExecutor <https://docs.python.org/3/library/concurrent.futures.html#processpoolexecutor>`_
+    """
+
+    for excel_input in excel_inputs:
+        if not isinstance(excel_input, pathlib.PurePath):
+            raise TypeError("Inputs must be pathlib.PurePath objects to Excel files.")
+
+    kwargs: dict = {
+        'uncertainty_col': uncertainty_col,
+        'uncertainty_dict': uncertainty_dict,
+        'list_string_cols': list_string_cols,
+        'streaming': streaming,
+        'columns': columns,
+        'parameters': parameters,
+        'years': years,
+        'filters': filters,
+    }
+
+    list_tasks: list = [
+        (excel_input, sheet_name, kwargs)
+        for excel_input in excel_inputs
+        for sheet_name in _list_excel_sheets(excel_input)
+        if sheet_names is None or sheet_name in sheet_names
+    ]
+
+    if not list_tasks:
+        raise ValueError("No Excel sheets selected.")
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        list_df: list = list(executor.map(_load_excel_sheet_task, list_tasks))
+
+    df = _concat_dataframes_with_origin(
+        list_df = list_df,
+        list_files = [task[0].name for task in list_tasks],
+        list_sheets = [task[1] for task in list_tasks],
+    )
+
+    logging.info(f"Excel data loaded from {len(list_tasks)} sheets (#rows: {len(df)}).")
+
+    return df
+
+
+def _merge_dataframes_by_uid(
+        list_df: list,
+        list_sources: list,
+        how: str = 'fields'
+    ) -> tuple:
+    """
+    Merges parameter DataFrames by UID, with later DataFrames taking precedence over earlier ones.
+
+    The function takes a list of DataFrames (as returned by `load_data_from_json`), eg.:
+
+    +--------------+-----------+-----+---------+---------+
+    | UID (=index) | parameter | loc | minimum | maximum |
+    +==============+===========+=====+=========+=========+
+    | 123          | foo       | 11  | 5       | 13      |
+    +--------------+-----------+-----+---------+---------+
+    | 456          | bar       | 6   | NaN     | NaN     |
+    +--------------+-----------+-----+---------+---------+
+
+    +--------------+-----------+-----+---------+---------+
+    | UID (=index) | parameter | loc | minimum | maximum |
+    +==============+===========+=====+=========+=========+
+    | 456          |           | 7   |         |         |
+    +--------------+-----------+-----+---------+---------+
+    | 789          | baz       | 1   | 0       | 2       |
+    +--------------+-----------+-----+---------+---------+
+
+    and returns a DataFrame of the form:
+
+    +--------------+-----------+-----+---------+---------+
+    | UID (=index) | parameter | loc | minimum | maximum |
+    +==============+===========+=====+=========+=========+
+    | 123          | foo       | 11  | 5       | 13      |
+    +--------------+-----------+-----+---------+---------+
+    | 456          | bar       | 7   | NaN     | NaN     |
+    +--------------+-----------+-----+---------+---------+
+    | 789          | baz       | 1   | 0       | 2       |
+    +--------------+-----------+-----+---------+---------+
+
+    The first DataFrame is the base, which is copied exactly once.
+    All other DataFrames are stacked into a single (small) override table,
+    which is collapsed per UID and then written into the rows of the base by index.
+    Integer and boolean columns keep their dtype, unless the merged column contains missing values.
+
+    Parameters
+    ----------
+    list_df : list
+        A list of DataFrames indexed by UID, in ascending order of precedence.
+
+    list_sources : list
+        A list of labels (eg. file names) of the same length as ``list_df``, used in the report.
+
+    how : str, optional
+        ``'fields'`` (default): only non-missing fields of an override replace the fields of earlier sources.
+        ``'rows'``: an override replaces the entire row of earlier sources,
+        ie. columns missing from the overriding source are missing from the merged row.
+
+    Returns
+    -------
+    tuple
+        A tuple ``(df, df_overrides)`` of the merged DataFrame
+        and a report with one row per UID defined in more than one source.
+        The report has the column ``sources`` (list of source labels, in ascending order of precedence).
+
+    Raises
+    ------
+    ValueError
+        If ``how`` is neither ``'fields'`` nor ``'rows'``.
+    """
+
+    if how not in ('fields', 'rows'):
+        raise ValueError(f"Invalid merge mode '{how}' (expected 'fields' or 'rows').")
+
+    df_base: pd.DataFrame = list_df[0]
+
+    if len(list_df) == 1:
+        return df_base.copy(), pd.DataFrame({'sources': pd.Series(dtype=object)}, index=df_base.index[:0])
+
+    df_stacked = pd.concat(
+        objs = list_df[1:],
+        keys = range(1, len(list_df)),
+        names = ['source', df_base.index.name],
+    )
+    uids_stacked = df_stacked.index.get_level_values(1)
+    positions_stacked = df_stacked.index.get_level_values(0)
+    df_stacked = df_stacked.droplevel(0)
+
+    if how == 'fields':
+        df_override = df_stacked.groupby(level=0, sort=False).last() # last non-missing value per column
+    else:
+        df_override = df_stacked[~uids_stacked.duplicated(keep='last')]
+
+    # report all UIDs defined in more than one source
+
+    series_positions = pd.Series(
+        data = positions_stacked,
+        index = uids_stacked
+    )
+    series_positions = pd.concat([
+        pd.Series(0, index=df_base.index[df_base.index.isin(uids_stacked)]),
+        series_positions
+    ])
+    mask_overridden = series_positions.index.duplicated(keep=False)
+    df_overrides = (
+        series_positions[mask_overridden]
+        .map(lambda position: list_sources[position])
+        .groupby(level=0, sort=False)
+        .agg(list)
+        .to_frame('sources')
+        .rename_axis(df_base.index.name)
+    )
+
+    # write the overrides into the rows of the base, by index
+
+    index_new = df_override.index.difference(df_base.index, sort=False)
+    columns_new = df_override.columns.difference(df_base.columns, sort=False)
+    df = df_base.reindex(
+        index = df_base.index.append(index_new),
+        columns = df_base.columns.append(columns_new),
+    )
+    if how == 'rows':
+        mask_rows = df.index.isin(df_override.index)
+        for col in df.columns: # columns missing from the overriding source are cleared
+            df[col] = df[col].where(~mask_rows)
+    for col in df_override.columns:
+        series_col = df_override[col]
+        if how == 'fields':
+            series_col = series_col[series_col.notna()]
+        mask_col = df.index.isin(series_col.index)
+        df[col] = df[col].where(~mask_col, series_col.reindex(df.index))
+
+    # restore the integer and boolean dtypes lost by missing values during the merge (converted to `float64` or `object`)
+
+    for col in df.columns:
+        dtypes_col: list = [df_source[col].dtype for df_source in list_df if col in df_source.columns]
+        if not all(isinstance(dtype, np.dtype) and dtype.kind in 'iub' for dtype in dtypes_col):
+            continue
+        dtype = np.result_type(*dtypes_col)
+        if df[col].dtype == dtype or df[col].isna().any():
+            continue
+        series_restored = df[col].astype(dtype)
+        if (series_restored == df[col]).all():
+            df[col] = series_restored
+
+    logging.info(f"Merged {len(list_df)} DataFrames (#entries: {len(df)}, #overridden UIDs: {len(df_overrides)}).")
+
+    return df, df_overrides
+
+
+def load_data_from_json_sources(
+        json_inputs: list,
+        how: str = 'fields',
+        max_workers: int | None = None
+    ) -> tuple:
+    """
+    Loads data from several JSON files or strings concurrently and merges them by UID.
+
+    The JSON inputs are loaded in a thread pool using `load_data_from_json`.
+    They are then merged by UID, with later inputs taking precedence over earlier ones.
+    A typical use-case is a base parameter set, followed by several override files
+    (eg. per-scenario, per-fuselage):
+
+    .. code-block:: python
+
+        df, df_overrides = load_data_from_json_sources([
+            pathlib.Path('base.json'),
+            pathlib.Path('scenario_high_efficiency.json'),
+            pathlib.Path('fuselage_bwb.json'),
+        ])
+
+    With ``how='fields'``, an override file only needs to contain the fields that are changed, eg.:
+
+    .. code-block:: json
+
+        {
+            "123": {
+                "loc": 12,
+                "maximum": 15
+            }
+        }
+
+    Parameters
+    ----------
+    json_inputs : list
+        A list of JSON strings or paths to JSON files, in ascending order of precedence.
+
+    how : str, optional
+        ``'fields'`` (default): only non-missing fields of an override replace the fields of earlier sources.
+        Note that ``null`` values in an override are therefore ignored.
+        ``'rows'``: an override replaces the entire row of earlier sources.
+
+    max_workers : int, optional
+        The maximum number of threads used to load the JSON inputs.
+
+    Returns
+    -------
+    tuple
+        A tuple ``(df, df_overrides)`` of the merged DataFrame
+        and a report with one row per UID defined in more than one input.
+        The report has the column ``sources`` (list of file names or input positions, in ascending order of precedence).
+
+    Raises
+    ------
+    ValueError
+        If ``json_inputs`` is empty.
+
+    See Also
+    --------
+    `concurrent.futures.ThreadPoolExecutor <https://docs.python.org/3/library/concurrent.futures.html#threadpoolexecutor>`_
+    """
+
+    if len(json_inputs) == 0:
+        raise ValueError("At least one JSON input is required.")
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        list_df: list = list(executor.map(load_data_from_json, json_inputs))
+
+    list_sources: list = [
+        json_input.name if isinstance(json_input, pathlib.PurePath) else position
+        for position, json_input in enumerate(json_inputs)
+    ]
+
+    return _merge_dataframes_by_uid(
+        list_df = list_df,
+        list_sources = list_sources,
+        how = how
+    )
+
+
+def _encode_json_column(series: pd.Series) -> np.ndarray:
+    """
+    Encodes a column into an array of JSON strings, one per row.
+
+    Missing values are encoded as ``null``. Floats are encoded with their shortest round-trip representation,
+    so that `load_data_from_json` returns the exact same values. Numeric columns are encoded with NumPy;
+    for other columns (strings, lists), every unique value is encoded once with the ``json`` module.
+
+    Parameters
+    ----------
+    series : pd.Series
+        The column to encode.
+
+    Returns
+    -------
+    np.ndarray
+        An array of JSON strings.
+    """
+
+    if series.dtype.kind == 'b':
+        return np.where(series.to_numpy(), 'true', 'false').astype(object)
+    if series.dtype.kind in 'iu':
+        return series.to_numpy().astype(str).astype(object)
+    if series.dtype.kind == 'f':
+        values: np.ndarray = series.to_numpy()
+        encoded: np.ndarray = values.astype(str).astype(object)
+        encoded[np.isnan(values)] = 'null'
+        encoded[np.isposinf(values)] = 'Infinity'
+        encoded[np.isneginf(values)] = '-Infinity'
+        return encoded
+
+    keys: np.ndarray = np.empty(len(series), dtype=object)
+    keys[:] = [tuple(value) if isinstance(value, (list, np.ndarray)) else value for value in series.to_numpy(dtype=object)]
+    codes, uniques = pd.factorize(keys, use_na_sentinel=True) # metadata values repeat: encode every unique value once
+
+    encoder = json.JSONEncoder(default=lambda value: value.item()).encode
+    encoded: np.ndarray = np.empty(len(uniques) + 1, dtype=object)
+    encoded[:-1] = [encoder(list(value) if isinstance(value, tuple) else value) for value in uniques]
+    encoded[-1] = 'null' # code -1
+
+    return encoded[codes]
+
+
+def write_data_to_json(
+        df: pd.DataFrame,
+        json_output: pathlib.PurePath,
+        chunk_size: int = 10000
+    ) -> None:
+    """
+    Writes a DataFrame to a JSON file of the schema read by `load_data_from_json`.
+
+    The function takes a DataFrame of the form (as returned by `load_data_from_json`):
+
+    +--------------+-----------+-------+-----+------+------+-------------+-------------------+
+    | UID (=index) | parameter | value | loc | min  | max  | uncertainty | metadata1         |
+    +==============+===========+=======+=====+======+======+=============+===================+
+    | 123          | foo       | 11    | 11  | 5    | 13   | 4           | ["alpha", "beta"] |
+    +--------------+-----------+-------+-----+------+------+-------------+-------------------+
+
+    and writes a JSON file of the form:
+
+    .. code-block:: json
+
+        {
+        "123": {"parameter": "foo", "value": 11, "loc": 11, "min": 5, "max": 13, "uncertainty": 4, "metadata1": ["alpha", "beta"]}
+        }
+
+    Every column is encoded once, as a whole (see `_encode_json_column`), and the file is written in chunks of ``chunk_size`` rows,
+    so that no dictionary of the whole table is ever built.
+    Missing values are written as ``null``. Sample and distribution columns
+    (``parameter_value_stochastic``, ``parameter_value_distribution_dict``) are not written.
+
+    Since JSON object keys are strings, UIDs are read back as strings.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        The parameter data.
+
+    json_output : pathlib.PurePath
+        The path to the JSON file.
+
+    chunk_size : int, optional
+        The number of rows encoded and written at once.
+
+    Raises
+    ------
+    TypeError
+        If the output is not a ``pathlib.PurePath``.
+    """
+
+    if not isinstance(json_output, pathlib.PurePath):
+        raise TypeError("Output must be a pathlib.PurePath to a JSON file.")
+
+    columns: list = [col for col in df.columns if col not in ('parameter_value_stochastic', 'parameter_value_distribution_dict')]
+    keys: list = [json.dumps(str(col)) + ': ' for col in columns]
+    uids: np.ndarray = np.array([json.dumps(str(uid)) for uid in df.index], dtype=object)
+
+    with open(json_output, 'w', encoding='utf-8') as file:
+        file.write('{')
+        for start in range(0, len(df), chunk_size):
+            df_chunk = df.iloc[start:start + chunk_size]
+            encoded_columns: list = [key + _encode_json_column(df_chunk[col]) for key, col in zip(keys, columns)]
+            rows = uids[start:start + chunk_size] + ': {' + np.array([', '.join(cells) for cells in zip(*encoded_columns)], dtype=object) + '}'
+            file.write(('\n' if start == 0 else ',\n') + ',\n'.join(rows))
+        file.write('\n}\n')
+
+    logging.info(f"DataFrame written to JSON file {json_output} (#entries: {len(df)}).")
+
+
+def write_data_to_excel(
+        df: pd.DataFrame,
+        excel_output: pathlib.PurePath,
+        metrics: list,
+        list_string_cols: list = [],
+        year_col: str = 'year',
+        code_col: str | None = 'uncertainty',
+        sheet_name: str = 'Sheet1'
+    ) -> None:
+    """
+    Writes a long-form DataFrame to an Excel ``xlsx`` file of the wide layout read by `load_data_from_excel`.
+
+    The function takes a DataFrame of the form (as returned by `load_data_from_excel`):
+
+    +-------+-----------+------+---------------------+--------------------+-----+-----+------+-------------+
+    | index | parameter | year | classification      | uncertainty distr. | loc | low | high | uncertainty |
+    +=======+===========+======+=====================+====================+=====+=====+======+=============+
+    | 0     | foo       | 2001 | ["alpha", "beta"]   | triangular         | 1.5 | 1   | 2    | 5           |
+    +-------+-----------+------+---------------------+--------------------+-----+-----+------+-------------+
+    | 1     | foo       | 2002 | ["alpha", "beta"]   | triangular         | 8   | 7   | 8.5  | 5           |
+    +-------+-----------+------+---------------------+--------------------+-----+-----+------+-------------+
+    | 2     | bar       | 2002 | ["gamma", "delta"]  | triangular         | 14  | 12  | 17   | 5           |
+    +-------+-----------+------+---------------------+--------------------+-----+-----+------+-------------+
+
+    and writes an Excel sheet of the form:
+
+    +-------+-----------+---------------------+--------------------+------+------+------+------+------+------+
+    |       | A         | B                   | C                  | D    | E    | F    | G    | H    | I    |
+    +=======+===========+=====================+====================+======+======+======+======+======+======+
+    | 1     | parameter | classification      | uncertainty distr. | 2001 | 2001 | 2001 | 2002 | 2002 | 2002 |
+    +-------+-----------+---------------------+--------------------+------+------+------+------+------+------+
+    | 2     |           |                     |                    | loc  | low  | high | loc  | low  | high |
+    +-------+-----------+---------------------+--------------------+------+------+------+------+------+------+
+    | 3     | foo       | alpha, beta         | triangular         | 1.5  | 1    | 2    | 8    | 7    | 8.5  |
+    +-------+-----------+---------------------+--------------------+------+------+------+------+------+------+
+    | 4     | bar       | gamma, delta        | triangular         |      |      |      | 14   | 12   | 17   |
+    +-------+-----------+---------------------+--------------------+------+------+------+------+------+------+
+
+    All columns other than ``year_col``, ``metrics`` and ``code_col`` (the integer codes added by `load_data_from_excel`,
+    which are derived from the uncertainty distribution names when reading) identify a sheet row.
+    Rows are numbered with a single factorization of these columns (in order of first appearance), years are sorted,
+    and the metric values are scattered into an array of shape ``(#rows, #years, #metrics)`` in one operation,
+    which is then reshaped to the wide layout. The sheet is written with the write-only (streaming) mode of ``openpyxl``.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        The long-form parameter data.
+
+    excel_output : pathlib.PurePath
+        The path to the ``xlsx`` file.
+
+    metrics : list
+        The metric columns (eg. ``['loc', 'low', 'high']``), in the order of the sheet.
+
+    list_string_cols : list, optional
+        The columns containing lists, which are written as comma-separated string enumerations.
+
+    year_col : str, optional
+        The column containing the years.
+
+    code_col : str, optional
+        The column containing the ``stats_arrays`` integer codes, which is not written (``None`` to write all columns).
+
+    sheet_name : str, optional
+        The name of the sheet.
+
+    Raises
+    ------
+    TypeError
+        If the output is not a ``pathlib.PurePath``.
+
+    ValueError
+        If a row has more than one value for a year (ie. the rows are not unique by identifying columns and year).
+    """
+
+    import openpyxl # optional dependency, only required for Excel files
+
+    if not isinstance(excel_output, pathlib.PurePath):
+        raise TypeError("Output must be a pathlib.PurePath to an Excel file.")
+
+    string_cols: list = [col for col in df.columns if col not in [year_col, code_col, *metrics]]
+
+    df_strings = df[string_cols].astype(object)
+    for col in list_string_cols:
+        df_strings[col] = [', '.join(value) if isinstance(value, (list, tuple, np.ndarray)) else value for value in df_strings[col]]
+    values_strings: np.ndarray = df_strings.to_numpy(copy=True)
+    values_strings[pd.isna(values_strings)] = None
+
+    codes_rows, uniques_rows = pd.factorize(pd.Series(list(map(tuple, values_strings)), dtype=object), sort=False)
+    codes_years, uniques_years = pd.factorize(df[year_col], sort=True)
+
+    if pd.Series(codes_rows * len(uniques_years) + codes_years).duplicated().any():
+        raise ValueError("Rows are not unique by their identifying columns and year.")
+
+    values: np.ndarray = np.full((len(uniques_rows), len(uniques_years), len(metrics)), None, dtype=object)
+    values_metrics: np.ndarray = df[metrics].to_numpy(dtype=object, copy=True)
+    values_metrics[pd.isna(values_metrics)] = None
+    values[codes_rows, codes_years] = values_metrics
+    values = values.reshape(len(uniques_rows), len(uniques_years) * len(metrics))
+
+    workbook = openpyxl.Workbook(write_only=True)
+    worksheet = workbook.create_sheet(sheet_name)
+    worksheet.append(string_cols + [year.item() if isinstance(year, np.generic) else year for year in np.repeat(np.asarray(uniques_years, dtype=object), len(metrics))])
+    worksheet.append([None] * len(string_cols) + list(metrics) * len(uniques_years))
+    for row_strings, row_values in zip(uniques_rows, values.tolist()):
+        worksheet.append(list(row_strings) + row_values)
+    workbook.save(excel_output)
+
+    logging.info(f"DataFrame written to Excel file {excel_output} (#rows: {len(uniques_rows)}, #years: {len(uniques_years)}, #metrics: {len(metrics)}).")
@@ -0,0 +1,332 @@
+# %%
+# data science
+import pandas as pd
+import numpy as np
+# system
+import json
+import time
+import pathlib
+from pathlib import Path
+# debugging
+import logging
+# local imports
+import ecopylot.inout as inout
+import ecopylot.stats as stats
+import ecopylot.archive as archive
+import ecopylot.aggregate as aggregate
+import ecopylot.validation as validation
+
+
+PARTITION_SIZE_BYTES: int = 256 * 2**20 # size of the sample matrix of a partition
+PERCENTILES: tuple = (5, 50, 95)
+INDEX_FILE: str = 'index.json'
+STATISTICS_FILE: str = 'statistics.csv'
+INVALID_FILE: str = 'invalid.csv'
+AGGREGATED_FILE: str = 'aggregated.eco'
+AGGREGATED_STATISTICS_FILE: str = 'aggregated_statistics.csv'
+
+
+def _sample_statistics(samples: np.ndarray, index: pd.Index) -> pd.DataFrame:
+    """
+    Computes the statistics of every row of a sample matrix (mean, standard deviation, minimum, percentiles, maximum).
+    """
+
+    percentiles: np.ndarray = np.percentile(samples, PERCENTILES, axis=1).reshape(len(PERCENTILES), samples.shape[0])
+
+    return pd.DataFrame(
+        data = {
+            'mean': samples.mean(axis=1, dtype=np.float64),
+            'std': samples.std(axis=1, dtype=np.float64, ddof=min(1, samples.shape[1] - 1)),
+            'min': samples.min(axis=1),
+            **{f'p{percentile}': values for percentile, values in zip(PERCENTILES, percentiles)},
+            'max': samples.max(axis=1),
+        },
+        index = index,
+    )
+
+
+def _append_csv(df: pd.DataFrame, path: pathlib.Path) -> None:
+    df.to_csv(path, mode='a', header=not path.exists())
+
+
+def _merge_aggregates(totals: dict, df: pd.DataFrame, by: list, how: str, weights: str | None) -> None:
+    """
+    Adds the group sums of a partition to the running totals of all partitions.
+
+    The totals are of the form ``{group key: [count, denominator, sum of samples]}``,
+    where the denominator of the mean is the count, or the sum of weights for ``how='weighted_mean'``.
+    Means are only computed from the totals once all partitions are merged (see `run_partitioned`).
+    """
+
+    df_aggregated = aggregate.aggregate_samples(df, by, how='weighted_sum' if how.startswith('weighted') else 'sum', weights=weights)
+
+    if how == 'weighted_mean':
+        rows, groups, _ = aggregate._group_memberships(df, by)
+        denominators = np.bincount(groups, weights=df[weights].to_numpy(dtype=np.float64)[rows], minlength=len(df_aggregated))
+    else:
+        denominators = df_aggregated['count'].to_numpy()
+
+    for key, count, denominator, samples in zip(df_aggregated.index, df_aggregated['count'], denominators, df_aggregated['parameter_value_stochastic']):
+        if key in totals:
+            totals[key][0] += count
+            totals[key][1] += denominator
+            totals[key][2] += samples
+        else:
+            totals[key] = [count, denominator, samples.astype(np.float64, copy=True)]
+
+
+def run_partitioned(
+        sources: list,
+        output_dir: pathlib.Path,
+        iterations: int,
+        seed: int,
+        partition_rows: int | None = None,
+        dtype: np.dtype = np.float64,
+        counter_based: bool = False,
+        uncertainty_col: str = 'uncertainty distribution',
+        list_string_cols: list | None = None,
+        validation_mode: str | None = None,
+        aggregate_by: list | None = None,
+        how: str = 'sum',
+        weights: str | None = None,
+        compression: str | None = None
+    ) -> pd.DataFrame:
+    """
+    Loads, validates, samples, summarizes and writes parameter tables whose samples do not fit in memory,
+    one row partition at a time.
+
+    The sources are loaded one after the other (see `inout.load_parameter_file`, which also converts
+    uncertainty distribution names, distribution columns and string enumerations of Excel files). Each source is split into partitions
+    of ``partition_rows`` rows, and every partition goes through the whole chain:
+
+    1. validation (optional, see `validation.validate_parameters`)
+    2. sampling (see `stats.generate_stochastic_dataframe`)
+    3. row statistics, appended to ``statistics.csv``
+    4. aggregation (optional, see `aggregate.aggregate_samples`), added to running group totals
+    5. writing of the partition to an archive ``partition-<number>.eco`` (see `archive.write_archive`)
+
+    after which the samples of the partition are released. At most one (unsampled) source table and the samples
+    of one partition are in memory at a time: the total size of the samples is limited by the disk, not the memory.
+
+    Rows are sampled from per-UID random streams of ``seed`` (see `stats.generate_stochastic_dataframe`),
+    so the samples do not depend on the partitioning and are identical to those of the unpartitioned table.
+    UIDs must therefore be unique across all sources.
+
+    Once all partitions are processed, the merged group totals are written to the archive ``aggregated.eco``
+    (one row per group, with the group keys and ``count`` as columns) and their statistics to ``aggregated_statistics.csv``.
+    Finally, the index of partitions is written to ``index.json``:
+
+    .. code-block:: json
+
+        {
+            "iterations": 1000,
+            "seed": 42,
+            "dtype": "<f8",
+            "partitions": [
+                {"partition": 0, "source": "fleet.json", "rows": 100000, "invalid": 0, "path": "partition-00000.eco", "first_uid": "1", "last_uid": "100000", ...},
+                ...
+            ],
+            ...
+        }
+
+    The samples of a partition can be read back with `archive.read_archive` (see `read_partition_index`).
+
+    Parameters
+    ----------
+    sources : list
+        The paths of the JSON or Excel parameter files.
+
+    output_dir : pathlib.Path
+        The directory to which the partitions, statistics and index are written. It is created if it does not exist.
+
+    iterations : int
+        The number of iterations to generate per parameter.
+
+    seed : int
+        The global seed of the per-UID random streams.
+
+    partition_rows : int, optional
+        The number of rows per partition. Defaults to the number of rows whose samples fit in ``PARTITION_SIZE_BYTES``.
+
+    dtype : np.dtype, optional
+        The data type in which the samples are stored.
+
+    counter_based : bool, optional
+        If ``True``, samples are generated with the counter-based random number generator (see `counter_rng.generate_samples`).
+
+    uncertainty_col : str, optional
+        The name of the column containing the string description of the uncertainty distributions (Excel only).
+
+    list_string_cols : list, optional
+        The list of column names containing string enumerations (Excel only).
+
+    validation_mode : str, optional
+        If provided (``'strict'`` or ``'lenient'``), the parameters of every partition are validated before sampling.
+        Invalid rows dropped in ``'lenient'`` mode are reported in ``invalid.csv``.
+
+    aggregate_by : list, optional
+        The metadata columns to aggregate the samples by (see `aggregate.aggregate_samples`).
+
+    how : str, optional
+        The aggregation: ``'sum'``, ``'mean'``, ``'weighted_sum'`` or ``'weighted_mean'``.
+
+    weights : str, optional
+        The name of the column of weights. Required for the weighted aggregations.
+
+    compression : str, optional
+        The compression of the partition archives (see `archive.write_archive`).
+
+    Returns
+    -------
+    pd.DataFrame
+        The index of partitions, with one row per partition (source, number of (invalid) rows, UID range, path and timings).
+
+    Raises
+    ------
+    ValueError
+        If the aggregation is not valid, if the UIDs of a source are not unique,
+        or if a partition is invalid in ``'strict'`` validation mode.
+    """
+
+    if how not in ('sum', 'mean', 'weighted_sum', 'weighted_mean'):
+        raise ValueError(f"Invalid aggregation '{how}' (expected 'sum', 'mean', 'weighted_sum' or 'weighted_mean').")
+    if aggregate_by is not None and how.startswith('weighted') and weights is None:
+        raise ValueError(f"Aggregation '{how}' requires weights.")
+
+    dtype = np.dtype(dtype)
+    if partition_rows is None:
+        partition_rows = max(1, PARTITION_SIZE_BYTES // (int(iterations) * dtype.itemsize))
+
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents = True, exist_ok = True)
+    for name in (INDEX_FILE, STATISTICS_FILE, INVALID_FILE, AGGREGATED_FILE, AGGREGATED_STATISTICS_FILE):
+        (output_dir / name).unlink(missing_ok = True) # files are appended to, and the index marks a complete run
+
+    list_records: list = []
+    totals: dict = {}
+
+    for source in sources:
+        time_start = time.perf_counter()
+        df_source = inout.load_parameter_file(Path(source), uncertainty_col, list_string_cols)
+        time_load = time.perf_counter() - time_start
+        if df_source.index.has_duplicates:
+            raise ValueError(f"UIDs of '{source}' are not unique: {list(df_source.index[df_source.index.duplicated()][:10])}")
+
+        for start in range(0, max(len(df_source), 1), partition_rows):
+            record: dict = {
+                'partition': len(list_records),
+                'source': str(source),
+                'rows': 0,
+                'invalid': 0,
+                'first_uid': None,
+                'last_uid': None,
+                'path': None,
+                'load [s]': time_load * min(partition_rows, len(df_source) - start) / max(len(df_source), 1),
+            }
+
+            time_start = time.perf_counter()
+            df = df_source.iloc[start:start + partition_rows].copy()
+            if validation_mode is not None:
+                df, df_invalid = validation.validate_parameters(df, mode = validation_mode)
+                record['invalid'] = df_invalid.index.nunique()
+                if len(df_invalid):
+                    _append_csv(df_invalid.assign(partition = record['partition']), output_dir / INVALID_FILE)
+            record['validate [s]'] = time.perf_counter() - time_start
+
+            if len(df):
+                time_start = time.perf_counter()
+                df = stats.generate_stochastic_dataframe(df = df, iterations = iterations, seed = seed, dtype = dtype, counter_based = counter_based)
+                record['sample [s]'] = time.perf_counter() - time_start
+
+                time_start = time.perf_counter()
+                _append_csv(
+                    _sample_statistics(stats.get_sample_matrix(df), df.index).assign(partition = record['partition']),
+                    output_dir / STATISTICS_FILE,
+                )
+                if aggregate_by is not None:
+                    _merge_aggregates(totals, df, list(aggregate_by), how, weights)
+                record['statistics [s]'] = time.perf_counter() - time_start
+
+                time_start = time.perf_counter()
+                path_partition: pathlib.Path = output_dir / f"partition-{record['partition']:05d}.eco"
+                archive.write_archive(df.drop(columns = ['parameter_value_distribution_dict']), path_partition, compression = compression)
+                record['write [s]'] = time.perf_counter() - time_start
+
+                record.update({
+                    'rows': len(df),
+                    'first_uid': archive._to_json_value(df.index[0]),
+                    'last_uid': archive._to_json_value(df.index[-1]),
+                    'path': path_partition.name,
+                })
+
+            logging.info(f"Partition {record['partition']} of '{source}' processed ({record['rows']} rows, {record['invalid']} invalid).")
+            list_records.append(record)
+            del df
+
+        del df_source
+
+    if aggregate_by is not None and totals:
+        keys: list = sorted(totals)
+        denominators: np.ndarray = np.array([totals[key][1] for key in keys], dtype=np.float64)
+        samples_aggregated: np.ndarray = np.vstack([totals[key][2] for key in keys])
+        if how in ('mean', 'weighted_mean'):
+            with np.errstate(invalid='ignore', divide='ignore'):
+                samples_aggregated /= denominators.reshape(-1, 1)
+        index = pd.MultiIndex.from_tuples(keys, names=aggregate_by) if len(aggregate_by) > 1 else pd.Index(keys, name=aggregate_by[0])
+        df_aggregated = pd.DataFrame({'count': [totals[key][0] for key in keys], 'parameter_value_stochastic': list(samples_aggregated)}, index=index)
+        archive.write_archive(df_aggregated.reset_index(), output_dir / AGGREGATED_FILE, compression = compression)
+        _sample_statistics(samples_aggregated, index).to_csv(output_dir / AGGREGATED_STATISTICS_FILE)
+
+    index_partitions: dict = {
+        'iterations': int(iterations),
+        'seed': int(seed),
+        'dtype': dtype.str,
+        'counter_based': counter_based,
+        'partition_rows': int(partition_rows),
+        'sources': [str(source) for source in sources],
+        'rows': int(sum(record['rows'] for record in list_records)),
+        'invalid': int(sum(record['invalid'] for record in list_records)),
+        'statistics': STATISTICS_FILE if (output_dir / STATISTICS_FILE).exists() else None,
+        'aggregated': AGGREGATED_FILE if (output_dir / AGGREGATED_FILE).exists() else None,
+        'aggregated_statistics': AGGREGATED_STATISTICS_FILE if (output_dir / AGGREGATED_STATISTICS_FILE).exists() else None,
+        'partitions': list_records,
+    }
+    with open(output_dir / INDEX_FILE, 'w') as file:
+        json.dump(index_partitions, file, indent=1)
+
+    logging.info(f"{len(list_records)} partitions of {index_partitions['rows']} rows written to {output_dir}.")
+
+    return pd.DataFrame(list_records)
+
+
+def read_partition_index(output_dir: pathlib.Path) -> tuple:
+    """
+    Reads the index of partitions written by `run_partitioned`.
+
+    Example
+    -------
+    .. code-block:: python
+
+        settings, df_partitions = partitioned.read_partition_index(Path('results/'))
+        for path in df_partitions['path'].dropna():
+            df = archive.read_archive(Path('results/') / path)
+
+    Returns
+    -------
+    tuple
+        A tuple ``(settings, df_partitions)`` of the run settings (dictionary) and the index of partitions (dataframe).
+
+    Raises
+    ------
+    FileNotFoundError
+        If the directory does not contain an index, eg. because the run did not complete.
+    """
+
+    path_index: pathlib.Path = Path(output_dir) / INDEX_FILE
+    if not path_index.is_file():
+        raise FileNotFoundError(f"No index of partitions found in {output_dir} (incomplete run?).")
+
+    with open(path_index) as file:
+        settings: dict = json.load(file)
+
+    return settings, pd.DataFrame(settings.pop('partitions'))
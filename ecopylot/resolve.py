@@ -0,0 +1,215 @@
+# %%
+# data science
+import pandas as pd
+import numpy as np
+# debugging
+import logging
+# local imports
+import ecopylot.inout as inout
+
+
+CHUNK_SIZE_BYTES: int = 64 * 2**20 # size of the (rows, configurations) score matrix of a chunk of configurations
+UNRESOLVED: int = -1
+
+
+class ParameterResolver:
+    """
+    Resolves the applicable parameter rows of many configurations (eg. aircraft configurations) at once.
+
+    The resolver takes a parameter dataframe (as returned by the loaders) of the form:
+
+    +-------+------------------+------+----------------------+----------------+-------+
+    | index | parameter        | year | energy source        | sizes          | ...   |
+    +=======+==================+======+======================+================+=======+
+    | 0     | fuel consumption | 2020 | ["kerosene", "SAF"]  | ["Regional"]   | ...   |
+    +-------+------------------+------+----------------------+----------------+-------+
+    | 1     | fuel consumption | 2030 | ["kerosene", "SAF"]  | ["Regional"]   | ...   |
+    +-------+------------------+------+----------------------+----------------+-------+
+    | 2     | battery mass     | 2020 | ["all"]              | ["Commuter"]   | ...   |
+    +-------+------------------+------+----------------------+----------------+-------+
+
+    and configurations of the form:
+
+    +-------+------+---------------+----------+
+    | index | year | energy source | sizes    |
+    +=======+======+===============+==========+
+    | 0     | 2025 | SAF           | Regional |
+    +-------+------+---------------+----------+
+    | 1     | 2050 | hydrogen      | Commuter |
+    +-------+------+---------------+----------+
+
+    A row applies to a configuration if, for every key column, the value of the configuration is the value of the row,
+    one of the items of a list-valued (or comma-separated) cell, or if the cell of the row is a wildcard
+    (``wildcard``, eg. ``"all"``, or missing). For every configuration and parameter, the applicable row is chosen by:
+
+    1. the most specific row, ie. the fewest wildcard cells
+    2. the nearest year (a row without year applies to all years at distance 0)
+    3. the earlier year, if two years are equally near
+    4. the first row of the dataframe
+
+    The key columns are encoded once, into one boolean ``(rows, values)`` table per column (see `inout._encode_string_enumerations`).
+    `resolve` then matches all configurations against all rows with array operations,
+    one chunk of configurations at a time, and selects the applicable row of every parameter
+    by a segmented minimum over the rows of the parameter (see `numpy.minimum.reduceat`).
+
+    Example
+    -------
+    .. code-block:: python
+
+        resolver = resolve.ParameterResolver(df, keys=['fuselage', 'energy source', 'propulsor', 'sizes'])
+        positions = resolver.resolve(df_configurations) # (configurations, parameters)
+        values = np.where(positions >= 0, df['loc'].to_numpy()[positions], np.nan)
+        samples = stats.get_sample_matrix(df)[np.maximum(positions, 0)] # (configurations, parameters, iterations), unresolved entries to be masked
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        The parameter dataframe.
+
+    keys : list
+        The metadata columns identifying a configuration (excluding the year).
+
+    parameter_col : str, optional
+        The column of parameter names.
+
+    year_col : str, optional
+        The column of years (``None``: no year matching).
+
+    wildcard : str, optional
+        The value of a cell applying to all values of a key.
+
+    Raises
+    ------
+    ValueError
+        If a column is not part of the dataframe.
+    """
+
+    def __init__(
+            self,
+            df: pd.DataFrame,
+            keys: list,
+            parameter_col: str = 'parameter',
+            year_col: str | None = 'year',
+            wildcard: str = 'all'
+        ):
+        self.keys: list = list(keys)
+        self.year_col: str | None = year_col
+
+        missing_columns: list = [col for col in self.keys + [parameter_col] + ([year_col] if year_col else []) if col not in df.columns]
+        if missing_columns:
+            raise ValueError(f"Columns are not part of the parameter dataframe: {missing_columns}")
+
+        codes_parameter, self.parameters = pd.factorize(df[parameter_col])
+        self.parameters: pd.Index = pd.Index(self.parameters, name=parameter_col)
+
+        # rows sorted by parameter, so that the rows of a parameter are a segment
+        self.order: np.ndarray = np.argsort(codes_parameter, kind='stable')
+        self.order = self.order[codes_parameter[self.order] >= 0] # rows without parameter never apply
+        codes_sorted: np.ndarray = codes_parameter[self.order]
+        self.segment_starts: np.ndarray = np.flatnonzero(np.diff(codes_sorted, prepend=-1))
+
+        self.tables: list = []
+        self.categories: list = []
+        number_wildcards: np.ndarray = np.zeros(len(self.order), dtype=np.int64)
+        for col in self.keys:
+            offsets, codes, categories, mask_valid = inout._encode_string_enumerations(df[col].iloc[self.order])
+            rows: np.ndarray = np.repeat(np.arange(len(self.order)), np.diff(offsets))
+            table: np.ndarray = np.zeros((len(self.order), len(categories) + 1), dtype=bool) # last column: values of no row
+            table[rows, codes] = True
+            mask_wildcard: np.ndarray = ~mask_valid
+            if wildcard in categories:
+                mask_wildcard |= table[:, categories.get_loc(wildcard)]
+            table[mask_wildcard] = True
+            number_wildcards += mask_wildcard
+            self.tables.append(table)
+            self.categories.append(categories)
+
+        self.years: np.ndarray | None = None
+        if year_col is not None:
+            self.years = pd.to_numeric(df[year_col].iloc[self.order], errors='coerce').to_numpy(dtype=np.float64)
+
+        self.number_wildcards: np.ndarray = number_wildcards
+        self.positions: np.ndarray = self.order.astype(np.int64)
+        self.number_positions: int = len(df)
+
+        logging.info(f"Parameter resolver built ({len(self.order)} rows, {len(self.parameters)} parameters, keys: {self.keys}).")
+
+    def resolve(self, df_configurations: pd.DataFrame) -> np.ndarray:
+        """
+        Resolves the applicable row of every parameter for every configuration.
+
+        Parameters
+        ----------
+        df_configurations : pd.DataFrame
+            The configurations, with one column per key (and the year column).
+
+        Returns
+        -------
+        np.ndarray
+            An ``int64`` array of shape ``(configurations, parameters)`` of row positions in the parameter dataframe
+            (eg. into ``df['loc'].to_numpy()`` or the rows of `stats.get_sample_matrix`),
+            or ``UNRESOLVED`` (``-1``) if no row of the parameter applies to the configuration.
+            The parameters are those of ``resolver.parameters``, in the order of their first appearance in the dataframe.
+
+        Raises
+        ------
+        ValueError
+            If a key (or year) column is missing from the configurations.
+        """
+
+        columns: list = self.keys + ([self.year_col] if self.year_col else [])
+        missing_columns: list = [col for col in columns if col not in df_configurations.columns]
+        if missing_columns:
+            raise ValueError(f"Columns are not part of the configurations: {missing_columns}")
+
+        number_configurations: int = len(df_configurations)
+        number_rows: int = len(self.order)
+
+        list_codes: list = []
+        for col, categories, table in zip(self.keys, self.categories, self.tables):
+            codes = categories.get_indexer(df_configurations[col].to_numpy(dtype=object))
+            list_codes.append(np.where(codes >= 0, codes, table.shape[1] - 1))
+
+        if self.years is not None:
+            years_configurations = pd.to_numeric(df_configurations[self.year_col], errors='coerce').to_numpy(dtype=np.float64)
+            years_all = np.concatenate([self.years, years_configurations])
+            maximum_distance = int(np.nanmax(years_all) - np.nanmin(years_all)) if np.isfinite(years_all).any() else 0
+        else:
+            maximum_distance = 0
+
+        # the rank of a (row, configuration) match, encoded in a single integer:
+        # wildcards, then year distance, then later year, then row position
+        factor_later: int = max(1, self.number_positions)
+        factor_distance: int = 2 * factor_later
+        factor_wildcards: int = (maximum_distance + 1) * factor_distance
+        if (len(self.keys) + 1) * factor_wildcards >= np.iinfo(np.int64).max:
+            raise ValueError("Too many rows or too large a year range to rank the matches.")
+        rank_rows: np.ndarray = self.number_wildcards * factor_wildcards + self.positions
+
+        positions: np.ndarray = np.full((number_configurations, len(self.parameters)), UNRESOLVED, dtype=np.int64)
+        if number_rows == 0 or number_configurations == 0:
+            return positions
+
+        configurations_per_chunk: int = max(1, CHUNK_SIZE_BYTES // (8 * number_rows))
+        for start in range(0, number_configurations, configurations_per_chunk):
+            stop: int = min(start + configurations_per_chunk, number_configurations)
+
+            mask_match: np.ndarray = np.ones((number_rows, stop - start), dtype=bool)
+            for table, codes in zip(self.tables, list_codes):
+                mask_match &= table[:, codes[start:stop]]
+
+            rank: np.ndarray = np.broadcast_to(rank_rows.reshape(-1, 1), mask_match.shape).copy()
+            if self.years is not None:
+                difference = self.years.reshape(-1, 1) - years_configurations[start:stop].reshape(1, -1)
+                difference = np.nan_to_num(difference, nan=0.0) # rows (or configurations) without year
+                rank += np.rint(np.abs(difference)).astype(np.int64) * factor_distance + (difference > 0) * factor_later
+
+            rank[~mask_match] = np.iinfo(np.int64).max
+            rank_minimum: np.ndarray = np.minimum.reduceat(rank, self.segment_starts, axis=0) # (parameters, configurations)
+
+            mask_resolved = rank_minimum != np.iinfo(np.int64).max
+            positions[start:stop] = np.where(mask_resolved, rank_minimum % factor_later, UNRESOLVED).T
+
+        logging.info(f"{number_configurations} configurations resolved ({(positions == UNRESOLVED).sum()} unresolved configuration/parameter pairs).")
+
+        return positions
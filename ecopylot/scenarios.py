@@ -0,0 +1,212 @@
+# %%
+# data science
+import pandas as pd
+import numpy as np
+# debugging
+import logging
+# local imports
+import ecopylot.stats as stats
+
+
+DISTRIBUTION_COLUMNS: list = ['uncertainty_type', 'loc', 'scale', 'shape', 'minimum', 'maximum']
+
+
+def create_scenario(
+        df_base: pd.DataFrame,
+        overrides: pd.DataFrame | dict,
+        iterations: int,
+        seed: int,
+        dtype: np.dtype | None = None
+    ) -> pd.DataFrame:
+    """
+    Creates a scenario as an overlay of changed rows on a base stochastic dataframe.
+
+    The overrides are of the form (as a dataframe indexed by UID, or the equivalent dictionary ``{uid: {column: value}}``):
+
+    +-------------+------+---------+
+    | UID (index) | loc  | maximum |
+    +=============+======+=========+
+    | 123         | 0.2  | NaN     |
+    +-------------+------+---------+
+    | 456         | 9.1  | 12.5    |
+    +-------------+------+---------+
+
+    Only non-missing values override the base; other columns and rows are taken from the base.
+    The function returns the overlay: a stochastic dataframe containing only the overridden rows.
+    Rows whose distribution columns (``uncertainty_type``, ``loc``, ``scale``, ``shape``, ``minimum``, ``maximum``)
+    are changed are resampled; rows with only metadata changes keep (a view of) the base samples.
+
+    Rows are resampled from the same per-UID random streams as ``generate_stochastic_dataframe(..., seed=seed)``
+    (counter-based streams, with the same ``rtol``, if the base was generated with ``counter_based=True``, see ``df_base.attrs``),
+    so if the base was generated with the same ``seed``, scenarios use common random numbers:
+    differences between scenarios are due to the changed parameters only, not to sampling noise.
+
+    An overlay of ``k`` rows costs ``k`` rows of memory and sampling, whatever the size of the base.
+    Use `materialize_scenario` to obtain a full dataframe, or `evaluate_scenarios` to run a model on many scenarios.
+
+    Parameters
+    ----------
+    df_base : pd.DataFrame
+        The base stochastic dataframe (as returned by `stats.generate_stochastic_dataframe`).
+
+    overrides : pd.DataFrame or dict
+        The changed values, by UID and column.
+
+    iterations : int
+        The number of iterations of the base.
+
+    seed : int
+        The global seed of the per-UID random streams (see `stats.generate_stochastic_dataframe`).
+
+    dtype : np.dtype, optional
+        The data type of the samples of the base, in which the changed rows are resampled.
+        Defaults to the data type of the samples of the base.
+
+    Returns
+    -------
+    pd.DataFrame
+        The overlay dataframe, indexed by the overridden UIDs.
+
+    Raises
+    ------
+    ValueError
+        If an overridden UID or column is not part of the base, or if the samples of the base are not of type ``dtype``.
+    """
+
+    if isinstance(overrides, dict):
+        overrides = pd.DataFrame.from_dict(overrides, orient='index')
+
+    unknown_uids = overrides.index.difference(df_base.index)
+    if len(unknown_uids):
+        raise ValueError(f"Overridden UIDs are not part of the base: {list(unknown_uids[:10])}")
+    unknown_columns = overrides.columns.difference(df_base.columns)
+    if len(unknown_columns):
+        raise ValueError(f"Overridden columns are not part of the base: {list(unknown_columns)}")
+    if 'parameter_value_stochastic' in overrides.columns:
+        raise ValueError("Samples cannot be overridden directly; override the distribution columns instead.")
+
+    dtype_base: np.dtype | None = df_base['parameter_value_stochastic'].iloc[0].dtype if len(df_base) else None
+    dtype = np.dtype(dtype if dtype is not None else dtype_base if dtype_base is not None else np.float64)
+    if dtype_base is not None and dtype_base != dtype:
+        raise ValueError(f"Base samples are of type {dtype_base}, not {dtype}.")
+
+    df_overlay = df_base.loc[overrides.index].copy()
+    for col in overrides.columns:
+        mask = overrides[col].notna().to_numpy()
+        if mask.any():
+            values = df_overlay[col].to_numpy(dtype=object, copy=True)
+            values[mask] = overrides[col].to_numpy(dtype=object)[mask]
+            df_overlay[col] = pd.Series(values, index=df_overlay.index).infer_objects()
+
+    columns: list = [col for col in DISTRIBUTION_COLUMNS if col in df_base.columns]
+    df_changed = df_overlay[columns] != df_base.loc[overrides.index, columns]
+    df_changed &= ~(df_overlay[columns].isna() & df_base.loc[overrides.index, columns].isna())
+    mask_resample: np.ndarray = df_changed.any(axis=1).to_numpy()
+
+    if mask_resample.any():
+        df_resampled = stats._sample_parameters_from_distrivution(
+            df = stats._add_distribution_dict_column(df_overlay[mask_resample].drop(columns=['parameter_value_distribution_dict', 'parameter_value_stochastic'], errors='ignore')),
+            iterations = iterations,
+            seed = seed,
+            dtype = dtype,
+            counter_based = df_base.attrs.get('counter_based', False),
+            rtol = df_base.attrs.get('rtol') if df_base.attrs.get('counter_based', False) else None,
+        )
+        for col in ['parameter_value_distribution_dict', 'parameter_value_stochastic']:
+            values = df_overlay[col].to_numpy(dtype=object, copy=True)
+            values[mask_resample] = df_resampled[col].to_numpy(dtype=object)
+            df_overlay[col] = values
+
+    logging.info(f"Scenario created ({len(df_overlay)} overridden rows, {mask_resample.sum()} resampled).")
+
+    return df_overlay
+
+
+def materialize_scenario(
+        df_base: pd.DataFrame,
+        df_overlay: pd.DataFrame
+    ) -> pd.DataFrame:
+    """
+    Returns the full stochastic dataframe of a scenario, ie. the base with the rows of the overlay replaced.
+
+    The base is not modified. The sample arrays of unchanged rows are the arrays of the base:
+    the memory cost of a materialized scenario is one column of references (or values) per column,
+    not a copy of the samples.
+
+    Parameters
+    ----------
+    df_base : pd.DataFrame
+        The base stochastic dataframe.
+
+    df_overlay : pd.DataFrame
+        The overlay, as returned by `create_scenario`.
+
+    Returns
+    -------
+    pd.DataFrame
+        The stochastic dataframe of the scenario.
+    """
+
+    df = df_base.copy(deep=False)
+    positions: np.ndarray = df_base.index.get_indexer(df_overlay.index)
+
+    for col in df_overlay.columns:
+        values = df_base[col].to_numpy(dtype=object, copy=True)
+        values[positions] = df_overlay[col].to_numpy(dtype=object)
+        df[col] = values if col in ('parameter_value_distribution_dict', 'parameter_value_stochastic') else pd.Series(values, index=df.index).infer_objects()
+
+    return df
+
+
+def evaluate_scenarios(
+        model,
+        df_base: pd.DataFrame,
+        scenarios: dict
+    ) -> pd.DataFrame:
+    """
+    Evaluates a vectorized model on the base and on many scenarios.
+
+    The model takes the sample matrix of shape ``(parameters, iterations)`` (rows in the order of ``df_base``)
+    and returns an array of shape ``(iterations,)`` (see `sensitivity.evaluate_model`).
+
+    A single working copy of the base sample matrix is made. For every scenario, the rows of the overlay
+    are swapped into the working copy, the model is evaluated and the base rows are swapped back:
+    the cost per scenario is proportional to the number of overridden rows (plus the model evaluation),
+    and thousands of scenarios can be evaluated without materializing them.
+
+    Parameters
+    ----------
+    model : callable
+        The vectorized model.
+
+    df_base : pd.DataFrame
+        The base stochastic dataframe.
+
+    scenarios : dict
+        A dictionary mapping scenario names to overlays (as returned by `create_scenario`).
+
+    Returns
+    -------
+    pd.DataFrame
+        A dataframe indexed by scenario name (including ``'base'``), with the column ``parameter_value_stochastic``
+        containing the model outputs of each scenario (rows of a single array).
+    """
+
+    samples: np.ndarray = stats.get_sample_matrix(df_base).copy()
+
+    outputs: np.ndarray = np.empty((len(scenarios) + 1, samples.shape[1]))
+    outputs[0] = model(samples)
+
+    for number, df_overlay in enumerate(scenarios.values(), start=1):
+        positions = df_base.index.get_indexer(df_overlay.index)
+        samples_base = samples[positions]
+        samples[positions] = np.vstack(df_overlay['parameter_value_stochastic'].to_numpy()) if len(df_overlay) else samples_base
+        try:
+            outputs[number] = model(samples)
+        finally:
+            samples[positions] = samples_base
+
+    return pd.DataFrame(
+        data = {'parameter_value_stochastic': list(outputs)},
+        index = pd.Index(['base'] + list(scenarios), name='scenario'),
+    )
@@ -0,0 +1,336 @@
+# %%
+# data science
+import pandas as pd
+import numpy as np
+from scipy.stats import rankdata
+# system
+from concurrent.futures import ProcessPoolExecutor
+# debugging
+import logging
+# local imports
+import ecopylot.stats as stats
+
+
+def _columns_per_batch(number_parameters: int, batch_size_bytes: int) -> int:
+    """
+    Returns the number of model evaluations (columns) that fit in a batch of ``batch_size_bytes``.
+    """
+    return max(1, batch_size_bytes // (8 * max(1, number_parameters)))
+
+
+_worker_state: dict = {} # model and sample matrix of a worker process, set by `_initialize_worker`
+
+
+def _design_batch(
+        samples: np.ndarray,
+        rows: np.ndarray | None,
+        start: int,
+        stop: int
+    ) -> np.ndarray:
+    """
+    Returns the columns ``start:stop`` of a design matrix built from the sample matrix.
+
+    If ``rows`` is ``None``, the design matrix is the sample matrix itself.
+    Otherwise, the sample matrix is split into ``A`` (first half of the iterations) and ``B`` (second half)
+    and the design matrix is the Saltelli design: the matrices ``AB_i`` (``A`` with row ``i`` replaced by the row ``i`` of ``B``)
+    of all ``rows``, concatenated column-wise. Only the requested columns are materialized.
+    """
+
+    if rows is None:
+        return samples[:, start:stop]
+
+    iterations: int = samples.shape[1] // 2
+    flat = np.arange(start, stop)
+    rows_replaced = rows[flat // iterations]
+    columns = flat % iterations
+    batch = samples[:, columns]
+    batch[rows_replaced, np.arange(len(flat))] = samples[rows_replaced, columns + iterations]
+
+    return batch
+
+
+def _initialize_worker(model, samples: np.ndarray, rows: np.ndarray | None) -> None:
+    _worker_state.update(model=model, samples=samples, rows=rows)
+
+
+def _evaluate_worker_batch(start: int, stop: int) -> np.ndarray:
+    return _worker_state['model'](_design_batch(_worker_state['samples'], _worker_state['rows'], start, stop))
+
+
+def _evaluate_design(
+        model,
+        samples: np.ndarray,
+        rows: np.ndarray | None,
+        batch_size_bytes: int,
+        max_workers: int | None = None
+    ) -> np.ndarray:
+    """
+    Evaluates a vectorized model on all columns of a design matrix (see `_design_batch`), batch by batch.
+
+    If ``max_workers`` is larger than one, batches are evaluated in a process pool.
+    The model and the sample matrix are sent once to each worker, which then builds its own batches:
+    only column ranges and model outputs are exchanged between processes.
+    The ``model`` must be picklable (eg. a module-level function).
+
+    Parameters
+    ----------
+    model : callable
+        A function mapping an array of shape ``(parameters, batch)`` to an array of shape ``(batch,)``.
+
+    samples : np.ndarray
+        The sample matrix, of shape ``(parameters, iterations)``.
+
+    rows : np.ndarray or None
+        The rows of the Saltelli design, or ``None`` to evaluate the sample matrix itself.
+
+    batch_size_bytes : int
+        The approximate size of the batches passed to the model.
+
+    max_workers : int, optional
+        The number of worker processes.
+
+    Returns
+    -------
+    np.ndarray
+        The concatenated model outputs.
+    """
+
+    total: int = samples.shape[1] if rows is None else len(rows) * (samples.shape[1] // 2)
+    step: int = _columns_per_batch(samples.shape[0], batch_size_bytes)
+    ranges: list = [(start, min(start + step, total)) for start in range(0, total, step)]
+
+    if max_workers is None or max_workers <= 1:
+        list_outputs: list = [model(_design_batch(samples, rows, start, stop)) for start, stop in ranges]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_initialize_worker, initargs=(model, samples, rows)) as executor:
+            list_outputs: list = list(executor.map(_evaluate_worker_batch, *zip(*ranges)))
+
+    return np.concatenate([np.asarray(outputs, dtype=np.float64).reshape(-1) for outputs in list_outputs])
+
+
+def evaluate_model(
+        model,
+        df: pd.DataFrame,
+        batch_size_bytes: int = 64 * 2**20,
+        max_workers: int | None = None
+    ) -> np.ndarray:
+    """
+    Evaluates a vectorized model on all iterations of a stochastic dataframe.
+
+    The model is a function which takes an array of shape ``(parameters, batch)``
+    (rows in the order of the dataframe, columns a batch of iterations) and returns an array of shape ``(batch,)``, eg.:
+
+    .. code-block:: python
+
+        def model(samples: np.ndarray) -> np.ndarray:
+            return samples[0] * samples[1] + samples[2]
+
+    Parameters
+    ----------
+    model : callable
+        The vectorized model.
+
+    df : pd.DataFrame
+        A stochastic dataframe (as returned by `stats.generate_stochastic_dataframe`).
+
+    batch_size_bytes : int, optional
+        The approximate size of the batches passed to the model.
+
+    max_workers : int, optional
+        The number of worker processes (see `_evaluate_design`).
+
+    Returns
+    -------
+    np.ndarray
+        The model outputs, of shape ``(iterations,)``.
+    """
+
+    return _evaluate_design(
+        model = model,
+        samples = stats.get_sample_matrix(df),
+        rows = None,
+        batch_size_bytes = batch_size_bytes,
+        max_workers = max_workers,
+    )
+
+
+def rank_correlation_coefficients(
+        df: pd.DataFrame,
+        outputs: np.ndarray,
+        chunk_size: int = 1024
+    ) -> pd.Series:
+    """
+    Computes the Spearman rank correlation coefficient between each parameter and the model outputs.
+
+    Ties (eg. for discrete distributions) are assigned average ranks.
+    Parameters are ranked in chunks of ``chunk_size`` rows, so that the rank matrix never exists in full.
+    Constant parameters have a coefficient of ``NaN``.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        A stochastic dataframe.
+
+    outputs : np.ndarray
+        The model outputs, of shape ``(iterations,)`` (eg. as returned by `evaluate_model`).
+
+    Returns
+    -------
+    pd.Series
+        The coefficients, indexed by UID.
+    """
+
+    samples: np.ndarray = stats.get_sample_matrix(df)
+
+    ranks_outputs = rankdata(outputs)
+    ranks_outputs = (ranks_outputs - ranks_outputs.mean()) / np.linalg.norm(ranks_outputs - ranks_outputs.mean())
+
+    coefficients: np.ndarray = np.empty(samples.shape[0])
+    for start in range(0, samples.shape[0], chunk_size):
+        ranks = rankdata(samples[start:start + chunk_size], axis=1)
+        ranks -= ranks.mean(axis=1, keepdims=True)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            coefficients[start:start + chunk_size] = (ranks @ ranks_outputs) / np.linalg.norm(ranks, axis=1)
+
+    return pd.Series(coefficients, index=df.index, name='rank_correlation')
+
+
+def standardized_regression_coefficients(
+        df: pd.DataFrame,
+        outputs: np.ndarray
+    ) -> tuple:
+    """
+    Computes the standardized regression coefficients (SRC) of a linear regression of the model outputs on all parameters.
+
+    The coefficients are those of a least squares fit of the standardized outputs on the standardized parameters.
+    Their squares are a measure of the share of the output variance explained by each parameter,
+    as long as the model is close to linear (ie. the coefficient of determination ``r2`` is close to 1).
+    Constant parameters are excluded from the regression and have a coefficient of ``NaN``.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        A stochastic dataframe.
+
+    outputs : np.ndarray
+        The model outputs, of shape ``(iterations,)``.
+
+    Returns
+    -------
+    tuple
+        A tuple ``(coefficients, r2)`` of the coefficients (``pd.Series`` indexed by UID) and the coefficient of determination.
+
+    Raises
+    ------
+    ValueError
+        If there are not more iterations than (non-constant) parameters.
+    """
+
+    samples: np.ndarray = stats.get_sample_matrix(df)
+
+    std = samples.std(axis=1)
+    mask_varying = std > 0
+    if samples.shape[1] <= mask_varying.sum() + 1:
+        raise ValueError(f"Standardized regression coefficients require more iterations ({samples.shape[1]}) than parameters ({mask_varying.sum()}).")
+
+    design = (samples[mask_varying].T - samples[mask_varying].mean(axis=1)) / std[mask_varying]
+    outputs_standardized = (outputs - outputs.mean()) / outputs.std()
+
+    solution, _, _, _ = np.linalg.lstsq(design, outputs_standardized, rcond=None)
+    r2: float = 1 - np.mean((outputs_standardized - design @ solution)**2)
+
+    coefficients: np.ndarray = np.full(samples.shape[0], np.nan)
+    coefficients[mask_varying] = solution
+
+    return pd.Series(coefficients, index=df.index, name='src'), r2
+
+
+def sobol_indices(
+        model,
+        df: pd.DataFrame,
+        rows: list | None = None,
+        batch_size_bytes: int = 64 * 2**20,
+        max_workers: int | None = None
+    ) -> pd.DataFrame:
+    """
+    Computes first-order and total-order Sobol indices of a vectorized model, using the Saltelli design.
+
+    The iterations of the stochastic dataframe are split into two independent sample matrices ``A`` (first half)
+    and ``B`` (second half) of ``N`` iterations each. For every analyzed parameter ``i``, the model is evaluated
+    on ``AB_i`` (``A`` with row ``i`` taken from ``B``), for a total of ``N * (len(rows) + 2)`` model evaluations.
+    The indices are then estimated according to Saltelli et al. (2010) (first order) and Jansen (1999) (total order):
+
+    .. math::
+
+        S_i = \\frac{1}{V} \\frac{1}{N} \\sum_j f(B)_j \\left( f(AB_i)_j - f(A)_j \\right)
+
+        S_{T,i} = \\frac{1}{V} \\frac{1}{2N} \\sum_j \\left( f(A)_j - f(AB_i)_j \\right)^2
+
+    The design matrices are never built in full: they are generated and evaluated in batches of ``batch_size_bytes``,
+    optionally in parallel (see `_evaluate_design`).
+
+    Parameters
+    ----------
+    model : callable
+        The vectorized model (see `evaluate_model`).
+
+    df : pd.DataFrame
+        A stochastic dataframe with an even number of iterations.
+        Samples must not be correlated (see `stats.generate_stochastic_dataframe`).
+
+    rows : list, optional
+        The UIDs of the parameters to analyze (default: all parameters).
+        All parameters are varied, but indices are only computed for these UIDs.
+
+    batch_size_bytes : int, optional
+        The approximate size of the batches passed to the model.
+
+    max_workers : int, optional
+        The number of worker processes.
+
+    Returns
+    -------
+    pd.DataFrame
+        A dataframe indexed by UID, with columns ``S1`` and ``ST``.
+
+    Raises
+    ------
+    ValueError
+        If the number of iterations is odd or the model outputs have zero variance.
+
+    References
+    ----------
+    Saltelli, A. et al. (2010). Variance based sensitivity analysis of model output. Design and estimator for the total sensitivity index.
+    Computer Physics Communications, 181(2), 259-270.
+    `doi:10.1016/j.cpc.2009.09.018 <https://doi.org/10.1016/j.cpc.2009.09.018>`_
+    """
+
+    samples: np.ndarray = stats.get_sample_matrix(df)
+    if samples.shape[1] % 2:
+        raise ValueError(f"Sobol indices require an even number of iterations (got {samples.shape[1]}).")
+
+    iterations: int = samples.shape[1] // 2
+
+    index: pd.Index = df.index if rows is None else pd.Index(rows)
+    positions: np.ndarray = df.index.get_indexer(index)
+    if (positions < 0).any():
+        raise ValueError(f"Unknown UIDs: {list(index[positions < 0])}")
+
+    outputs_ab: np.ndarray = _evaluate_design(model, samples, None, batch_size_bytes, max_workers)
+    outputs_a, outputs_b = outputs_ab[:iterations], outputs_ab[iterations:]
+
+    variance: float = outputs_ab.var()
+    if variance == 0:
+        raise ValueError("Model outputs have zero variance.")
+
+    outputs_mixed: np.ndarray = _evaluate_design(model, samples, positions, batch_size_bytes, max_workers).reshape(len(positions), iterations)
+
+    logging.info(f"Sobol indices computed from {iterations * (len(positions) + 2)} model evaluations.")
+
+    return pd.DataFrame(
+        data = {
+            'S1': np.mean(outputs_b * (outputs_mixed - outputs_a), axis=1) / variance,
+            'ST': 0.5 * np.mean((outputs_a - outputs_mixed)**2, axis=1) / variance,
+        },
+        index = index,
+    )
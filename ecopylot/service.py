@@ -0,0 +1,363 @@
+# %%
+# data science
+import pandas as pd
+import numpy as np
+# system
+import asyncio
+import json
+import struct
+import pathlib
+import functools
+from pathlib import Path
+from urllib.parse import urlsplit, parse_qs, urlencode
+from collections import OrderedDict
+# debugging
+import logging
+# local imports
+import ecopylot.inout as inout
+import ecopylot.stats as stats
+
+
+HEADER_LENGTH_FORMAT: str = '<I' # length of the JSON header of a binary response
+BLOCK_SIZE_BYTES: int = 4 * 2**20 # size of the sample blocks streamed to the client
+
+
+class SamplingService:
+    """
+    Keeps parsed parameter sets and sampled matrices in memory and coalesces identical concurrent sampling requests.
+
+    Parameter sets are loaded once per file (and reloaded when the file changes).
+    Requests for the same ``(file, iterations, seed, dtype)`` that arrive while a sampling job is running
+    wait for that job instead of starting their own. A job is shielded from its requesters:
+    it completes (and its result is cached) even if the requester that started it is cancelled.
+    Sampled matrices are kept in a least-recently-used cache.
+    Loading and sampling run in the default executor, so that the event loop keeps serving other requests.
+
+    Parameters
+    ----------
+    root : str or pathlib.PurePath
+        The directory containing the parameter files. Requests may only access files below this directory.
+
+    max_cached_samples : int, optional
+        The maximum number of sample matrices kept in memory.
+
+    uncertainty_col : str, optional
+        The name of the column containing the string description of the uncertainty distributions (Excel only).
+
+    list_string_cols : list, optional
+        The list of column names containing string enumerations (Excel only).
+    """
+
+    def __init__(
+            self,
+            root: str | pathlib.PurePath,
+            max_cached_samples: int = 4,
+            uncertainty_col: str = 'uncertainty distribution',
+            list_string_cols: list | None = None
+        ):
+        self.root: pathlib.Path = Path(root).resolve()
+        self.max_cached_samples: int = max_cached_samples
+        self.uncertainty_col: str = uncertainty_col
+        self.list_string_cols: list = list(list_string_cols or [])
+        self.parameter_sets: dict = {}
+        self.samples: OrderedDict = OrderedDict()
+        self.jobs: dict = {}
+        self.statistics: dict = {'requests': 0, 'jobs': 0, 'coalesced': 0, 'cached': 0}
+
+    def _resolve(self, file: str) -> pathlib.Path:
+        path = (self.root / file).resolve()
+        if not path.is_relative_to(self.root):
+            raise PermissionError(f"'{file}' is outside of the service root directory.")
+        if not path.is_file():
+            raise FileNotFoundError(f"'{file}' does not exist.")
+        return path
+
+    def _load_parameter_set(self, path: pathlib.Path) -> pd.DataFrame:
+        modified: int = path.stat().st_mtime_ns
+        if path in self.parameter_sets and self.parameter_sets[path][0] == modified:
+            return self.parameter_sets[path][1]
+        df = inout.load_parameter_file(path, self.uncertainty_col, self.list_string_cols)
+        df = stats._add_distribution_dict_column(df)
+        self.parameter_sets[path] = (modified, df)
+        logging.info(f"Parameter set {path} loaded ({len(df)} rows).")
+        return df
+
+    def _sample(self, path: pathlib.Path, iterations: int, seed: int | None, dtype: str) -> tuple:
+        df = self._load_parameter_set(path)
+        df = stats._sample_parameters_from_distrivution(df.copy(deep=False), iterations, seed, np.dtype(dtype))
+        return list(df.index), stats.get_sample_matrix(df)
+
+    def _job_done(self, key: tuple, job: asyncio.Future) -> None:
+        """
+        Removes a finished job from the running jobs and caches its result.
+        """
+
+        del self.jobs[key]
+        if job.cancelled() or job.exception() is not None:
+            return
+        self.samples[key] = job.result()
+        while len(self.samples) > self.max_cached_samples:
+            self.samples.popitem(last=False)
+
+    async def get_samples(self, file: str, iterations: int, seed: int | None = None, dtype: str = 'float64') -> tuple:
+        """
+        Returns the UIDs and the sample matrix of a parameter file, from the cache, a running job or a new job.
+
+        Raises
+        ------
+        ValueError
+            If ``iterations`` is not positive or ``dtype`` is not a floating-point data type.
+        """
+
+        self.statistics['requests'] += 1
+        if int(iterations) < 1:
+            raise ValueError(f"Invalid number of iterations {iterations} (expected a positive integer).")
+        try:
+            dtype = np.dtype(dtype)
+        except TypeError:
+            raise ValueError(f"Invalid dtype '{dtype}'.") from None
+        if dtype.kind != 'f':
+            raise ValueError(f"Invalid dtype '{dtype}' (expected a floating-point data type, eg. 'float64' or 'float32').")
+        path = self._resolve(file)
+        key: tuple = (path, path.stat().st_mtime_ns, int(iterations), seed, dtype.str)
+
+        if key in self.samples:
+            self.statistics['cached'] += 1
+            self.samples.move_to_end(key)
+            return self.samples[key]
+
+        if key in self.jobs:
+            self.statistics['coalesced'] += 1
+            return await asyncio.shield(self.jobs[key])
+
+        self.statistics['jobs'] += 1
+        job = asyncio.get_running_loop().run_in_executor(None, self._sample, path, int(iterations), seed, dtype.str)
+        self.jobs[key] = job
+        job.add_done_callback(functools.partial(self._job_done, key))
+
+        return await asyncio.shield(job)
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """
+        Handles one HTTP/1.1 request (``GET /samples`` or ``GET /status``) and closes the connection.
+        """
+
+        try:
+            request_line = (await reader.readline()).decode('latin-1').split()
+            while (await reader.readline()) not in (b'\r\n', b'\n', b''): # headers are not used
+                pass
+            if len(request_line) < 2 or request_line[0] != 'GET':
+                await _write_json(writer, 405, {'error': 'Only GET requests are supported.'})
+                return
+
+            url = urlsplit(request_line[1])
+            query: dict = {key: values[-1] for key, values in parse_qs(url.query).items()}
+
+            if url.path == '/status':
+                await _write_json(writer, 200, {
+                    **self.statistics,
+                    'parameter_sets': [str(path) for path in self.parameter_sets],
+                    'cached_samples': len(self.samples),
+                    'running_jobs': len(self.jobs),
+                })
+            elif url.path == '/samples':
+                try:
+                    uids, samples = await self.get_samples(
+                        file = query['file'],
+                        iterations = int(query['iterations']),
+                        seed = int(query['seed']) if 'seed' in query else None,
+                        dtype = query.get('dtype', 'float64'),
+                    )
+                except KeyError as error:
+                    await _write_json(writer, 400, {'error': f"Missing query parameter {error}."})
+                    return
+                except (ValueError, TypeError) as error:
+                    await _write_json(writer, 400, {'error': str(error)})
+                    return
+                except FileNotFoundError as error:
+                    await _write_json(writer, 404, {'error': str(error)})
+                    return
+                except PermissionError as error:
+                    await _write_json(writer, 403, {'error': str(error)})
+                    return
+                except Exception as error:
+                    logging.exception("Sampling job failed.")
+                    await _write_json(writer, 500, {'error': f"{type(error).__name__}: {error}"})
+                    return
+                await _write_samples(writer, uids, samples)
+            else:
+                await _write_json(writer, 404, {'error': f"Unknown path '{url.path}'."})
+        except ConnectionError:
+            logging.info("Client disconnected.")
+        finally:
+            writer.close()
+
+
+async def _write_json(writer: asyncio.StreamWriter, status: int, content: dict) -> None:
+    body: bytes = json.dumps(content).encode('utf-8')
+    writer.write(
+        f"HTTP/1.1 {status} {'OK' if status == 200 else 'Error'}\r\n"
+        f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode('latin-1')
+        + body
+    )
+    await writer.drain()
+
+
+async def _write_samples(writer: asyncio.StreamWriter, uids: list, samples: np.ndarray) -> None:
+    """
+    Streams a sample matrix in the binary format read by `fetch_samples`.
+
+    The body consists of the length of a JSON header (``uint32``), the JSON header
+    (``{"uids": [...], "shape": [rows, iterations], "dtype": "<f8"}``)
+    and the C-ordered sample matrix, sent in blocks of rows of about ``BLOCK_SIZE_BYTES``.
+    """
+
+    header: bytes = json.dumps({
+        'uids': [uid.item() if isinstance(uid, np.generic) else uid for uid in uids],
+        'shape': list(samples.shape),
+        'dtype': samples.dtype.str,
+    }).encode('utf-8')
+
+    writer.write(
+        f"HTTP/1.1 200 OK\r\nContent-Type: application/octet-stream\r\n"
+        f"Content-Length: {struct.calcsize(HEADER_LENGTH_FORMAT) + len(header) + samples.nbytes}\r\nConnection: close\r\n\r\n".encode('latin-1')
+        + struct.pack(HEADER_LENGTH_FORMAT, len(header))
+        + header
+    )
+
+    rows_per_block: int = max(1, BLOCK_SIZE_BYTES // max(1, samples.strides[0]))
+    for start in range(0, samples.shape[0], rows_per_block):
+        writer.write(memoryview(np.ascontiguousarray(samples[start:start + rows_per_block])).cast('B'))
+        await writer.drain()
+
+
+async def start_service(
+        root: str | pathlib.PurePath,
+        host: str = '127.0.0.1',
+        port: int = 8765,
+        unix_socket: str | pathlib.PurePath | None = None,
+        max_cached_samples: int = 4,
+        uncertainty_col: str = 'uncertainty distribution',
+        list_string_cols: list | None = None
+    ) -> asyncio.AbstractServer:
+    """
+    Starts a local sampling service and returns the running server.
+
+    The service answers HTTP/1.1 ``GET`` requests:
+
+    - ``/samples?file=<path relative to root>&iterations=<int>[&seed=<int>][&dtype=float32]``:
+      the UIDs and the sample matrix of the parameter file, as a binary stream (see `_write_samples`).
+    - ``/status``: request statistics (requests, sampling jobs, coalesced and cached requests) as JSON.
+
+    The service listens on ``host`` (localhost by default) or, if provided, on the Unix socket ``unix_socket``.
+    It is meant for tools running on the same machine; it does not implement authentication.
+
+    Example
+    -------
+    .. code-block:: python
+
+        async def main():
+            server = await service.start_service(root='data/', port=8765)
+            async with server:
+                await server.serve_forever()
+
+    Parameters
+    ----------
+    root : str or pathlib.PurePath
+        The directory containing the parameter files.
+
+    host : str, optional
+        The host to listen on.
+
+    port : int, optional
+        The port to listen on (``0``: any free port, see ``server.sockets[0].getsockname()``).
+
+    unix_socket : str or pathlib.PurePath, optional
+        The path of a Unix socket to listen on instead of ``host`` and ``port``.
+
+    max_cached_samples : int, optional
+        The maximum number of sample matrices kept in memory.
+
+    uncertainty_col : str, optional
+        The name of the column containing the string description of the uncertainty distributions (Excel only).
+
+    list_string_cols : list, optional
+        The list of column names containing string enumerations (Excel only).
+
+    Returns
+    -------
+    asyncio.AbstractServer
+        The running server.
+    """
+
+    sampling_service = SamplingService(root, max_cached_samples, uncertainty_col, list_string_cols)
+
+    if unix_socket is not None:
+        server = await asyncio.start_unix_server(sampling_service.handle_connection, path=str(unix_socket))
+    else:
+        server = await asyncio.start_server(sampling_service.handle_connection, host=host, port=port)
+
+    server.sampling_service = sampling_service
+    logging.info(f"Sampling service listening on {unix_socket or server.sockets[0].getsockname()} (root: {sampling_service.root}).")
+
+    return server
+
+
+async def fetch_samples_async(
+        file: str,
+        iterations: int,
+        seed: int | None = None,
+        dtype: str = 'float64',
+        host: str = '127.0.0.1',
+        port: int = 8765,
+        unix_socket: str | pathlib.PurePath | None = None
+    ) -> tuple:
+    """
+    Requests samples from a running sampling service (see `start_service`).
+
+    Returns
+    -------
+    tuple
+        A tuple ``(uids, samples)`` of the list of UIDs and the sample matrix of shape ``(rows, iterations)``.
+
+    Raises
+    ------
+    ValueError
+        If the service answers with an error.
+    """
+
+    if unix_socket is not None:
+        reader, writer = await asyncio.open_unix_connection(str(unix_socket), limit=BLOCK_SIZE_BYTES)
+    else:
+        reader, writer = await asyncio.open_connection(host, port, limit=BLOCK_SIZE_BYTES) # a larger buffer limit avoids pausing the transport every 128 KiB
+
+    query: str = urlencode({'file': file, 'iterations': int(iterations), 'dtype': dtype} | ({} if seed is None else {'seed': int(seed)}))
+    writer.write(f"GET /samples?{query} HTTP/1.1\r\nHost: {host}\r\nConnection: close\r\n\r\n".encode('latin-1'))
+    await writer.drain()
+
+    try:
+        status: int = int((await reader.readline()).split()[1])
+        headers: dict = {}
+        while (line := await reader.readline()) not in (b'\r\n', b''):
+            key, _, value = line.decode('latin-1').partition(':')
+            headers[key.strip().lower()] = value.strip()
+        body: bytes = await reader.readexactly(int(headers['content-length']))
+    finally:
+        writer.close()
+
+    if status != 200:
+        raise ValueError(f"Sampling service error {status}: {json.loads(body)['error']}")
+
+    (length,) = struct.unpack_from(HEADER_LENGTH_FORMAT, body, 0)
+    offset: int = struct.calcsize(HEADER_LENGTH_FORMAT)
+    header: dict = json.loads(body[offset:offset + length])
+    samples: np.ndarray = np.frombuffer(body, dtype=np.dtype(header['dtype']), offset=offset + length).reshape(header['shape'])
+
+    return header['uids'], samples
+
+
+def fetch_samples(*args, **kwargs) -> tuple:
+    """
+    Synchronous wrapper of `fetch_samples_async`.
+    """
+    return asyncio.run(fetch_samples_async(*args, **kwargs))
@@ -0,0 +1,247 @@
+# %%
+# data science
+import pandas as pd
+import numpy as np
+# system
+import pickle
+import struct
+import fcntl
+import tempfile
+from pathlib import Path
+from multiprocessing import shared_memory, resource_tracker
+# debugging
+import logging
+# local imports
+import ecopylot.stats as stats
+
+
+HEADER_FORMAT: str = '<qq' # reference count, length of the pickled layout
+HEADER_SIZE: int = struct.calcsize(HEADER_FORMAT)
+ALIGNMENT: int = 64 # bytes
+EXCLUDED_COLUMNS: tuple = ('parameter_value_stochastic', 'parameter_value_distribution_dict')
+
+
+def _aligned(offset: int) -> int:
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def _encode_metadata_column(series: pd.Series) -> tuple:
+    """
+    Encodes a metadata column into a fixed-size array and (for non-numeric columns) a list of unique values.
+
+    Numeric and boolean columns are stored as-is. All other columns (strings, lists, mixed) are stored as ``int32`` codes
+    into their unique values; list-valued cells are encoded as tuples.
+
+    Returns
+    -------
+    tuple
+        A tuple ``(array, uniques)``, where ``uniques`` is ``None`` for numeric columns.
+    """
+
+    if series.dtype.kind in 'biuf':
+        return series.to_numpy(), None
+
+    keys: np.ndarray = np.empty(len(series), dtype=object)
+    keys[:] = [tuple(value) if isinstance(value, (list, np.ndarray)) else value for value in series.to_numpy(dtype=object)]
+    codes, uniques = pd.factorize(keys, use_na_sentinel=True)
+
+    return codes.astype(np.int32), list(uniques)
+
+
+def _decode_metadata_column(array: np.ndarray, uniques: list | None) -> np.ndarray:
+    """
+    Decodes a metadata column encoded by `_encode_metadata_column`.
+    """
+
+    if uniques is None:
+        return array
+
+    values: np.ndarray = np.empty(len(uniques) + 1, dtype=object)
+    values[:-1] = [list(unique) if isinstance(unique, tuple) else unique for unique in uniques]
+    values[-1] = np.nan # code -1
+
+    return values[array]
+
+
+def _reference_count_lock(name: str) -> Path:
+    return Path(tempfile.gettempdir()) / f'ecopylot_{name}.lock'
+
+
+def _update_reference_count(shm: shared_memory.SharedMemory, increment: int) -> int:
+    """
+    Atomically adds ``increment`` to the reference count stored in the first bytes of the shared memory block
+    and returns the new count. Processes are synchronized with a file lock.
+    """
+
+    with open(_reference_count_lock(shm.name), 'a') as file_lock:
+        fcntl.flock(file_lock, fcntl.LOCK_EX)
+        count, length = struct.unpack_from(HEADER_FORMAT, shm.buf, 0)
+        count += increment
+        struct.pack_into(HEADER_FORMAT, shm.buf, 0, count, length)
+        fcntl.flock(file_lock, fcntl.LOCK_UN)
+
+    return count
+
+
+def _untrack(shm: shared_memory.SharedMemory) -> None:
+    """
+    Stops the ``multiprocessing`` resource tracker from unlinking the shared memory block when this process exits.
+
+    Without this, the block would be removed as soon as the first attached process exits (see `bpo-39959 <https://bugs.python.org/issue39959>`_),
+    regardless of other processes still using it. Its lifetime is managed by the reference count instead.
+    """
+    resource_tracker.unregister(shm._name, 'shared_memory')
+
+
+def publish_stochastic_dataframe(
+        df: pd.DataFrame,
+        name: str | None = None
+    ) -> shared_memory.SharedMemory:
+    """
+    Publishes the sample matrix and the metadata of a stochastic dataframe in a shared memory block.
+
+    The block can then be attached to by name from any process on the same machine
+    (see `attach_stochastic_dataframe`), without copying or pickling the samples:
+    ``N`` worker processes cost one copy of memory.
+
+    The block has the layout:
+
+    +------------------+----------------------------------------------------------------------+
+    | bytes            | content                                                              |
+    +==================+======================================================================+
+    | 0 - 16           | reference count, length of the layout                                |
+    +------------------+----------------------------------------------------------------------+
+    | 16 - ...         | layout (pickled: index, columns, dtypes, offsets, unique values)     |
+    +------------------+----------------------------------------------------------------------+
+    | (64-byte align.) | sample matrix ``(rows, iterations)``                                 |
+    +------------------+----------------------------------------------------------------------+
+    | (64-byte align.) | one array per metadata column (numeric values, or ``int32`` codes)   |
+    +------------------+----------------------------------------------------------------------+
+
+    The publishing process holds the first reference and must release it with `release_stochastic_dataframe`.
+    The block is removed when the last reference is released.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        A stochastic dataframe (as returned by `stats.generate_stochastic_dataframe`).
+
+    name : str, optional
+        The name of the shared memory block. If not provided, a unique name is generated.
+
+    Returns
+    -------
+    shared_memory.SharedMemory
+        The shared memory block. Its name is ``shm.name``.
+    """
+
+    samples: np.ndarray = stats.get_sample_matrix(df)
+    columns: list = [col for col in df.columns if col not in EXCLUDED_COLUMNS]
+
+    list_arrays: list = [samples]
+    layout: dict = {'index': df.index, 'columns': []}
+    for col in columns:
+        array, uniques = _encode_metadata_column(df[col])
+        list_arrays.append(array)
+        layout['columns'].append({'name': col, 'uniques': uniques})
+
+    # offsets depend on the length of the pickled layout, which depends on the offsets: reserve space for the largest offsets
+    list_specs: list = [{'dtype': array.dtype.str, 'shape': array.shape, 'offset': 2**62} for array in list_arrays]
+    layout['arrays'] = list_specs
+    offset: int = _aligned(HEADER_SIZE + len(pickle.dumps(layout, protocol=pickle.HIGHEST_PROTOCOL)))
+    for spec, array in zip(list_specs, list_arrays):
+        spec['offset'] = offset
+        offset = _aligned(offset + array.nbytes)
+    layout_bytes: bytes = pickle.dumps(layout, protocol=pickle.HIGHEST_PROTOCOL)
+
+    shm = shared_memory.SharedMemory(name=name, create=True, size=max(offset, 1))
+    _untrack(shm)
+
+    struct.pack_into(HEADER_FORMAT, shm.buf, 0, 1, len(layout_bytes))
+    shm.buf[HEADER_SIZE:HEADER_SIZE + len(layout_bytes)] = layout_bytes
+    for spec, array in zip(list_specs, list_arrays):
+        np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf, offset=spec['offset'])[...] = array
+
+    logging.info(f"Stochastic dataframe published to shared memory '{shm.name}' ({shm.size / 2**20:.1f} MiB).")
+
+    return shm
+
+
+def attach_stochastic_dataframe(name: str) -> tuple:
+    """
+    Attaches to a stochastic dataframe published with `publish_stochastic_dataframe`.
+
+    The arrays of the ``parameter_value_stochastic`` column are read-only views of the shared sample matrix
+    (so that `stats.get_sample_matrix` returns the shared matrix without copying).
+    Metadata columns are decoded into regular (process-local) columns.
+
+    Each call adds a reference to the block, which must be released with `release_stochastic_dataframe`
+    once the dataframe (and all arrays derived from it) are no longer used.
+
+    Parameters
+    ----------
+    name : str
+        The name of the shared memory block.
+
+    Returns
+    -------
+    tuple
+        A tuple ``(df, shm)`` of the stochastic dataframe and the shared memory block.
+    """
+
+    shm = shared_memory.SharedMemory(name=name, create=False)
+    _untrack(shm)
+    _update_reference_count(shm, +1)
+
+    _, length = struct.unpack_from(HEADER_FORMAT, shm.buf, 0)
+    layout: dict = pickle.loads(shm.buf[HEADER_SIZE:HEADER_SIZE + length])
+
+    list_arrays: list = []
+    for spec in layout['arrays']:
+        array = np.ndarray(spec['shape'], dtype=np.dtype(spec['dtype']), buffer=shm.buf, offset=spec['offset'])
+        array.flags.writeable = False
+        list_arrays.append(array)
+
+    df = pd.DataFrame(
+        data = {
+            column['name']: _decode_metadata_column(array, column['uniques'])
+            for column, array in zip(layout['columns'], list_arrays[1:])
+        },
+        index = layout['index'],
+    )
+    df['parameter_value_stochastic'] = list(list_arrays[0])
+
+    return df, shm
+
+
+def _unlink(name: str) -> None:
+    shm = shared_memory.SharedMemory(name=name, create=False) # registered with the resource tracker, unregistered by unlink()
+    shm.close()
+    shm.unlink()
+
+
+def release_stochastic_dataframe(shm: shared_memory.SharedMemory) -> None:
+    """
+    Releases a reference to a shared stochastic dataframe, and removes the block when the last reference is released.
+
+    If arrays of the shared block are still in use in this process, the mapping of this process
+    is kept until they are garbage collected, but the reference is released.
+
+    Parameters
+    ----------
+    shm : shared_memory.SharedMemory
+        The shared memory block, as returned by `publish_stochastic_dataframe` or `attach_stochastic_dataframe`.
+    """
+
+    count: int = _update_reference_count(shm, -1)
+    name: str = shm.name
+
+    try:
+        shm.close()
+    except BufferError:
+        logging.warning(f"Arrays of shared memory '{name}' are still in use; the mapping is kept until they are released.")
+
+    if count <= 0:
+        _unlink(name)
+        _reference_count_lock(name).unlink(missing_ok=True)
+        logging.info(f"Shared memory '{name}' removed (last reference released).")
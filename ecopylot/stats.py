@@ -5,11 +5,13 @@ import numpy as np
 import stats_arrays as sarrays # for uncertainty distributions
 # system
 import pathlib
+import hashlib
 # debugging
 import logging
 
 # local imports
 # import ecopylot.utils as utils
+import ecopylot.correlation as correlation_module
 
 # utils.load_project_configuration()
 
@@ -40,13 +42,13 @@ def _add_distribution_dict_column(df: pd.DataFrame) -> pd.DataFrame:
     
     and adds a column ``parameter_value_distribution_dict`` to return a dataframe of the form:
 
-    +-------------+-----------+-----+----------------------------------------------------+
-    | UID (index) | parameter | ... | parameter_value_distribution_dict                  |
-    +=============+===========+=====+====================================================+
-    | 123         | foo       | ... | {"loc": 0.1}                                       |
-    +-------------+-----------+-----+----------------------------------------------------+
-    | 456         | bar       | ... | {"loc": 8.4, "min": 2, "max": 11.2}                |
-    +-------------+-----------+-----+----------------------------------------------------+
+    +-------------+-----------+-----+----------------------------------------------------------------------+
+    | UID (index) | parameter | ... | parameter_value_distribution_dict                                    |
+    +=============+===========+=====+======================================================================+
+    | 123         | foo       | ... | {"loc": 0.1, "uncertainty_type": 1}                                  |
+    +-------------+-----------+-----+----------------------------------------------------------------------+
+    | 456         | bar       | ... | {"loc": 8.4, "minimum": 2, "maximum": 11.2, "uncertainty_type": 5}   |
+    +-------------+-----------+-----+----------------------------------------------------------------------+
 
     Parameters
     ----------
@@ -79,17 +81,288 @@ def _add_distribution_dict_column(df: pd.DataFrame) -> pd.DataFrame:
         'minimum',
         'maximum',
     ]
-    distribution_columns_present: list = list(set(distributions_columns_all).intersection(df.columns))
+    distribution_columns_present: list = [col for col in distributions_columns_all if col in df.columns]
 
-    if not any(col in df.columns for col in distributions_columns_all):
-        raise Exception(f"DataFrame does not contain any of the distribution-related columns: {distributions_columns}")
+    if not distribution_columns_present:
+        raise Exception(f"DataFrame does not contain any of the distribution-related columns: {distributions_columns_all}")
 
-    df['parameter_value_distribution_dict'] = df[distribution_columns_present].apply(lambda x: x.dropna().to_dict(), axis=1)
+    if 'uncertainty_type' in df.columns:
+        distribution_columns_present.append('uncertainty_type')
+
+    df['parameter_value_distribution_dict'] = [
+        {key: value for key, value in record.items() if pd.notna(value)}
+        for record in df[distribution_columns_present].to_dict('records')
+    ]
 
     return df
 
 
-def _sample_parameters_from_distrivution(df: pd.DataFrame, iterations: int) -> pd.DataFrame:
+def _accumulate_precision_error(
+        precision: dict,
+        rows: slice,
+        samples_reference: np.ndarray,
+        samples: np.ndarray
+    ) -> None:
+    """
+    Accumulates the rounding error of a block of reduced-precision samples.
+
+    The function updates, in place, the dictionary ``precision`` with
+    the maximum absolute and relative element-wise rounding error
+    as well as per-row sums and sums of squares (in ``float64``)
+    of both the reference and the reduced-precision samples.
+    These are used by `_precision_report` to compute the error of the mean and standard deviation.
+
+    Parameters
+    ----------
+    precision : dict
+        The dictionary to update. Must contain the per-row arrays
+        ``sum_reference``, ``sum``, ``sum_squares_reference`` and ``sum_squares``.
+
+    rows : slice
+        The rows of the block.
+
+    samples_reference : np.ndarray
+        The block of samples in ``float64``.
+
+    samples : np.ndarray
+        The same block of samples, in reduced precision.
+    """
+
+    samples_upcast: np.ndarray = samples.astype(np.float64)
+    precision['sum'][rows] += samples_upcast.sum(axis=1)
+    precision['sum_squares'][rows] += np.einsum('ij,ij->i', samples_upcast, samples_upcast)
+    precision['sum_reference'][rows] += samples_reference.sum(axis=1)
+    precision['sum_squares_reference'][rows] += np.einsum('ij,ij->i', samples_reference, samples_reference)
+
+    error: np.ndarray = np.subtract(samples_upcast, samples_reference, out=samples_upcast) # reuse the buffer
+    np.abs(error, out=error)
+    precision['max_abs_error'] = max(precision.get('max_abs_error', 0.0), float(error.max(initial=0.0)))
+    np.divide(error, np.abs(samples_reference), out=error, where=samples_reference != 0)
+    error[samples_reference == 0] = 0.0
+    precision['max_rel_error'] = max(precision.get('max_rel_error', 0.0), float(error.max(initial=0.0)))
+
+
+def _precision_report(precision: dict, iterations: int) -> dict:
+    """
+    Computes the numerical error of key statistics introduced by reduced-precision sample storage.
+
+    Parameters
+    ----------
+    precision : dict
+        The dictionary filled by `_accumulate_precision_error`.
+
+    iterations : int
+        The number of iterations.
+
+    Returns
+    -------
+    dict
+        A dictionary of the form:
+
+        .. code-block:: python
+
+            {
+                'max_abs_error': 4.7e-07, # element-wise
+                'max_rel_error': 5.9e-08, # element-wise
+                'mean_max_rel_error': 1.2e-08, # maximum over all parameters
+                'std_max_rel_error': 2.1e-08, # maximum over all parameters
+            }
+    """
+
+    def _max_relative_difference(reference: np.ndarray, value: np.ndarray) -> float:
+        magnitude = np.abs(reference)
+        difference = np.abs(value - reference)
+        relative = np.divide(difference, magnitude, out=np.zeros_like(difference), where=magnitude > 0)
+        return float(relative.max(initial=0.0))
+
+    mean_reference = precision['sum_reference'] / iterations
+    mean = precision['sum'] / iterations
+    std_reference = np.sqrt(np.maximum(precision['sum_squares_reference'] / iterations - mean_reference**2, 0))
+    std = np.sqrt(np.maximum(precision['sum_squares'] / iterations - mean**2, 0))
+
+    return {
+        'max_abs_error': precision.get('max_abs_error', 0.0),
+        'max_rel_error': precision.get('max_rel_error', 0.0),
+        'mean_max_rel_error': _max_relative_difference(mean_reference, mean),
+        'std_max_rel_error': _max_relative_difference(std_reference, std),
+    }
+
+
+def _generate_samples_chunked(
+        parameters: np.ndarray,
+        iterations: int,
+        dtype: np.dtype,
+        precision: dict | None = None,
+        chunk_size_bytes: int = 16 * 2**20
+    ) -> np.ndarray:
+    """
+    Generates samples for a ``stats_arrays`` parameter array into a preallocated array of type ``dtype``.
+
+    Samples are generated with a single `stats_arrays.MCRandomNumberGenerator`,
+    in chunks of iterations of at most ``chunk_size_bytes`` (in ``float64``),
+    which are converted to ``dtype`` as they are written.
+    The full ``float64`` sample matrix therefore never exists in memory.
+
+    Parameters
+    ----------
+    parameters : np.ndarray
+        A ``stats_arrays`` parameter array, as returned by `stats_arrays.UncertaintyBase.from_dicts`.
+
+    iterations : int
+        The number of iterations to generate.
+
+    dtype : np.dtype
+        The data type in which the samples are stored.
+
+    precision : dict, optional
+        If provided, the rounding error introduced by ``dtype`` is accumulated in this dictionary
+        (see `_accumulate_precision_error`).
+
+    chunk_size_bytes : int, optional
+        The maximum size of a ``float64`` chunk.
+
+    Returns
+    -------
+    np.ndarray
+        The samples, of shape ``(len(parameters), iterations)``.
+    """
+
+    number_rows: int = len(parameters)
+    iterations_per_chunk: int = max(1, chunk_size_bytes // (8 * max(number_rows, 1)))
+
+    montecarlogen: sarrays.MCRandomNumberGenerator = sarrays.MCRandomNumberGenerator(parameters)
+    samples: np.ndarray = np.empty((number_rows, int(iterations)), dtype=dtype)
+
+    for start in range(0, int(iterations), iterations_per_chunk):
+        stop: int = min(start + iterations_per_chunk, int(iterations))
+        chunk: np.ndarray = montecarlogen.generate(stop - start).reshape(number_rows, stop - start)
+        samples[:, start:stop] = chunk
+        if precision is not None:
+            _accumulate_precision_error(precision, slice(None), chunk, samples[:, start:stop])
+
+    return samples
+
+
+def _uid_seed_entropy(uids: pd.Index, seed: int) -> np.ndarray:
+    """
+    Derives deterministic per-UID seed entropy from a global seed.
+
+    Each UID is hashed (using BLAKE2b) to a 64-bit integer. Together with the global seed,
+    this forms the entropy of a `numpy.random.SeedSequence` for the UID.
+    In contrast to Python's built-in `hash`, the result is identical across processes and machines.
+
+    Parameters
+    ----------
+    uids : pd.Index
+        The UIDs of the parameters.
+
+    seed : int
+        The global seed.
+
+    Returns
+    -------
+    np.ndarray
+        An array of shape ``(len(uids), 2)`` of ``[seed, uid_hash]`` pairs.
+    """
+
+    uid_hashes: np.ndarray = np.fromiter(
+        (
+            int.from_bytes(hashlib.blake2b(str(uid).encode(), digest_size=8).digest(), 'little')
+            for uid in uids
+        ),
+        dtype = np.uint64,
+        count = len(uids)
+    )
+
+    return np.column_stack([np.full(len(uids), seed, dtype=np.uint64), uid_hashes])
+
+
+def _generate_samples_per_uid(
+        parameters: np.ndarray,
+        uids: pd.Index,
+        iterations: int,
+        seed: int,
+        dtype: np.dtype = np.float64,
+        precision: dict | None = None,
+        maximum_iterations: int = 50
+    ) -> np.ndarray:
+    """
+    Generates samples for a ``stats_arrays`` parameter array, using one random stream per UID.
+
+    In contrast to `stats_arrays.MCRandomNumberGenerator`, which draws all parameters from a single
+    random stream, the samples of each row depend only on ``(seed, UID)``
+    and the distribution of the row. Adding, removing or changing other rows
+    therefore does not change the samples of a row.
+
+    Parameters
+    ----------
+    parameters : np.ndarray
+        A ``stats_arrays`` parameter array, as returned by `stats_arrays.UncertaintyBase.from_dicts`.
+
+    uids : pd.Index
+        The UIDs of the parameters (one per row of ``parameters``).
+
+    iterations : int
+        The number of iterations to generate.
+
+    seed : int
+        The global seed.
+
+    dtype : np.dtype, optional
+        The data type in which the samples are stored.
+
+    precision : dict, optional
+        If provided, the rounding error introduced by ``dtype`` is accumulated in this dictionary
+        (see `_accumulate_precision_error`).
+
+    maximum_iterations : int, optional
+        The number of times to draw samples that fit within the bounds, if any.
+
+    Returns
+    -------
+    np.ndarray
+        The samples, of shape ``(len(parameters), iterations)``.
+
+    Raises
+    ------
+    ValueError
+        If an uncertainty type is not valid.
+    """
+
+    uncertainty_types: np.ndarray = parameters['uncertainty_type']
+
+    for uncertainty_type in np.unique(uncertainty_types):
+        if uncertainty_type not in sarrays.uncertainty_choices.id_dict:
+            raise ValueError(f"Uncertainty type id {uncertainty_type} is not valid")
+        sarrays.uncertainty_choices[uncertainty_type].validate(parameters[uncertainty_types == uncertainty_type])
+
+    entropy: np.ndarray = _uid_seed_entropy(uids, seed)
+    samples: np.ndarray = np.empty((len(parameters), int(iterations)), dtype=dtype)
+
+    for row in range(len(parameters)):
+        random_state = np.random.RandomState(np.random.PCG64(entropy[row].tolist()))
+        samples_row: np.ndarray = sarrays.uncertainty_choices[uncertainty_types[row]].bounded_random_variables(
+            parameters[row:row + 1],
+            int(iterations),
+            random_state,
+            maximum_iterations
+        ).reshape(1, int(iterations))
+        samples[row] = samples_row
+        if precision is not None:
+            _accumulate_precision_error(precision, slice(row, row + 1), samples_row, samples[row:row + 1])
+
+    return samples
+
+
+def _sample_parameters_from_distrivution(
+        df: pd.DataFrame,
+        iterations: int,
+        seed: int | None = None,
+        dtype: np.dtype = np.float64,
+        correlation: dict | None = None,
+        counter_based: bool = False,
+        rtol: float | None = None
+    ) -> pd.DataFrame:
     """
     Adds a stochastic column to the dataframe.
 
@@ -115,6 +388,19 @@ def _sample_parameters_from_distrivution(df: pd.DataFrame, iterations: int) -> p
     +-------------+-----------+-----+----------------------------------------------------+
     | 456         | bar       | ... | [6.52059172, 5.89316567, 8.15385019]               |
     +-------------+-----------+-----+----------------------------------------------------+
+
+    If ``seed`` is ``None``, all parameters are sampled from a single random stream
+    using `stats_arrays.MCRandomNumberGenerator`.
+    Otherwise, each UID is sampled from its own random stream (see `_generate_samples_per_uid`),
+    or, if ``counter_based`` is ``True``, from a counter-based random stream (see `counter_rng.generate_samples`),
+    with tabulated inverse cumulative distribution functions if ``rtol`` is provided.
+
+    If ``dtype`` is not ``float64``, samples are converted to ``dtype`` as they are generated
+    and the numerical error introduced in key statistics is stored in ``df.attrs['sample_precision']``
+    (see `_precision_report`).
+
+    If ``correlation`` is provided, the rank correlation specification is imposed on the samples
+    (see `correlation.impose_rank_correlation`).
     """
 
     if 'parameter_value_distribution_dict' not in df.columns:
@@ -123,17 +409,56 @@ def _sample_parameters_from_distrivution(df: pd.DataFrame, iterations: int) -> p
     list_of_dicts: list = list(df['parameter_value_distribution_dict'])
 
     parameters: np.ndarray = sarrays.UncertaintyBase.from_dicts(*list_of_dicts)
-    
-    montecarlogen: sarrays.MCRandomNumberGenerator = sarrays.MCRandomNumberGenerator(parameters)
 
-    parameters_stochastic: np.ndarray = montecarlogen.generate(int(iterations))
+    dtype = np.dtype(dtype)
+    precision: dict | None = None
+    if dtype != np.float64:
+        precision = {
+            key: np.zeros(len(df))
+            for key in ['sum_reference', 'sum', 'sum_squares_reference', 'sum_squares']
+        }
+
+    if rtol is not None and not counter_based:
+        raise ValueError("Tabulated inverse cumulative distribution functions (rtol) require counter-based sampling.")
+
+    if counter_based:
+        if seed is None:
+            raise ValueError("Counter-based sampling requires a seed.")
+        import ecopylot.counter_rng as counter_rng # imported here, as counter_rng depends on this module
+        parameters_stochastic: np.ndarray = counter_rng._generate_samples_counter_based(parameters, df.index, int(iterations), seed, dtype, precision, rtol)
+    elif seed is not None:
+        parameters_stochastic: np.ndarray = _generate_samples_per_uid(parameters, df.index, iterations, seed, dtype, precision)
+    elif precision is not None:
+        parameters_stochastic: np.ndarray = _generate_samples_chunked(parameters, iterations, dtype, precision)
+    else:
+        montecarlogen: sarrays.MCRandomNumberGenerator = sarrays.MCRandomNumberGenerator(parameters)
+        parameters_stochastic: np.ndarray = montecarlogen.generate(int(iterations))
+
+    parameters_stochastic = parameters_stochastic.reshape(len(df), int(iterations)) # generate(1) returns a 1-d array
+
+    if correlation is not None:
+        correlation_module.impose_rank_correlation(parameters_stochastic, df, correlation, seed)
 
     df['parameter_value_stochastic'] =  list(parameters_stochastic)
+    df.attrs['counter_based'] = bool(counter_based) # required to regenerate or update the samples (see `update_stochastic_dataframe`)
+    df.attrs['rtol'] = rtol
+
+    if precision is not None:
+        df.attrs['sample_precision'] = _precision_report(precision, int(iterations))
+        logging.info(f"Samples stored as {dtype} (numerical error: {df.attrs['sample_precision']}).")
 
     return df
 
 
-def generate_stochastic_dataframe(df: pd.DataFrame, iterations: int) -> pd.DataFrame:
+def generate_stochastic_dataframe(
+        df: pd.DataFrame,
+        iterations: int,
+        seed: int | None = None,
+        dtype: np.dtype = np.float64,
+        correlation: dict | None = None,
+        counter_based: bool = False,
+        rtol: float | None = None
+    ) -> pd.DataFrame:
     """
     Adds a stochastic column to the dataframe.
 
@@ -166,9 +491,215 @@ def generate_stochastic_dataframe(df: pd.DataFrame, iterations: int) -> pd.DataF
     iterations : int
         The number of iterations to generate.
 
+    seed : int, optional
+        If provided, each UID is sampled from its own random stream derived from ``(seed, UID)``.
+        The samples of a UID are then reproducible and independent of all other rows,
+        which is required by `update_stochastic_dataframe`.
+
+    dtype : np.dtype, optional
+        The data type in which the samples are stored (default: ``float64``).
+        With ``np.float32``, the memory of the samples is halved. Samples are generated in chunks,
+        so that the full ``float64`` sample matrix never exists in memory.
+        The numerical error introduced in key statistics (element-wise, mean and standard deviation)
+        is reported in ``df.attrs['sample_precision']``, eg.:
+
+        .. code-block:: python
+
+            {'max_abs_error': 4.7e-07, 'max_rel_error': 5.9e-08, 'mean_max_rel_error': 1.2e-08, 'std_max_rel_error': 2.1e-08}
+
+    correlation : dict, optional
+        A sparse rank correlation specification between UIDs and/or metadata groups, eg.:
+
+        .. code-block:: python
+
+            {'pairs': [('uid_1', 'uid_2', 0.8)], 'groups': [(['Propulsor', 'year'], 0.6)]}
+
+        The correlation is imposed by reordering the iterations of the correlated parameters (Iman-Conover method),
+        block by block, without changing their marginal distributions (see `correlation.impose_rank_correlation`).
+        The samples of correlated UIDs then depend on the other UIDs of their block,
+        which must be taken into account when using `update_stochastic_dataframe`.
+
+    counter_based : bool, optional
+        If ``True`` (requires ``seed``), samples are generated with a counter-based random number generator:
+        each sample is a pure function of ``(seed, UID, iteration)``, so that any slice of the sample matrix
+        can later be regenerated directly with `counter_rng.generate_samples`, without storing the matrix.
+        Samples are generated by inverse transform sampling (bounded distributions are sampled from the truncated distribution).
+
+    rtol : float, optional
+        If provided (requires ``counter_based``), gamma, beta, Student's t and Beta-PERT rows are sampled
+        by interpolation in inverse cumulative distribution function tables with this error bound (eg. ``1e-8``),
+        see `inverse_cdf.tabulated_ppf`. The gain is relative to the exact (iterative) inverse functions
+        of counter-based sampling only, and only if many rows share their shape parameters (one table is built per shape;
+        with unique shapes, building the tables costs more than it saves). Counter-based sampling with ``rtol``
+        is at best about as fast as the default (``counter_based=False``) sampling, never faster.
+        The samples can be regenerated with ``counter_rng.generate_samples(..., rtol=rtol)``.
+
     """
     
     df = _add_distribution_dict_column(df)
-    df = _sample_parameters_from_distrivution(df, iterations)
+    df = _sample_parameters_from_distrivution(df, iterations, seed, dtype, correlation, counter_based, rtol)
+
+    return df
+
+
+def get_sample_matrix(df: pd.DataFrame) -> np.ndarray:
+    """
+    Returns the samples of a stochastic dataframe as a 2-d array.
+
+    The function takes a dataframe of the form (as returned by `generate_stochastic_dataframe`):
+
+    +-------------+-----------+-----+----------------------------------------------------+
+    | UID (index) | parameter | ... | parameter_value_stochastic                         |
+    +=============+===========+=====+====================================================+
+    | 123         | foo       | ... | [0.1, 0.1, 0.1]                                    |
+    +-------------+-----------+-----+----------------------------------------------------+
+    | 456         | bar       | ... | [6.52059172, 5.89316567, 8.15385019]               |
+    +-------------+-----------+-----+----------------------------------------------------+
+
+    and returns an array of shape ``(rows, iterations)``.
+    If the arrays of the ``parameter_value_stochastic`` column are consecutive rows of a single array
+    (which is the case directly after `generate_stochastic_dataframe`), this array is returned without copying.
+    Otherwise (eg. after filtering or reordering rows), the rows are stacked into a new array.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        A stochastic dataframe.
+
+    Returns
+    -------
+    np.ndarray
+        The sample matrix, of shape ``(rows, iterations)``.
+    """
+
+    if 'parameter_value_stochastic' not in df.columns:
+        raise ValueError("DataFrame does not have 'parameter_value_stochastic' column")
+
+    list_arrays: list = list(df['parameter_value_stochastic'])
+
+    if len(list_arrays) == 0:
+        return np.empty((0, 0))
+
+    base = list_arrays[0].base
+    if (
+        isinstance(base, np.ndarray)
+        and base.ndim == 2
+        and base.flags['C_CONTIGUOUS']
+        and base.shape[0] == len(list_arrays)
+        and all(array.base is base for array in list_arrays)
+    ):
+        addresses = np.array([array.__array_interface__['data'][0] for array in list_arrays])
+        if np.array_equal(addresses - addresses[0], np.arange(len(list_arrays)) * base.strides[0]) and addresses[0] == base.__array_interface__['data'][0]:
+            return base
+
+    return np.vstack(list_arrays)
+
+
+def update_stochastic_dataframe(
+        df_previous: pd.DataFrame,
+        df: pd.DataFrame,
+        iterations: int,
+        seed: int,
+        counter_based: bool | None = None,
+        dtype: np.dtype | None = None
+    ) -> pd.DataFrame:
+    """
+    Incrementally updates a stochastic dataframe after the parameter data has changed.
+
+    The function compares a new dataframe ``df`` (eg. as returned by `inout.load_data_from_json` after an edit)
+    to a previous stochastic dataframe ``df_previous`` (as returned by ``generate_stochastic_dataframe(..., seed=seed)``)
+    by UID and by the distribution-related columns
+    (``uncertainty_type``, ``loc``, ``scale``, ``shape``, ``minimum``, ``maximum``):
+
+    - unchanged UIDs reuse the samples of ``df_previous`` (without copying them),
+    - added UIDs and UIDs with changed distributions are resampled,
+    - removed UIDs are dropped.
 
-    return df
\ No newline at end of file
+    Changes to other (metadata) columns are taken from ``df`` without resampling.
+    Because every UID is sampled from its own random stream (see `generate_stochastic_dataframe`),
+    the result is bit-identical to ``generate_stochastic_dataframe(df, iterations, seed, counter_based=counter_based)``,
+    at a cost proportional to the number of changed rows.
+
+    Parameters
+    ----------
+    df_previous : pd.DataFrame
+        The previous stochastic dataframe, generated with the same ``seed`` and ``iterations``.
+
+    df : pd.DataFrame
+        The new parameter data.
+
+    iterations : int
+        The number of iterations.
+
+    seed : int
+        The global seed used to generate ``df_previous``.
+
+    counter_based : bool, optional
+        Whether ``df_previous`` was generated with the counter-based random number generator
+        (see `generate_stochastic_dataframe`). Defaults to ``df_previous.attrs['counter_based']``
+        (set by `generate_stochastic_dataframe`), or ``False`` if not recorded.
+        Counter-based rows are resampled with the ``rtol`` of ``df_previous.attrs['rtol']``, if recorded.
+
+    dtype : np.dtype, optional
+        The data type of the samples of ``df_previous``, in which the changed rows are resampled
+        (see `generate_stochastic_dataframe`). Defaults to the data type of the samples of ``df_previous``.
+
+    Returns
+    -------
+    pd.DataFrame
+        The stochastic dataframe of the new parameter data.
+
+    Raises
+    ------
+    ValueError
+        If ``df_previous`` is not a stochastic dataframe with ``iterations`` iterations,
+        or if its samples are not of type ``dtype``.
+    """
+
+    if 'parameter_value_stochastic' not in df_previous.columns:
+        raise ValueError("Previous DataFrame does not have 'parameter_value_stochastic' column")
+    if len(df_previous) and len(df_previous['parameter_value_stochastic'].iloc[0]) != int(iterations):
+        raise ValueError(f"Previous DataFrame was generated with a different number of iterations (expected {iterations}).")
+
+    if counter_based is None:
+        counter_based = df_previous.attrs.get('counter_based', False)
+    dtype_previous: np.dtype | None = df_previous['parameter_value_stochastic'].iloc[0].dtype if len(df_previous) else None
+    dtype = np.dtype(dtype if dtype is not None else dtype_previous if dtype_previous is not None else np.float64)
+    if dtype_previous is not None and dtype_previous != dtype:
+        raise ValueError(f"Previous DataFrame samples are of type {dtype_previous}, not {dtype}.")
+
+    distribution_columns: list = ['uncertainty_type', 'loc', 'scale', 'shape', 'minimum', 'maximum']
+    distribution_columns = [col for col in distribution_columns if col in df.columns or col in df_previous.columns]
+
+    uids_common = df.index.intersection(df_previous.index, sort=False)
+    df_new_common = df.loc[uids_common].reindex(columns=distribution_columns)
+    df_previous_common = df_previous.loc[uids_common].reindex(columns=distribution_columns)
+
+    mask_unchanged = (
+        (df_new_common == df_previous_common) | (df_new_common.isna() & df_previous_common.isna())
+    ).all(axis=1)
+    uids_unchanged = uids_common[mask_unchanged.to_numpy()]
+    uids_resample = df.index.difference(uids_unchanged, sort=False)
+
+    df_resampled = _sample_parameters_from_distrivution(
+        df = _add_distribution_dict_column(df.loc[uids_resample].copy()),
+        iterations = iterations,
+        seed = seed,
+        dtype = dtype,
+        counter_based = counter_based,
+        rtol = df_previous.attrs.get('rtol') if counter_based else None,
+    )
+
+    df = df.copy()
+    for col in ['parameter_value_distribution_dict', 'parameter_value_stochastic']:
+        series_col = pd.concat([
+            df_previous.loc[uids_unchanged, col],
+            df_resampled[col],
+        ])
+        df[col] = series_col.reindex(df.index)
+    df.attrs['counter_based'] = bool(counter_based)
+    df.attrs['rtol'] = df_resampled.attrs['rtol']
+
+    logging.info(f"Stochastic DataFrame updated (#unchanged: {len(uids_unchanged)}, #resampled: {len(uids_resample)}, #removed: {len(df_previous.index.difference(df.index))}).")
+
+    return df
@@ -3,13 +3,15 @@ import tomllib
 import pathlib
 
 
-def load_project_configuration() -> dict:
+def load_project_configuration(section: str = "uncertainty_distributions_mapping") -> dict:
     """
     Loads the project configuration file.
 
     This method loads the project configuration file,
     which is located at the root level of the project.
-    It returns a dictionary representation of the configuration file.
+    It returns a dictionary representation of a section of the configuration file
+    (by default, the mapping of uncertainty distribution names to ``stats_arrays`` integer codes;
+    ``"distribution_columns_mapping"``: the mapping of source columns to ``stats_arrays`` columns).
 
     Raises
     ------
@@ -26,4 +28,7 @@ def load_project_configuration() -> dict:
     except tomllib.TOMLDecodeError as exception:
         raise ValueError(f"Malformatted configuration file: {exception}")
 
-    return config_file
\ No newline at end of file
+    if section not in config_file:
+        raise ValueError(f"Configuration file does not contain the section '{section}'.")
+
+    return config_file[section]
\ No newline at end of file
@@ -0,0 +1,178 @@
+# %%
+# data science
+import pandas as pd
+import numpy as np
+import stats_arrays as sarrays # for uncertainty distributions
+# debugging
+import logging
+
+
+def _get_float_column(df: pd.DataFrame, col: str) -> np.ndarray:
+    """
+    Returns a column of the dataframe as a ``float64`` array, or an array of ``NaN`` if the column is missing.
+    """
+
+    if col not in df.columns:
+        return np.full(len(df), np.nan)
+
+    return pd.to_numeric(df[col], errors='coerce').to_numpy(dtype=np.float64)
+
+
+def _distribution_rules(df: pd.DataFrame, uncertainty_col: str) -> list:
+    """
+    Builds the list of distribution-specific validation rules for a dataframe.
+
+    Each rule is a tuple ``(reason, mask)``, where ``mask`` is a boolean array
+    that is ``True`` for every row violating the rule.
+    The rules mirror the ``validate`` methods of the ``stats_arrays`` distributions,
+    plus checks that ``stats_arrays`` only fails on during sampling (eg. a missing triangular ``loc``).
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        The parameter data.
+
+    uncertainty_col : str
+        The name of the column containing the ``stats_arrays`` integer codes.
+
+    Returns
+    -------
+    list
+        A list of ``(reason, mask)`` tuples.
+
+    See Also
+    --------
+    `stats_arrays uncertainty types <https://stats-arrays.readthedocs.io/en/latest/#mapping-parameter-array-columns-to-uncertainty-distributions>`_.
+    """
+
+    uncertainty_type = _get_float_column(df, uncertainty_col)
+    loc = _get_float_column(df, 'loc')
+    scale = _get_float_column(df, 'scale')
+    shape = _get_float_column(df, 'shape')
+    minimum = _get_float_column(df, 'minimum')
+    maximum = _get_float_column(df, 'maximum')
+
+    def is_type(*codes: int) -> np.ndarray:
+        return np.isin(uncertainty_type, codes)
+
+    valid_codes: list = list(sarrays.uncertainty_choices.id_dict)
+
+    with np.errstate(invalid='ignore'): # comparisons with NaN are False
+        return [
+            ("invalid uncertainty type", ~is_type(*valid_codes)),
+            ("minimum >= maximum", minimum >= maximum),
+            ("missing loc", is_type(0, 1, 2, 3, 5, 11, 13) & np.isnan(loc)),
+            ("missing or non-positive scale", is_type(2, 3, 8, 9, 11) & ~(scale > 0)),
+            ("non-positive scale", is_type(12, 13) & (scale <= 0)),
+            ("missing or non-positive shape", is_type(8, 9, 12) & ~(shape > 0)),
+            ("missing minimum or maximum", is_type(4, 5, 13) & (np.isnan(minimum) | np.isnan(maximum))),
+            ("missing maximum", is_type(7) & np.isnan(maximum)),
+            ("loc outside [minimum, maximum]", is_type(5, 13) & ((loc < minimum) | (loc > maximum))),
+            ("loc outside [0, 1]", is_type(6) & ((loc < 0) | (loc > 1))),
+            ("non-positive alpha (loc)", is_type(10) & ~(loc > 0)),
+            ("non-positive beta (shape)", is_type(10) & ~(shape > 0)),
+            ("non-zero shape (not supported)", is_type(11) & (shape != 0)),
+        ]
+
+
+def validate_parameters(
+        df: pd.DataFrame,
+        mode: str = 'strict',
+        uncertainty_col: str = 'uncertainty_type'
+    ) -> tuple:
+    """
+    Validates the distribution parameters of all rows of a dataframe before sampling.
+
+    The function checks all distribution-specific constraints
+    (eg. ``minimum < maximum``, ``loc`` within the bounds of a triangular distribution,
+    positive ``scale`` for normal and lognormal distributions, valid uncertainty type codes)
+    column-wise, in one vectorized pass over the dataframe.
+    Without validation, invalid rows are only discovered when ``stats_arrays`` raises
+    during `stats.generate_stochastic_dataframe`, one distribution type at a time.
+
+    The function takes a dataframe of the form:
+
+    +-------------+-----------+-----+------------------+-----+---------+---------+-------+
+    | UID (index) | parameter | ... | uncertainty_type | loc | minimum | maximum | scale |
+    +=============+===========+=====+==================+=====+=========+=========+=======+
+    | 123         | foo       | ... | 5                | 8.4 | 2       | 11.2    | NaN   |
+    +-------------+-----------+-----+------------------+-----+---------+---------+-------+
+    | 456         | bar       | ... | 5                | 12  | 2       | 11.2    | NaN   |
+    +-------------+-----------+-----+------------------+-----+---------+---------+-------+
+    | 789         | baz       | ... | 3                | 0.1 | NaN     | NaN     | NaN   |
+    +-------------+-----------+-----+------------------+-----+---------+---------+-------+
+
+    and returns a report of the form:
+
+    +-------------+------------------+--------------------------------+
+    | UID (index) | uncertainty_type | reason                         |
+    +=============+==================+================================+
+    | 456         | 5                | loc outside [minimum, maximum] |
+    +-------------+------------------+--------------------------------+
+    | 789         | 3                | missing or non-positive scale  |
+    +-------------+------------------+--------------------------------+
+
+    A row violating several constraints appears once per violated constraint.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        The parameter data, with ``stats_arrays`` distribution columns
+        (eg. as returned by `inout.load_data_from_json`, or by `inout.normalize_distribution_columns` for Excel data).
+
+    mode : str, optional
+        ``'strict'`` (default): raise a ``ValueError`` summarizing the invalid rows.
+        ``'lenient'``: drop all invalid rows and return them in the report.
+
+    uncertainty_col : str, optional
+        The name of the column containing the ``stats_arrays`` integer codes.
+
+    Returns
+    -------
+    tuple
+        A tuple ``(df_valid, df_report)`` of the dataframe without invalid rows and the report.
+
+    Raises
+    ------
+    ValueError
+        If ``mode`` is ``'strict'`` and any row is invalid, if ``mode`` is not valid,
+        or if ``uncertainty_col`` is not a column of the dataframe
+        (eg. Excel data not yet normalized with `inout.normalize_distribution_columns`).
+    """
+
+    if mode not in ('strict', 'lenient'):
+        raise ValueError(f"Invalid validation mode '{mode}' (expected 'strict' or 'lenient').")
+    if uncertainty_col not in df.columns:
+        raise ValueError(f"DataFrame does not have the uncertainty type column '{uncertainty_col}' (columns: {list(df.columns)}).")
+
+    list_reports: list = []
+    mask_invalid: np.ndarray = np.zeros(len(df), dtype=bool)
+
+    for reason, mask in _distribution_rules(df, uncertainty_col):
+        if mask.any():
+            mask_invalid |= mask
+            list_reports.append(
+                pd.DataFrame(
+                    data = {
+                        'uncertainty_type': df[uncertainty_col].to_numpy()[mask],
+                        'reason': reason,
+                    },
+                    index = df.index[mask],
+                )
+            )
+
+    if list_reports:
+        df_report = pd.concat(list_reports)
+    else:
+        df_report = pd.DataFrame({'uncertainty_type': [], 'reason': []}, index=df.index[:0])
+
+    if mask_invalid.any():
+        summary: str = "\n".join(
+            f"{reason} ({len(df_reason)} rows): {list(df_reason.index[:10])}{' ...' if len(df_reason) > 10 else ''}"
+            for reason, df_reason in df_report.groupby('reason', sort=False)
+        )
+        if mode == 'strict':
+            raise ValueError(f"Invalid distribution parameters in {mask_invalid.sum()} rows:\n{summary}")
+        logging.warning(f"Dropped {mask_invalid.sum()} rows with invalid distribution parameters:\n{summary}")
+
+    return df[~mask_invalid], df_report